@@ -1,3 +1,29 @@
 from django.test import TestCase
 
-# Create your tests here.
+from shiftwise_backend.testing import QueryBudgetMixin, api_client, make_admin, make_users
+from .models import Announcement
+
+
+class AnnouncementQueryBudgetTests(QueryBudgetMixin, TestCase):
+    def setUp(self):
+        self.admin = make_admin()
+        self.employee = make_users(1, prefix="staff")[0]
+        self.recipients = make_users(5)
+
+    def make_announcements(self, count):
+        announcements = Announcement.objects.bulk_create([
+            Announcement(topic=f"Topic {i}", message="Body") for i in range(count)
+        ])
+        Through = Announcement.recipients.through
+        Through.objects.bulk_create([
+            Through(announcement_id=announcement.id, user_id=user.id)
+            for announcement in announcements
+            for user in self.recipients
+        ])
+
+    def test_admin_announcements(self):
+        # One query for the announcements, one for the prefetched recipients.
+        self.assertQueryBudget(api_client(self.admin), "/api/announcements/admin/", 2, self.make_announcements)
+
+    def test_employee_announcements(self):
+        self.assertQueryBudget(api_client(self.employee), "/api/announcements/", 2, self.make_announcements)
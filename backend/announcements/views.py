@@ -6,7 +6,7 @@ class AdminAnnouncementListView(generics.ListCreateAPIView):
     """
     Admin can list and create announcements.
     """
-    queryset = Announcement.objects.all().order_by("-created_at")
+    queryset = Announcement.objects.prefetch_related("recipients").order_by("-created_at")
     serializer_class = AnnouncementSerializer
     permission_classes = [permissions.IsAdminUser]
 
@@ -14,7 +14,7 @@ class AdminAnnouncementDetailView(generics.RetrieveUpdateDestroyAPIView):
     """
     Admin can retrieve, update, or delete a specific announcement.
     """
-    queryset = Announcement.objects.all()
+    queryset = Announcement.objects.prefetch_related("recipients")
     serializer_class = AnnouncementSerializer
     permission_classes = [permissions.IsAdminUser]
 class EmployeeAnnouncementListView(generics.ListAPIView):
@@ -28,4 +28,4 @@ class EmployeeAnnouncementListView(generics.ListAPIView):
 
     def get_queryset(self):
         # If announcements are for all employees:
-        return Announcement.objects.all().order_by("-created_at")
+        return Announcement.objects.prefetch_related("recipients").order_by("-created_at")
@@ -0,0 +1,108 @@
+# attendance/archive.py
+"""
+Time-based archival of old attendance records.
+
+Closed records that clocked in before the start of the month
+ATTENDANCE_ARCHIVE_MONTHS months ago are moved, in batches, from
+Attendance to ArchivedAttendance: each batch is copied with one bulk
+INSERT and removed with one DELETE inside its own transaction, so the
+job can be stopped and resumed at any point. Open records are never
+archived.
+
+The hot queries (active, per-user history, all records) only read
+Attendance, which therefore only holds recent data. Audits that need
+older periods read both tables through archived_union() or
+attendance_models().
+"""
+from datetime import datetime, time
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Value
+from django.utils import timezone
+
+from .models import Attendance, ArchivedAttendance
+
+# Columns copied to the archive (the original id included).
+ARCHIVE_FIELDS = (
+    "id", "shift_id", "employee_id", "clock_in_time", "clock_out_time", "clock_in_location",
+    "clock_out_location", "total_hours", "created_at", "updated_at",
+)
+
+
+def archive_months():
+    return getattr(settings, "ATTENDANCE_ARCHIVE_MONTHS", 12)
+
+
+def archive_cutoff(months=None, now=None):
+    """Start of the local month `months` months before `now`; older records are archived."""
+    months = archive_months() if months is None else months
+    today = timezone.localtime(now).date()
+    month_index = today.year * 12 + today.month - 1 - months
+    first = today.replace(year=month_index // 12, month=month_index % 12 + 1, day=1)
+    return timezone.make_aware(datetime.combine(first, time.min))
+
+
+def archive_attendance(before, batch_size=1000):
+    """
+    Moves closed records that clocked in before `before` to the archive.
+    Returns the number of records moved.
+    """
+    candidates = (
+        Attendance.objects.filter(clock_in_time__lt=before, clock_out_time__isnull=False)
+        .order_by("id")
+        .values_list(*ARCHIVE_FIELDS)
+    )
+    moved = 0
+    while True:
+        rows = list(candidates[:batch_size])
+        if not rows:
+            return moved
+        with transaction.atomic():
+            # ignore_conflicts makes a batch that was copied but not deleted (e.g. an interrupted run) harmless.
+            ArchivedAttendance.objects.bulk_create(
+                [ArchivedAttendance(**dict(zip(ARCHIVE_FIELDS, row))) for row in rows], ignore_conflicts=True
+            )
+            Attendance.objects.filter(id__in=[row[0] for row in rows]).delete()
+        moved += len(rows)
+
+
+def attendance_models(start, end=None):
+    """
+    The attendance tables that may hold records clocked in within
+    [start, end). Ranges reaching back before the archive cutoff include
+    the archive; later ones only when it holds records of the range, as
+    it does after archiving with fewer months than ATTENDANCE_ARCHIVE_MONTHS
+    (one indexed query).
+    """
+    if start is None or start < archive_cutoff():
+        return (Attendance, ArchivedAttendance)
+    archived = ArchivedAttendance.objects.filter(clock_in_time__gte=start)
+    if end is not None:
+        archived = archived.filter(clock_in_time__lt=end)
+    if archived.exists():
+        return (Attendance, ArchivedAttendance)
+    return (Attendance,)
+
+
+def archived_union(start=None, end=None, employee_id=None):
+    """
+    Records of both tables clocked in within [start, end), as value dicts
+    with the ARCHIVE_FIELDS keys plus "archived", ordered by clock-in time.
+    The archive is only queried when it may hold records of the range
+    (see attendance_models()).
+    """
+    querysets = []
+    for model in attendance_models(start, end):
+        records = model.objects.all()
+        if start is not None:
+            records = records.filter(clock_in_time__gte=start)
+        if end is not None:
+            records = records.filter(clock_in_time__lt=end)
+        if employee_id is not None:
+            records = records.filter(employee_id=employee_id)
+        querysets.append(
+            records.order_by().annotate(archived=Value(model is ArchivedAttendance)).values(*ARCHIVE_FIELDS, "archived")
+        )
+    first, *rest = querysets
+    return first.union(*rest, all=True).order_by("clock_in_time", "id") if rest else first.order_by("clock_in_time", "id")
@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from attendance.archive import archive_attendance, archive_cutoff, archive_months
+
+
+class Command(BaseCommand):
+    help = "Moves closed attendance records older than --months months (whole months) to the archive table."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--months", type=int, default=None, help="Defaults to ATTENDANCE_ARCHIVE_MONTHS.")
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        months = archive_months() if options["months"] is None else options["months"]
+        cutoff = archive_cutoff(months)
+        moved = archive_attendance(cutoff, options["batch_size"])
+        self.stdout.write(f"Archived {moved} attendance records clocked in before {cutoff.date()}.")
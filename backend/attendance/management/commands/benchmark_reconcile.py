@@ -0,0 +1,43 @@
+import random
+import time
+from datetime import datetime, timedelta, timezone
+
+from django.core.management.base import BaseCommand
+
+from attendance.reconcile import find_exceptions, merge_join
+
+
+class Command(BaseCommand):
+    help = "Benchmarks the reconciliation merge join on a synthetic month of shifts and punches."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--employees", type=int, default=2000)
+        parser.add_argument("--days", type=int, default=31)
+        parser.add_argument("--seed", type=int, default=1)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options["seed"])
+        first_day = datetime(2025, 1, 1, 9, tzinfo=timezone.utc)
+        shifts, punches = [], []
+        for employee_id in range(1, options["employees"] + 1):
+            for day in range(options["days"]):
+                shift_id = len(shifts) + 1
+                start = first_day + timedelta(days=day)
+                end = start + timedelta(hours=8)
+                shifts.append((shift_id, employee_id, start, end))
+                if rng.random() < 0.03:
+                    continue  # no-show
+                clock_in = start + timedelta(minutes=rng.randint(-10, 8))
+                clock_out = None if rng.random() < 0.02 else end + timedelta(minutes=rng.randint(-8, 15))
+                punches.append((employee_id, shift_id, clock_in, clock_out))
+
+        started = time.perf_counter()
+        exceptions = list(find_exceptions(
+            merge_join(iter(shifts), iter(punches)), first_day + timedelta(days=options["days"] + 1), timedelta(minutes=5)
+        ))
+        elapsed = time.perf_counter() - started
+
+        self.stdout.write(
+            f"Reconciled {len(shifts)} shifts against {len(punches)} punches and found "
+            f"{len(exceptions)} exceptions in {elapsed * 1000:.1f} ms."
+        )
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from attendance.presence import rebuild_presence
+
+
+class Command(BaseCommand):
+    help = "Rebuilds the Redis live presence index from the attendance records that are still open."
+
+    def handle(self, *args, **options):
+        count = rebuild_presence()
+        self.stdout.write(f"Indexed {count} open attendance records.")
@@ -0,0 +1,24 @@
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from attendance.reconcile import reconcile
+
+
+class Command(BaseCommand):
+    help = "Reconciles scheduled shifts with attendance and records exceptions. Meant to run nightly (default: yesterday)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--date-from", type=date.fromisoformat)
+        parser.add_argument("--date-to", type=date.fromisoformat)
+
+    def handle(self, *args, **options):
+        yesterday = timezone.localdate() - timedelta(days=1)
+        date_from = options["date_from"] or yesterday
+        date_to = options["date_to"] or date_from
+        if date_to < date_from:
+            raise CommandError("--date-to must not be before --date-from.")
+        result = reconcile(date_from, date_to)
+        found = ", ".join(f"{count} {kind}" for kind, count in result["exceptions"].items())
+        self.stdout.write(f"Checked {result['shifts']} shifts from {date_from} to {date_to}: {found}.")
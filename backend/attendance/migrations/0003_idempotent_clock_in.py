@@ -0,0 +1,48 @@
+# Generated by Django 4.2.19 on 2026-10-18 19:06
+
+from django.db import migrations, models
+from django.db.models import Count, Max
+
+
+def close_duplicate_open_records(apps, schema_editor):
+    """
+    Double taps used to leave several open records for the same shift. The
+    newest one stays open; the others are closed with zero hours so the
+    one-open-record constraint can be added.
+    """
+    Attendance = apps.get_model('attendance', 'Attendance')
+    open_records = Attendance.objects.filter(clock_out_time__isnull=True)
+    duplicates = (
+        open_records.values('employee_id', 'shift_id').order_by()
+        .annotate(count=Count('id'), newest=Max('id')).filter(count__gt=1)
+    )
+    for group in duplicates:
+        stale = open_records.filter(employee_id=group['employee_id'], shift_id=group['shift_id']).exclude(id=group['newest'])
+        for record in stale:
+            record.clock_out_time = record.clock_in_time or record.created_at
+            record.total_hours = 0
+            record.save(update_fields=['clock_out_time', 'total_hours'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('attendance', '0002_alter_attendance_options'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='attendance',
+            name='idempotency_key',
+            field=models.CharField(blank=True, editable=False, max_length=64, null=True),
+        ),
+        migrations.RunPython(close_duplicate_open_records, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='attendance',
+            constraint=models.UniqueConstraint(condition=models.Q(('clock_out_time__isnull', True)), fields=('employee', 'shift'), name='attendance_one_open_per_shift'),
+        ),
+        migrations.AddConstraint(
+            model_name='attendance',
+            constraint=models.UniqueConstraint(condition=models.Q(('idempotency_key__isnull', False)), fields=('employee', 'idempotency_key'), name='attendance_employee_idempotency_key'),
+        ),
+    ]
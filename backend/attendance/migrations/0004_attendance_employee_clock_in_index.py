@@ -0,0 +1,17 @@
+# Generated by Django 4.2.19 on 2026-10-18 19:09
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('attendance', '0003_idempotent_clock_in'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='attendance',
+            index=models.Index(fields=['employee', 'clock_in_time'], name='attendance_emp_clock_in_idx'),
+        ),
+    ]
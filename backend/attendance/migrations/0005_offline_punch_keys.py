@@ -0,0 +1,22 @@
+# Generated by Django 4.2.19 on 2026-10-18 19:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('attendance', '0004_attendance_employee_clock_in_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='attendance',
+            name='clock_out_key',
+            field=models.CharField(blank=True, editable=False, max_length=64, null=True),
+        ),
+        migrations.AddConstraint(
+            model_name='attendance',
+            constraint=models.UniqueConstraint(condition=models.Q(('clock_out_key__isnull', False)), fields=('employee', 'clock_out_key'), name='attendance_employee_clock_out_key'),
+        ),
+    ]
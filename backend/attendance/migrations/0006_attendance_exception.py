@@ -0,0 +1,37 @@
+# Generated by Django 4.2.19 on 2026-10-18 19:12
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('shifts', '0009_shift_import'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('attendance', '0005_offline_punch_keys'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AttendanceException',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('late', 'Late arrival'), ('early_departure', 'Early departure'), ('no_show', 'No-show'), ('missing_clock_in', 'Missing clock-in'), ('missing_clock_out', 'Missing clock-out')], max_length=20)),
+                ('minutes', models.PositiveIntegerField(default=0)),
+                ('shift_start', models.DateTimeField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('employee', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='attendance_exceptions', to=settings.AUTH_USER_MODEL)),
+                ('shift', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='attendance_exceptions', to='shifts.shift')),
+            ],
+            options={
+                'ordering': ['shift_start', 'id'],
+                'indexes': [models.Index(fields=['shift_start', 'kind'], name='att_exception_start_kind_idx'), models.Index(fields=['employee', 'shift_start'], name='att_exception_emp_start_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='attendanceexception',
+            constraint=models.UniqueConstraint(fields=('shift', 'kind'), name='attendance_exception_shift_kind'),
+        ),
+    ]
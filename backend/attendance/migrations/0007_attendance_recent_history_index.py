@@ -0,0 +1,21 @@
+# Generated by Django 4.2.19 on 2026-10-18 19:18
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('attendance', '0006_attendance_exception'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='attendance',
+            name='attendance_emp_clock_in_idx',
+        ),
+        migrations.AddIndex(
+            model_name='attendance',
+            index=models.Index(fields=['employee', '-clock_in_time', '-id'], name='attendance_emp_recent_idx'),
+        ),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 4.2.19 on 2026-10-18 19:19
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('shifts', '0009_shift_import'),
+        ('attendance', '0007_attendance_recent_history_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedAttendance',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('clock_in_time', models.DateTimeField(blank=True, null=True)),
+                ('clock_out_time', models.DateTimeField(blank=True, null=True)),
+                ('clock_in_location', models.CharField(blank=True, max_length=255)),
+                ('clock_out_location', models.CharField(blank=True, max_length=255)),
+                ('total_hours', models.DecimalField(blank=True, decimal_places=2, max_digits=5, null=True)),
+                ('created_at', models.DateTimeField()),
+                ('updated_at', models.DateTimeField()),
+                ('archived_at', models.DateTimeField(auto_now_add=True)),
+                ('employee', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archived_attendances', to=settings.AUTH_USER_MODEL)),
+                ('shift', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archived_attendances', to='shifts.shift')),
+            ],
+            options={
+                'ordering': ['clock_in_time', 'id'],
+                'indexes': [models.Index(fields=['employee', 'clock_in_time'], name='archived_att_emp_clock_in_idx'), models.Index(fields=['clock_in_time'], name='archived_att_clock_in_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 4.2.19 on 2026-10-18 19:50
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('shifts', '0009_shift_import'),
+        ('attendance', '0008_archived_attendance'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='archivedattendance',
+            name='employee',
+            field=models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='archived_attendances', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AlterField(
+            model_name='archivedattendance',
+            name='shift',
+            field=models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='archived_attendances', to='shifts.shift'),
+        ),
+    ]
@@ -15,6 +15,10 @@ class Attendance(models.Model):
     clock_in_location = models.CharField(max_length=255, blank=True)
     clock_out_location = models.CharField(max_length=255, blank=True)
     total_hours = models.DecimalField(max_digits=5, decimal_places=2, null=True, blank=True)
+    # Client-supplied (or generated) key that makes retried clock-ins return the same record.
+    idempotency_key = models.CharField(max_length=64, null=True, blank=True, editable=False)
+    # Client event id of the offline punch that clocked this record out, so replays are ignored.
+    clock_out_key = models.CharField(max_length=64, null=True, blank=True, editable=False)
     
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
@@ -26,11 +30,116 @@ class Attendance(models.Model):
         """
         Compute total_hours when clock_out_time is set.
         """
+        self.compute_total_hours()
+        super().save(*args, **kwargs)
+
+    def compute_total_hours(self):
+        """Sets total_hours from the clock times (also used before bulk writes, which skip save())."""
         if self.clock_in_time and self.clock_out_time:
             duration = self.clock_out_time - self.clock_in_time
             hours = duration.total_seconds() / 3600
             self.total_hours = round(hours, 2)
-        super().save(*args, **kwargs)
     
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            # Per-employee history, most recent first (also scanned backwards for hour aggregation).
+            models.Index(fields=['employee', '-clock_in_time', '-id'], name='attendance_emp_recent_idx'),
+        ]
+        constraints = [
+            # At most one open (not yet clocked out) record per employee and shift.
+            models.UniqueConstraint(
+                fields=['employee', 'shift'],
+                condition=models.Q(clock_out_time__isnull=True),
+                name='attendance_one_open_per_shift',
+            ),
+            models.UniqueConstraint(
+                fields=['employee', 'idempotency_key'],
+                condition=models.Q(idempotency_key__isnull=False),
+                name='attendance_employee_idempotency_key',
+            ),
+            models.UniqueConstraint(
+                fields=['employee', 'clock_out_key'],
+                condition=models.Q(clock_out_key__isnull=False),
+                name='attendance_employee_clock_out_key',
+            ),
+        ]
+
+
+class AttendanceException(models.Model):
+    """
+    A difference between a scheduled shift and the punches recorded for it,
+    written by the reconciliation job (see attendance/reconcile.py).
+    """
+    LATE = 'late'
+    EARLY_DEPARTURE = 'early_departure'
+    NO_SHOW = 'no_show'
+    MISSING_CLOCK_IN = 'missing_clock_in'
+    MISSING_CLOCK_OUT = 'missing_clock_out'
+    KIND_CHOICES = (
+        (LATE, 'Late arrival'),
+        (EARLY_DEPARTURE, 'Early departure'),
+        (NO_SHOW, 'No-show'),
+        (MISSING_CLOCK_IN, 'Missing clock-in'),
+        (MISSING_CLOCK_OUT, 'Missing clock-out'),
+    )
+
+    shift = models.ForeignKey(Shift, on_delete=models.CASCADE, related_name='attendance_exceptions')
+    employee = models.ForeignKey(User, on_delete=models.CASCADE, related_name='attendance_exceptions')
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    # Minutes late, left early or scheduled but not worked (0 for missing punches).
+    minutes = models.PositiveIntegerField(default=0)
+    # Copy of the shift's start_at, so exceptions can be filtered and replaced by range without a join.
+    shift_start = models.DateTimeField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['shift_start', 'id']
+        indexes = [
+            models.Index(fields=['shift_start', 'kind'], name='att_exception_start_kind_idx'),
+            models.Index(fields=['employee', 'shift_start'], name='att_exception_emp_start_idx'),
+        ]
+        constraints = [
+            models.UniqueConstraint(fields=['shift', 'kind'], name='attendance_exception_shift_kind'),
+        ]
+
+    def __str__(self):
+        return f"{self.get_kind_display()} - Shift #{self.shift_id}"
+
+
+class ArchivedAttendance(models.Model):
+    """
+    A closed attendance record moved out of the hot Attendance table by
+    `manage.py archive_attendance` (see attendance/archive.py). Keeps the
+    original id, so archived records can still be traced in payroll audits.
+
+    The archive outlives the live rows: deleting a shift or a user leaves
+    its archived records (and their shift_id/employee_id) in place, so the
+    references have no database constraint.
+    """
+    id = models.BigIntegerField(primary_key=True)
+    shift = models.ForeignKey(
+        Shift, on_delete=models.DO_NOTHING, db_constraint=False, related_name='archived_attendances'
+    )
+    employee = models.ForeignKey(
+        User, on_delete=models.DO_NOTHING, db_constraint=False, related_name='archived_attendances'
+    )
+    clock_in_time = models.DateTimeField(null=True, blank=True)
+    clock_out_time = models.DateTimeField(null=True, blank=True)
+    clock_in_location = models.CharField(max_length=255, blank=True)
+    clock_out_location = models.CharField(max_length=255, blank=True)
+    total_hours = models.DecimalField(max_digits=5, decimal_places=2, null=True, blank=True)
+    # Timestamps of the original record.
+    created_at = models.DateTimeField()
+    updated_at = models.DateTimeField()
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['clock_in_time', 'id']
+        indexes = [
+            models.Index(fields=['employee', 'clock_in_time'], name='archived_att_emp_clock_in_idx'),
+            models.Index(fields=['clock_in_time'], name='archived_att_clock_in_idx'),
+        ]
+
+    def __str__(self):
+        return f"Archived attendance of user #{self.employee_id} - Shift #{self.shift_id}"
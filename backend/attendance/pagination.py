@@ -0,0 +1,38 @@
+# attendance/pagination.py
+from datetime import datetime
+
+from django.db.models import F, Q
+
+from shifts.pagination import ShiftCursorPagination
+
+
+class AttendanceCursorPagination(ShiftCursorPagination):
+    """
+    Keyset (cursor) pagination over attendance records, most recent first,
+    ordered by (clock_in_time DESC, id DESC). Records without a clock-in
+    time come first, which is where a descending index keeps NULLs on
+    PostgreSQL. Backed by the (employee, -clock_in_time, -id) index, so a
+    page of one employee's history costs the same however long their
+    tenure.
+
+    Opt-in like ShiftCursorPagination: only used when the client sends
+    `cursor` or `page_size`.
+    """
+    ordering = (F('clock_in_time').desc(nulls_first=True), '-id')
+
+    def seek(self, queryset, cursor):
+        last_clock_in, last_id = cursor
+        if last_clock_in is None:
+            return queryset.filter(Q(clock_in_time__isnull=True, id__lt=last_id) | Q(clock_in_time__isnull=False))
+        return queryset.filter(clock_in_time__lte=last_clock_in).filter(
+            Q(clock_in_time__lt=last_clock_in) | Q(clock_in_time=last_clock_in, id__lt=last_id)
+        )
+
+    def parse_cursor(self, raw):
+        if len(raw) != 2:
+            raise ValueError(raw)
+        return (datetime.fromisoformat(raw[0]) if raw[0] is not None else None), int(raw[1])
+
+    def cursor_values(self, attendance):
+        clock_in = attendance.clock_in_time.isoformat() if attendance.clock_in_time else None
+        return [clock_in, attendance.id]
@@ -0,0 +1,136 @@
+# attendance/presence.py
+"""
+Live "who is on the clock" index in Redis.
+
+Every open attendance record is kept in a sorted set per location (the
+shift's location), scored by clock-in time, and its display details in
+one hash:
+
+    <prefix>locations         set of locations that have sorted sets
+    <prefix>loc:<location>    sorted set: attendance id -> clock-in epoch
+    <prefix>people            hash: attendance id -> JSON details
+
+Records are added on clock-in and removed on clock-out, after the
+database transaction commits. Reading the floor costs at most three
+round trips (locations, pipelined sorted sets, details) whatever the
+headcount, and never touches the database. The index is derived data:
+a Redis outage only logs a warning, and `manage.py rebuild_presence`
+restores it from the open Attendance rows.
+"""
+import json
+import logging
+
+from django.conf import settings
+from django.db import transaction
+from django_redis import get_redis_connection
+from redis.exceptions import RedisError
+
+from .models import Attendance
+
+logger = logging.getLogger(__name__)
+
+
+def key(suffix):
+    return f"{getattr(settings, 'PRESENCE_KEY_PREFIX', 'presence:')}{suffix}"
+
+
+def location_key(location):
+    return key(f"loc:{location}")
+
+
+def entry(record):
+    """(location, attendance id, score, JSON details) for an open record."""
+    details = {
+        "attendance": record.id,
+        "employee": record.employee_id,
+        "name": record.employee.name,
+        "email": record.employee.email,
+        "shift": record.shift_id,
+        "clock_in_time": record.clock_in_time.isoformat() if record.clock_in_time else None,
+    }
+    score = record.clock_in_time.timestamp() if record.clock_in_time else 0
+    return record.shift.location, record.id, score, json.dumps(details)
+
+
+def add_entries(pipe, entries):
+    for location, attendance_id, score, details in entries:
+        pipe.sadd(key("locations"), location)
+        pipe.zadd(location_key(location), {attendance_id: score})
+        pipe.hset(key("people"), attendance_id, details)
+
+
+def write(opened, closed):
+    try:
+        pipe = get_redis_connection("default").pipeline()
+        add_entries(pipe, opened)
+        for location, attendance_id in closed:
+            pipe.zrem(location_key(location), attendance_id)
+            pipe.hdel(key("people"), attendance_id)
+        pipe.execute()
+    except RedisError as exc:
+        logger.warning("Could not update the presence index (%s); run rebuild_presence to resync.", exc)
+
+
+def update_presence(records):
+    """
+    Adds the open `records` to the index and removes the closed ones once
+    the current transaction commits. Each record needs its employee and
+    shift loaded (select_related) to avoid extra queries.
+    """
+    opened, closed = [], []
+    for record in records:
+        if record.clock_out_time is None:
+            opened.append(entry(record))
+        else:
+            closed.append((record.shift.location, record.id))
+    if opened or closed:
+        transaction.on_commit(lambda: write(opened, closed))
+
+
+def rebuild_presence(batch_size=2000):
+    """
+    Replaces the index with the open Attendance rows, atomically for
+    readers. Returns the number of records indexed.
+    """
+    records = (
+        Attendance.objects.filter(clock_out_time__isnull=True)
+        .select_related("employee", "shift")
+        .order_by("id")
+    )
+    connection = get_redis_connection("default")
+    pipe = connection.pipeline(transaction=True)
+    stale = connection.smembers(key("locations"))
+    pipe.delete(key("locations"), key("people"), *(location_key(location.decode()) for location in stale))
+    count = 0
+    for record in records.iterator(chunk_size=batch_size):
+        add_entries(pipe, [entry(record)])
+        count += 1
+    pipe.execute()
+    return count
+
+
+def current_presence(location=None):
+    """
+    Returns [{"location", "headcount", "people": [...]}] for every location
+    (or just `location`) with someone on the clock, people ordered by
+    clock-in time. Raises RedisError when Redis is unreachable.
+    """
+    connection = get_redis_connection("default")
+    if location is not None:
+        locations = [location]
+    else:
+        locations = sorted(name.decode() for name in connection.smembers(key("locations")))
+
+    pipe = connection.pipeline(transaction=False)
+    for name in locations:
+        pipe.zrange(location_key(name), 0, -1)
+    members = pipe.execute()
+    ids = [attendance_id for location_ids in members for attendance_id in location_ids]
+    people = dict(zip(ids, connection.hmget(key("people"), ids))) if ids else {}
+
+    floor = []
+    for name, location_ids in zip(locations, members):
+        found = [json.loads(people[attendance_id]) for attendance_id in location_ids if people.get(attendance_id)]
+        if found:
+            floor.append({"location": name, "headcount": len(found), "people": found})
+    return floor
@@ -0,0 +1,167 @@
+# attendance/punches.py
+"""
+Batch ingestion of offline clock events.
+
+Kiosks and the mobile app queue punches while offline and upload them in
+one request when they reconnect. Every event carries a client event id:
+a clock-in event id becomes the record's idempotency_key and a clock-out
+event id its clock_out_key, so replaying a batch (or part of one) never
+creates or closes a record twice.
+
+The batch is validated, de-duplicated and sorted by time, then paired per
+shift against the employee's open records: a clock-in opens a record and
+a clock-out closes the open one. The shifts and the relevant attendance
+records are loaded with one query each, and all writes go out as one
+bulk INSERT and one bulk UPDATE inside a single transaction.
+"""
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+from rest_framework import serializers
+
+from shifts.models import Shift
+from .models import Attendance
+from .presence import update_presence
+
+CLOCK_IN = "in"
+CLOCK_OUT = "out"
+
+# Per-event outcomes.
+CREATED = "created"            # a clock-in that opened a new record
+CLOSED = "closed"              # a clock-out that closed the open record
+DUPLICATE = "duplicate"        # an event id that was already ingested
+ALREADY_OPEN = "already_open"  # a clock-in while the shift's record is still open
+REJECTED = "rejected"
+
+
+class PunchEventSerializer(serializers.Serializer):
+    event_id = serializers.CharField(max_length=64)
+    type = serializers.ChoiceField(choices=(CLOCK_IN, CLOCK_OUT))
+    shift = serializers.IntegerField(min_value=1)
+    timestamp = serializers.DateTimeField()
+    location = serializers.CharField(max_length=255, required=False, allow_blank=True, default="")
+
+
+def max_events():
+    return getattr(settings, "PUNCH_BATCH_MAX_EVENTS", 500)
+
+
+def ingest_punches(user, events):
+    """
+    Ingests `events` (a list of raw event dicts) for `user`.
+
+    Returns one result per event, in the order given:
+      {"event_id": ..., "status": ..., "attendance": <id or None>}
+    plus "errors" for rejected events. May raise IntegrityError when a
+    concurrent clock-in wins the race; the whole batch can then be retried.
+    """
+    results = [None] * len(events)
+    records = [None] * len(events)
+    serializer = PunchEventSerializer()
+    valid, first_seen, duplicates = [], {}, {}
+    for index, raw in enumerate(events):
+        try:
+            data = serializer.run_validation(raw)
+        except serializers.ValidationError as exc:
+            event_id = raw.get("event_id") if isinstance(raw, dict) else None
+            results[index] = {"event_id": event_id, "status": REJECTED, "errors": exc.detail}
+            continue
+        if data["event_id"] in first_seen:
+            duplicates[index] = first_seen[data["event_id"]]
+            results[index] = {"event_id": data["event_id"], "status": DUPLICATE}
+            continue
+        first_seen[data["event_id"]] = index
+        valid.append((index, data))
+
+    shift_ids = {data["shift"] for _, data in valid}
+    known_shifts = Shift.objects.only("id", "location").in_bulk(shift_ids)
+    event_ids = list(first_seen)
+    existing = Attendance.objects.filter(employee=user).filter(
+        Q(shift_id__in=shift_ids, clock_out_time__isnull=True)
+        | Q(idempotency_key__in=event_ids)
+        | Q(clock_out_key__in=event_ids)
+    ).select_related("employee", "shift")
+    by_key = {CLOCK_IN: {}, CLOCK_OUT: {}}
+    open_by_shift = {}
+    for record in existing:
+        if record.idempotency_key:
+            by_key[CLOCK_IN][record.idempotency_key] = record
+        if record.clock_out_key:
+            by_key[CLOCK_OUT][record.clock_out_key] = record
+        if record.clock_out_time is None:
+            open_by_shift[record.shift_id] = record
+
+    created, updated = [], {}
+    # Clock-ins sort before clock-outs with the same timestamp.
+    for index, data in sorted(valid, key=lambda item: (item[1]["timestamp"], item[1]["type"] != CLOCK_IN, item[0])):
+        event_id, kind, shift_id, moment = data["event_id"], data["type"], data["shift"], data["timestamp"]
+        result = {"event_id": event_id, "status": None}
+        results[index] = result
+
+        known = by_key[kind].get(event_id)
+        if known is not None:
+            result["status"], records[index] = DUPLICATE, known
+            continue
+        if shift_id not in known_shifts:
+            result.update(status=REJECTED, errors={"shift": ["Shift not found."]})
+            continue
+
+        record = open_by_shift.get(shift_id)
+        if kind == CLOCK_IN:
+            if record is not None:
+                result["status"], records[index] = ALREADY_OPEN, record
+                continue
+            record = Attendance(
+                shift=known_shifts[shift_id], employee=user, clock_in_time=moment,
+                clock_in_location=data["location"], idempotency_key=event_id,
+            )
+            created.append(record)
+            open_by_shift[shift_id] = by_key[CLOCK_IN][event_id] = record
+            result["status"], records[index] = CREATED, record
+            continue
+
+        if record is None:
+            result.update(status=REJECTED, errors={"detail": ["No open clock-in for this shift."]})
+            continue
+        if record.clock_in_time and moment < record.clock_in_time:
+            result.update(status=REJECTED, errors={"timestamp": ["Clock-out is before the clock-in."]})
+            continue
+        record.clock_out_time = moment
+        record.clock_out_location = data["location"]
+        record.clock_out_key = event_id
+        record.compute_total_hours()
+        del open_by_shift[shift_id]
+        by_key[CLOCK_OUT][event_id] = record
+        if record.pk is not None:
+            updated[record.pk] = record
+        result["status"], records[index] = CLOSED, record
+
+    with transaction.atomic():
+        if created:
+            Attendance.objects.bulk_create(created)
+            if any(record.pk is None for record in created):
+                # Backends that cannot return ids from a bulk insert: read them back by key.
+                ids = dict(
+                    Attendance.objects.filter(
+                        employee=user, idempotency_key__in=[record.idempotency_key for record in created]
+                    ).values_list("idempotency_key", "id")
+                )
+                for record in created:
+                    record.pk = ids[record.idempotency_key]
+        if updated:
+            now = timezone.now()
+            for record in updated.values():
+                record.updated_at = now
+            Attendance.objects.bulk_update(
+                updated.values(),
+                ["clock_out_time", "clock_out_location", "clock_out_key", "total_hours", "updated_at"],
+            )
+
+    update_presence([*created, *updated.values()])
+
+    for index, first in duplicates.items():
+        records[index] = records[first]
+    for result, record in zip(results, records):
+        result["attendance"] = record.pk if record is not None else None
+    return results
@@ -0,0 +1,137 @@
+# attendance/reconcile.py
+"""
+Scheduled vs actual reconciliation.
+
+Compares the shifts that started in a date range with the attendance
+recorded for them and writes an AttendanceException for every late
+arrival, early departure, no-show and missing punch.
+
+Both tables are read once as plain tuples, sorted by employee, and merged
+in a single pass: for each employee, the punches are gathered while
+walking the shift stream, so only one employee's records are in memory
+at a time and no query runs per shift. Punches are matched to the shift
+they were recorded against. The exceptions for the range are then
+replaced in one transaction with bulk inserts, so re-running the job is
+safe.
+"""
+from collections import defaultdict
+from datetime import timedelta
+from itertools import groupby
+from operator import itemgetter
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from shifts.models import Shift
+from shiftwise_backend.exports import chunk_size, day_end, day_start
+from .models import Attendance, AttendanceException
+
+# Longest range a single reconciliation run may span.
+MAX_RECONCILE_DAYS = 62
+
+SHIFT_FIELDS = ("id", "employee_id", "start_at", "end_at")
+PUNCH_FIELDS = ("employee_id", "shift_id", "clock_in_time", "clock_out_time")
+
+
+def grace():
+    return timedelta(minutes=getattr(settings, "RECONCILE_GRACE_MINUTES", 5))
+
+
+def minutes_between(earlier, later):
+    return int((later - earlier).total_seconds() // 60)
+
+
+def merge_join(shifts, punches):
+    """
+    Pairs two streams sorted by employee id: `shifts` of SHIFT_FIELDS tuples
+    and `punches` of PUNCH_FIELDS tuples. Yields (shift, punches) for every
+    shift, where punches are those recorded against it by its employee.
+    """
+    punches = iter(punches)
+    pending = next(punches, None)
+    for employee_id, group in groupby(shifts, key=itemgetter(1)):
+        while pending is not None and pending[0] < employee_id:
+            pending = next(punches, None)
+        by_shift = defaultdict(list)
+        while pending is not None and pending[0] == employee_id:
+            by_shift[pending[1]].append(pending)
+            pending = next(punches, None)
+        for shift in group:
+            yield shift, by_shift.get(shift[0], ())
+
+
+def find_exceptions(pairs, now, grace):
+    """
+    Yields (shift_id, employee_id, shift_start, kind, minutes) for every
+    exception in the (shift, punches) pairs. Shifts that have not started
+    (plus the grace period) are skipped, and punches still open are only
+    reported once the shift should have ended.
+    """
+    for (shift_id, employee_id, start, end), punches in pairs:
+        if start + grace > now:
+            continue
+        if not punches:
+            yield shift_id, employee_id, start, AttendanceException.NO_SHOW, minutes_between(start, end)
+            continue
+
+        clock_ins = [punch[2] for punch in punches if punch[2] is not None]
+        if not clock_ins:
+            yield shift_id, employee_id, start, AttendanceException.MISSING_CLOCK_IN, 0
+        elif min(clock_ins) > start + grace:
+            yield shift_id, employee_id, start, AttendanceException.LATE, minutes_between(start, min(clock_ins))
+
+        clock_outs = [punch[3] for punch in punches]
+        if None in clock_outs:
+            if end + grace <= now:
+                yield shift_id, employee_id, start, AttendanceException.MISSING_CLOCK_OUT, 0
+        elif max(clock_outs) < end - grace:
+            yield shift_id, employee_id, start, AttendanceException.EARLY_DEPARTURE, minutes_between(max(clock_outs), end)
+
+
+def reconcile(date_from, date_to, now=None):
+    """
+    Reconciles the shifts starting on [date_from, date_to] (inclusive) and
+    replaces their exceptions. Returns {"shifts": <checked>, "exceptions":
+    {kind: count}}.
+    """
+    now = now or timezone.now()
+    window_start, window_end = day_start(date_from), day_end(date_to)
+    size = chunk_size()
+    reconciled = Shift.objects.filter(start_at__gte=window_start, start_at__lt=window_end).exclude(status="cancelled")
+    shifts = reconciled.order_by("employee_id", "start_at", "id").values_list(*SHIFT_FIELDS)
+    punches = (
+        Attendance.objects.filter(shift__start_at__gte=window_start, shift__start_at__lt=window_end)
+        .order_by("employee_id", "clock_in_time")
+        .values_list(*PUNCH_FIELDS)
+    )
+
+    checked = 0
+
+    def counted(pairs):
+        nonlocal checked
+        for pair in pairs:
+            checked += 1
+            yield pair
+
+    exceptions = [
+        AttendanceException(
+            shift_id=shift_id, employee_id=employee_id, shift_start=shift_start, kind=kind, minutes=minutes
+        )
+        for shift_id, employee_id, shift_start, kind, minutes in find_exceptions(
+            counted(merge_join(shifts.iterator(chunk_size=size), punches.iterator(chunk_size=size))), now, grace()
+        )
+    ]
+
+    with transaction.atomic():
+        # Also the exceptions the reconciled shifts got in another window before they were moved.
+        AttendanceException.objects.filter(
+            Q(shift_start__gte=window_start, shift_start__lt=window_end) | Q(shift_id__in=reconciled.values("id"))
+        ).delete()
+        AttendanceException.objects.bulk_create(exceptions, batch_size=size)
+
+    totals = dict.fromkeys((kind for kind, _ in AttendanceException.KIND_CHOICES), 0)
+    for exception in exceptions:
+        totals[exception.kind] += 1
+    return {"shifts": checked, "exceptions": totals}
@@ -1,5 +1,5 @@
 from rest_framework import serializers
-from .models import Attendance
+from .models import Attendance, AttendanceException
 
 class AttendanceSerializer(serializers.ModelSerializer):
     employee_name = serializers.ReadOnlyField(source='employee.name')
@@ -22,3 +22,14 @@ class AttendanceSerializer(serializers.ModelSerializer):
             'shift_date',
         ]
         read_only_fields = ['id', 'total_hours']
+        # One open record per shift and unique idempotency keys are enforced by
+        # the database constraints; clock_in resolves those conflicts itself.
+        validators = []
+
+
+class AttendanceExceptionSerializer(serializers.ModelSerializer):
+    employee_email = serializers.ReadOnlyField(source='employee.email')
+
+    class Meta:
+        model = AttendanceException
+        fields = ['id', 'shift', 'employee', 'employee_email', 'kind', 'minutes', 'shift_start', 'created_at']
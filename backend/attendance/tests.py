@@ -1,3 +1,468 @@
-from django.test import TestCase
+import threading
+from unittest import skipUnless
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from io import StringIO
 
-# Create your tests here.
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, TransactionTestCase, override_settings
+from django_redis import get_redis_connection
+from redis.exceptions import RedisError
+from django.utils import timezone
+
+from payroll.engine import run_payroll
+from payroll.models import EmployeeProfile, PayrollDetail, PayrollRun
+from shiftwise_backend.exports import day_end, day_start
+from shiftwise_backend.testing import QueryBudgetMixin, api_client, make_admin, make_users, query_plan
+from shifts.tests import make_shifts
+from .archive import archive_attendance, archive_cutoff, archived_union
+from .models import Attendance, ArchivedAttendance, AttendanceException
+from .reconcile import reconcile
+
+
+def make_attendance(employees, count):
+    """Bulk-creates one closed attendance record per new shift."""
+    shifts = make_shifts(employees, count)
+    now = timezone.now()
+    return Attendance.objects.bulk_create([
+        Attendance(shift=shift, employee=shift.employee, clock_in_time=now, clock_out_time=now)
+        for shift in shifts
+    ])
+
+
+class AttendanceQueryBudgetTests(QueryBudgetMixin, TestCase):
+    def setUp(self):
+        self.admin = make_admin()
+        self.employee = make_users(1, prefix="staff")[0]
+
+    def test_all_attendance(self):
+        employees = make_users(20)
+        self.assertQueryBudget(
+            api_client(self.admin), "/api/attendance/all/", 1,
+            lambda rows: make_attendance(employees, rows),
+        )
+
+    def test_user_attendance(self):
+        self.assertQueryBudget(
+            api_client(self.employee), f"/api/attendance/user/{self.employee.id}/", 1,
+            lambda rows: make_attendance([self.employee], rows),
+        )
+
+
+class AttendanceHistoryTests(TestCase):
+    def setUp(self):
+        self.employee = make_users(1, prefix="staff")[0]
+        self.client = api_client(self.employee)
+        self.records = make_attendance([self.employee], 25)
+        first_day = timezone.make_aware(datetime(2025, 3, 1, 9))
+        for day, record in enumerate(self.records):
+            # Two records share each clock-in time, so the id breaks ties.
+            record.clock_in_time = first_day + timedelta(days=day // 2)
+        self.records[0].clock_in_time = None
+        Attendance.objects.bulk_update(self.records, ["clock_in_time"])
+
+    def test_pages_through_history_most_recent_first(self):
+        url, seen = f"/api/attendance/user/{self.employee.id}/?page_size=10", []
+        while url:
+            with self.assertNumQueries(1):
+                response = self.client.get(url)
+            seen.extend(row["id"] for row in response.data["results"])
+            url = response.data["next"]
+
+        expected = sorted(self.records[1:], key=lambda record: (record.clock_in_time, record.id), reverse=True)
+        self.assertEqual(seen, [self.records[0].id] + [record.id for record in expected])
+
+    @skipUnless(connection.vendor == "sqlite", "reads SQLite query plans")
+    def test_deep_pages_seek_on_the_index(self):
+        url = f"/api/attendance/user/{self.employee.id}/"
+        deep = self.client.get(self.client.get(url, {"page_size": 5}).data["next"]).data["next"]
+        self.assertIn(
+            "SEARCH attendance_attendance USING INDEX attendance_emp_recent_idx (employee_id=? AND clock_in_time<?)",
+            query_plan(self.client, deep, "attendance_attendance"),
+        )
+
+    def test_invalid_cursors_are_not_found(self):
+        for cursor in ("e30=", "W10=", "WzFd", "%%%"):
+            with self.subTest(cursor=cursor):
+                response = self.client.get(f"/api/attendance/user/{self.employee.id}/", {"cursor": cursor})
+                self.assertEqual(response.status_code, 404)
+
+    def test_filters_on_clock_in_date(self):
+        response = self.client.get(
+            f"/api/attendance/user/{self.employee.id}/", {"date_from": "2025-03-02", "date_to": "2025-03-03"}
+        )
+        self.assertEqual([row["id"] for row in response.data], [r.id for r in reversed(self.records[2:6])])
+
+
+class AttendanceExportTests(TestCase):
+    def test_filters_on_clock_in_date(self):
+        admin = make_admin()
+        records = make_attendance(make_users(2), 3)
+        first_day = timezone.make_aware(datetime(2025, 2, 1, 9))
+        for day, record in enumerate(records):
+            record.clock_in_time = first_day + timedelta(days=day)
+            record.clock_out_time = record.clock_in_time + timedelta(hours=8)
+            record.save()
+
+        with self.assertNumQueries(1):
+            response = api_client(admin).get("/api/attendance/export/", {"date_from": "2025-02-02"})
+            lines = b"".join(response.streaming_content).decode().splitlines()
+
+        self.assertEqual(lines[0].split(",")[:3], ["id", "shift", "shift_date"])
+        self.assertEqual([int(line.split(",")[0]) for line in lines[1:]], [records[1].id, records[2].id])
+        self.assertTrue(lines[1].endswith(",8.00"))
+
+
+class AttendanceHoursTests(TestCase):
+    def setUp(self):
+        self.client = api_client(make_admin())
+
+    def test_groups_by_employee_and_week_in_one_query(self):
+        employees = make_users(3)
+        records = make_attendance(employees, 60)
+        monday = timezone.make_aware(datetime(2025, 3, 3, 9))
+        for i, record in enumerate(records):
+            # Ten records per employee in each of two weeks, 1.5 hours each.
+            record.clock_in_time = monday + timedelta(days=7 * (i % 2) + i % 5)
+            record.clock_out_time = record.clock_in_time + timedelta(hours=1, minutes=30)
+        Attendance.objects.bulk_update(records, ["clock_in_time", "clock_out_time"])
+        Attendance.objects.update(total_hours="1.50")
+
+        with self.assertNumQueries(1):
+            response = self.client.get("/api/attendance/hours/", {"group_by": "employee,week"})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data), 6)
+        first = response.data[0]
+        self.assertEqual(first["employee__email"], employees[0].email)
+        self.assertEqual(str(first["week"]), "2025-03-03")
+        self.assertEqual(first["records"], 10)
+        self.assertEqual(float(first["hours"]), 15.0)
+
+    def test_filters_and_rejects_unknown_dimensions(self):
+        employee = make_users(1)[0]
+        record = make_attendance([employee], 1)[0]
+        Attendance.objects.filter(pk=record.pk).update(total_hours="8.00")
+
+        response = self.client.get("/api/attendance/hours/", {"employee": employee.id, "group_by": "location"})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([row["location"] for row in response.data], [record.shift.location])
+
+        response = self.client.get("/api/attendance/hours/", {"group_by": "month"})
+        self.assertEqual(response.status_code, 400)
+
+
+class ClockInTests(TestCase):
+    def setUp(self):
+        self.employee = make_users(1, prefix="staff")[0]
+        self.shift = make_shifts([self.employee], 1)[0]
+        self.client = api_client(self.employee)
+
+    def clock_in(self, **headers):
+        return self.client.post(
+            "/api/attendance/clock-in/",
+            {"shift": self.shift.id, "clock_in_time": timezone.now().isoformat(), "clock_in_location": "1,2"},
+            format="json", **headers,
+        )
+
+    def test_retry_with_same_key_returns_the_same_record(self):
+        first = self.clock_in(HTTP_IDEMPOTENCY_KEY="tap-1")
+        self.client.patch(
+            f"/api/attendance/clock-out/{first.data['id']}/",
+            {"clock_out_time": timezone.now().isoformat()}, format="json",
+        )
+        with self.assertNumQueries(1):
+            retry = self.clock_in(HTTP_IDEMPOTENCY_KEY="tap-1")
+
+        self.assertEqual((first.status_code, retry.status_code), (201, 200))
+        self.assertEqual(retry.data["id"], first.data["id"])
+        self.assertEqual(Attendance.objects.count(), 1)
+
+    def test_one_open_record_per_shift(self):
+        first = self.clock_in()
+        second = self.clock_in(HTTP_IDEMPOTENCY_KEY="other-device")
+
+        self.assertEqual((first.status_code, second.status_code), (201, 200))
+        self.assertEqual(second.data["id"], first.data["id"])
+
+        Attendance.objects.filter(pk=first.data["id"]).update(clock_out_time=timezone.now())
+        third = self.clock_in()
+        self.assertEqual(third.status_code, 201)
+        self.assertNotEqual(third.data["id"], first.data["id"])
+
+    def test_rejects_overlong_key(self):
+        self.assertEqual(self.clock_in(HTTP_IDEMPOTENCY_KEY="k" * 65).status_code, 400)
+
+
+class PunchUploadTests(TestCase):
+    def setUp(self):
+        self.employee = make_users(1, prefix="staff")[0]
+        self.shifts = make_shifts([self.employee], 100)
+        self.client = api_client(self.employee)
+        self.start = timezone.make_aware(datetime(2025, 4, 1, 9))
+
+    def upload(self, events):
+        return self.client.post("/api/attendance/punches/", {"events": events}, format="json")
+
+    def event(self, event_id, kind, shift, hours):
+        return {
+            "event_id": event_id, "type": kind, "shift": shift.id,
+            "timestamp": (self.start + timedelta(hours=hours)).isoformat(), "location": "1,2",
+        }
+
+    def test_pairs_events_in_bulk_and_replays_safely(self):
+        events = []
+        for i, shift in enumerate(self.shifts):
+            # Uploaded out of order: the clock-out first.
+            events.append(self.event(f"out-{i}", "out", shift, 24 * i + 8))
+            events.append(self.event(f"in-{i}", "in", shift, 24 * i))
+
+        with self.assertNumQueries(6):
+            response = self.upload(events)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual({result["status"] for result in response.data["results"]}, {"created", "closed"})
+        self.assertEqual(Attendance.objects.count(), 100)
+        self.assertEqual(Attendance.objects.filter(total_hours=8).count(), 100)
+        first = response.data["results"][:2]
+        self.assertEqual(first[0]["attendance"], first[1]["attendance"])
+
+        replay = self.upload(events[:10])
+        self.assertEqual({result["status"] for result in replay.data["results"]}, {"duplicate"})
+        self.assertEqual(Attendance.objects.count(), 100)
+
+    def test_closes_records_opened_earlier(self):
+        shift = self.shifts[0]
+        self.upload([self.event("a", "in", shift, 0)])
+        response = self.upload([
+            self.event("b", "in", shift, 1),
+            self.event("c", "out", shift, 6),
+            self.event("c", "out", shift, 6),
+            self.event("d", "out", self.shifts[1], 6),
+            {"event_id": "e", "type": "lunch"},
+        ])
+
+        statuses = [result["status"] for result in response.data["results"]]
+        self.assertEqual(statuses, ["already_open", "closed", "duplicate", "rejected", "rejected"])
+        record = Attendance.objects.get()
+        self.assertEqual((record.clock_out_key, float(record.total_hours)), ("c", 6.0))
+        self.assertEqual(response.data["results"][2]["attendance"], record.id)
+
+    def test_rejects_oversized_batches(self):
+        with self.settings(PUNCH_BATCH_MAX_EVENTS=1):
+            response = self.upload([self.event("a", "in", self.shifts[0], 0)] * 2)
+        self.assertEqual(response.status_code, 400)
+
+
+class ReconciliationTests(TestCase):
+    def setUp(self):
+        self.admin = make_admin()
+        self.employees = make_users(6)
+        # make_shifts gives employee i a 09:00-17:00 shift on 2025-01-06 + i days.
+        self.shifts = make_shifts(self.employees, 6)
+
+    def punch(self, shift, clock_in=None, clock_out=None):
+        return Attendance.objects.create(
+            shift=shift, employee=shift.employee,
+            clock_in_time=None if clock_in is None else shift.start_at + timedelta(minutes=clock_in),
+            clock_out_time=None if clock_out is None else shift.end_at + timedelta(minutes=clock_out),
+        )
+
+    def test_reports_exceptions_and_replaces_them_on_rerun(self):
+        on_time, late, early, no_show, open_record, no_clock_in = self.shifts
+        self.punch(on_time, clock_in=-3, clock_out=2)
+        self.punch(late, clock_in=25, clock_out=1)
+        self.punch(early, clock_in=1, clock_out=-40)
+        self.punch(open_record, clock_in=0)
+        self.punch(no_clock_in, clock_out=0)
+
+        with self.assertNumQueries(6):
+            response = api_client(self.admin).post(
+                "/api/attendance/reconcile/?date_from=2025-01-06&date_to=2025-01-11"
+            )
+
+        self.assertEqual(response.data["shifts"], 6)
+        found = {(e.shift_id, e.kind): e.minutes for e in AttendanceException.objects.all()}
+        self.assertEqual(found, {
+            (late.id, "late"): 25,
+            (early.id, "early_departure"): 40,
+            (no_show.id, "no_show"): 480,
+            (open_record.id, "missing_clock_out"): 0,
+            (no_clock_in.id, "missing_clock_in"): 0,
+        })
+
+        call_command("reconcile_attendance", "--date-from=2025-01-06", "--date-to=2025-01-11", stdout=StringIO())
+        self.assertEqual(AttendanceException.objects.count(), 5)
+
+    def test_rerun_after_moving_a_shift_replaces_its_old_exception(self):
+        moved = self.shifts[0]
+        reconcile(date(2025, 1, 6), date(2025, 1, 6))
+        moved.date = date(2025, 1, 10)
+        moved.save(update_fields=["date"])
+
+        response = api_client(self.admin).post("/api/attendance/reconcile/?date_from=2025-01-10&date_to=2025-01-10")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            list(AttendanceException.objects.filter(shift=moved).values_list("kind", "shift_start")),
+            [("no_show", moved.start_at)],
+        )
+
+    def test_lists_exceptions_with_filters(self):
+        reconcile(date(2025, 1, 6), date(2025, 1, 11))
+        client = api_client(self.admin)
+
+        response = client.get("/api/attendance/exceptions/", {"kind": "no_show", "date_from": "2025-01-08"})
+        self.assertEqual([row["shift"] for row in response.data], [shift.id for shift in self.shifts[2:]])
+        response = client.get("/api/attendance/exceptions/", {"employee": self.employees[0].id})
+        self.assertEqual(response.data[0]["employee_email"], self.employees[0].email)
+        self.assertEqual(len(response.data), 1)
+
+
+class AttendanceArchiveTests(TestCase):
+    def setUp(self):
+        self.employee = make_users(1)[0]
+        self.records = make_attendance([self.employee], 5)
+        now = timezone.now()
+        for months_ago, record in zip((30, 20, 14, 1, 0), self.records):
+            record.clock_in_time = now - timedelta(days=months_ago * 31)
+            record.clock_out_time = record.clock_in_time + timedelta(hours=8)
+        # An old record that is still open stays in the hot table.
+        self.records[1].clock_out_time = None
+        Attendance.objects.bulk_update(self.records, ["clock_in_time", "clock_out_time"])
+
+    def test_moves_old_closed_records_in_batches(self):
+        out = StringIO()
+        call_command("archive_attendance", "--months=12", "--batch-size=1", stdout=out)
+
+        self.assertIn("Archived 2", out.getvalue())
+        self.assertEqual(
+            sorted(ArchivedAttendance.objects.values_list("id", flat=True)), [self.records[0].id, self.records[2].id]
+        )
+        self.assertEqual(Attendance.objects.count(), 3)
+
+    def test_archive_outlives_the_shifts_and_users(self):
+        archive_attendance(archive_cutoff(12))
+        employee_id = self.employee.id
+        self.records[0].shift.delete()
+        self.employee.delete()
+
+        self.assertFalse(Attendance.objects.exists())
+        self.assertEqual(
+            list(ArchivedAttendance.objects.order_by("id").values_list("id", "shift_id", "employee_id")),
+            [(record.id, record.shift_id, employee_id) for record in (self.records[0], self.records[2])],
+        )
+
+    def test_payroll_sees_records_archived_with_fewer_months(self):
+        recent = self.records[3]
+        Attendance.objects.filter(pk=recent.pk).update(total_hours=Decimal("8"))
+        call_command("archive_attendance", "--months=0", stdout=StringIO())
+        self.assertTrue(ArchivedAttendance.objects.filter(pk=recent.pk).exists())
+
+        profile = EmployeeProfile.objects.create(user=self.employee, base_salary=Decimal("800.00"))
+        day = timezone.localtime(recent.clock_in_time).date()
+        payroll_run = PayrollRun.objects.create(start_date=day, end_date=day)
+        run_payroll(payroll_run.id)
+
+        detail = PayrollDetail.objects.get(payroll_run=payroll_run, employee=profile)
+        self.assertEqual(detail.worked_hours, Decimal("8"))
+        self.assertEqual([row["id"] for row in archived_union(day_start(day), day_end(day))], [recent.id])
+
+    def test_audit_reads_both_tables(self):
+        archive_attendance(archive_cutoff(12))
+        admin = make_admin()
+        date_from = (self.records[0].clock_in_time - timedelta(days=1)).date().isoformat()
+        with self.assertNumQueries(1):
+            response = api_client(admin).get(
+                "/api/attendance/audit/", {"date_from": date_from, "date_to": timezone.localdate().isoformat()}
+            )
+        self.assertEqual([row["id"] for row in response.data], [record.id for record in self.records])
+        self.assertEqual([row["archived"] for row in response.data], [True, False, True, False, False])
+
+        recent = self.records[3].clock_in_time.date().isoformat()
+        response = api_client(admin).get("/api/attendance/audit/", {"date_from": recent, "date_to": recent})
+        self.assertEqual([row["id"] for row in response.data], [self.records[3].id])
+
+
+def redis_available():
+    try:
+        return get_redis_connection("default").ping()
+    except RedisError:
+        return False
+
+
+@skipUnless(redis_available(), "needs a reachable Redis (REDIS_URL)")
+@override_settings(PRESENCE_KEY_PREFIX="test-presence:")
+class LivePresenceTests(TestCase):
+    def setUp(self):
+        self.admin = make_admin()
+        self.employees = make_users(3, prefix="staff")
+        self.shifts = make_shifts(self.employees[:2], 2, location="North") + make_shifts(self.employees[2:], 1)
+
+    def tearDown(self):
+        connection = get_redis_connection("default")
+        stale = connection.keys("test-presence:*")
+        if stale:
+            connection.delete(*stale)
+
+    def clock_in(self, shift):
+        with self.captureOnCommitCallbacks(execute=True):
+            return api_client(shift.employee).post(
+                "/api/attendance/clock-in/",
+                {"shift": shift.id, "clock_in_time": timezone.now().isoformat()}, format="json",
+            )
+
+    def test_tracks_clock_in_and_out_without_database_queries(self):
+        records = [self.clock_in(shift).data["id"] for shift in self.shifts]
+        with self.captureOnCommitCallbacks(execute=True):
+            api_client(self.employees[0]).patch(
+                f"/api/attendance/clock-out/{records[0]}/", {"clock_out_time": timezone.now().isoformat()}, format="json"
+            )
+
+        client = api_client(self.admin)
+        with self.assertNumQueries(0):
+            response = client.get("/api/attendance/presence/")
+
+        self.assertEqual([(row["location"], row["headcount"]) for row in response.data], [("Main", 1), ("North", 1)])
+        self.assertEqual(response.data[1]["people"][0]["email"], self.employees[1].email)
+
+    def test_rebuild_restores_the_open_records(self):
+        make_attendance(self.employees, 3)
+        Attendance.objects.update(clock_out_time=None)
+        call_command("rebuild_presence", stdout=StringIO())
+
+        response = api_client(self.admin).get("/api/attendance/presence/", {"location": "Main"})
+        self.assertEqual(response.data[0]["headcount"], 3)
+
+
+class ConcurrentClockInTests(TransactionTestCase):
+    def setUp(self):
+        if connection.vendor == "sqlite" and connection.is_in_memory_db():
+            self.skipTest("Needs a file-backed test database; set SQLITE_TEST_NAME.")
+
+    def test_parallel_clock_ins_create_one_record(self):
+        employee = make_users(1, prefix="staff")[0]
+        shift = make_shifts([employee], 1)[0]
+        start = threading.Barrier(50)
+
+        def clock_in(_):
+            client = api_client(employee)
+            try:
+                start.wait()
+                response = client.post(
+                    "/api/attendance/clock-in/",
+                    {"shift": shift.id, "clock_in_time": timezone.now().isoformat()}, format="json",
+                )
+                return response.status_code, response.data.get("id")
+            finally:
+                connection.close()
+
+        with ThreadPoolExecutor(max_workers=50) as pool:
+            results = list(pool.map(clock_in, range(50)))
+
+        statuses = sorted(status for status, _ in results)
+        self.assertEqual(statuses, [200] * 49 + [201])
+        self.assertEqual(len({record_id for _, record_id in results}), 1)
+        self.assertEqual(Attendance.objects.filter(shift=shift).count(), 1)
@@ -1,10 +1,21 @@
 from django.urls import path
-from .views import clock_in, clock_out, AllAttendanceView, user_attendance, active_attendance
+from .views import (
+    clock_in, clock_out, AllAttendanceView, user_attendance, active_attendance, export_attendance_csv, attendance_hours,
+    upload_punches, reconcile_attendance, AttendanceExceptionListView,
+    live_presence, attendance_audit,
+)
 
 urlpatterns = [
     path('clock-in/', clock_in, name='clock_in'),
     path('clock-out/<int:pk>/', clock_out, name='clock_out'),
+    path('punches/', upload_punches, name='upload_punches'),
     path('all/', AllAttendanceView.as_view(), name='all_attendance'),
     path('user/<int:pk>/', user_attendance, name='user_attendance'),
     path('active/', active_attendance, name='active_attendance'),
+    path('presence/', live_presence, name='live_presence'),
+    path('export/', export_attendance_csv, name='export_attendance_csv'),
+    path('hours/', attendance_hours, name='attendance_hours'),
+    path('audit/', attendance_audit, name='attendance_audit'),
+    path('reconcile/', reconcile_attendance, name='reconcile_attendance'),
+    path('exceptions/', AttendanceExceptionListView.as_view(), name='attendance_exceptions'),
 ]
@@ -1,9 +1,46 @@
+import uuid
+
+from django.db import IntegrityError
+from django.db.models import Count, DateField, F, Sum
+from django.db.models.functions import TruncDate, TruncWeek
 from rest_framework import status, permissions, generics
 from rest_framework.decorators import api_view, permission_classes
+from redis.exceptions import RedisError
 from rest_framework.response import Response
-from .models import Attendance
-from .serializers import AttendanceSerializer
+from .archive import archived_union
+from .models import Attendance, AttendanceException
+from .pagination import AttendanceCursorPagination
+from .presence import current_presence, update_presence
+from .punches import ingest_punches, max_events
+from .reconcile import MAX_RECONCILE_DAYS, reconcile
+from .serializers import AttendanceExceptionSerializer, AttendanceSerializer
 from shifts.models import Shift
+from shiftwise_backend.exports import csv_response, day_end, day_start, parse_date_range
+
+# Longest idempotency key accepted from clients (the column is 64 characters).
+MAX_IDEMPOTENCY_KEY_LENGTH = 64
+
+# Dimensions the hour aggregation can group by: name -> (output fields, annotations needed).
+HOURS_GROUPS = {
+    "employee": (("employee", "employee__email"), {}),
+    "day": (("day",), {"day": TruncDate("clock_in_time")}),
+    "week": (("week",), {"week": TruncWeek("clock_in_time", output_field=DateField())}),
+    "location": (("location",), {"location": F("shift__location")}),
+}
+
+# (header, field) columns of the CSV attendance export.
+ATTENDANCE_EXPORT_COLUMNS = (
+    ("id", "id"),
+    ("shift", "shift_id"),
+    ("shift_date", "shift__date"),
+    ("employee_email", "employee__email"),
+    ("employee_id_code", "employee__id_code"),
+    ("clock_in_time", "clock_in_time"),
+    ("clock_out_time", "clock_out_time"),
+    ("clock_in_location", "clock_in_location"),
+    ("clock_out_location", "clock_out_location"),
+    ("total_hours", "total_hours"),
+)
 
 @api_view(['POST'])
 @permission_classes([permissions.IsAuthenticated])
@@ -17,14 +54,36 @@ def clock_in(request):
         "clock_in_time": "<ISO timestamp>",
         "clock_in_location": "<latitude,longitude>"
       }
+
+    Clock-in is idempotent. An employee has at most one open record per
+    shift, and a retry sending the same Idempotency-Key header (or
+    "idempotency_key" field) always gets the same record back. The record
+    is written with a single INSERT ... ON CONFLICT DO NOTHING, so
+    concurrent taps never block each other and all of them receive the
+    one record that was created. The status is 201 when the record
+    carries this request's key and 200 when an earlier clock-in is returned.
     """
     shift_id = request.data.get('shift')
     if not shift_id:
         return Response({"detail": "shift is required"}, status=status.HTTP_400_BAD_REQUEST)
-    
+
+    key = request.headers.get('Idempotency-Key') or request.data.get('idempotency_key')
+    if key is not None and not 0 < len(str(key)) <= MAX_IDEMPOTENCY_KEY_LENGTH:
+        return Response(
+            {"detail": f"Idempotency key must be 1 to {MAX_IDEMPOTENCY_KEY_LENGTH} characters."},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    if key is not None:
+        existing = (
+            Attendance.objects.filter(employee=request.user, idempotency_key=str(key))
+            .select_related('employee', 'shift').first()
+        )
+        if existing is not None:
+            return Response(AttendanceSerializer(existing).data, status=status.HTTP_200_OK)
+
     try:
         shift = Shift.objects.get(id=shift_id)
-    except Shift.DoesNotExist:
+    except (Shift.DoesNotExist, ValueError):
         return Response({"detail": "Shift not found"}, status=status.HTTP_404_NOT_FOUND)
     
     # Optional: Uncomment if you want to ensure the logged-in user is the assigned employee
@@ -32,17 +91,73 @@ def clock_in(request):
     #     return Response({"detail": "You are not assigned to this shift."}, status=status.HTTP_403_FORBIDDEN)
     
     data = {
-        "shift": shift_id,
+        "shift": shift.id,
         "employee": request.user.id,
         "clock_in_time": request.data.get('clock_in_time'),
         "clock_in_location": request.data.get('clock_in_location', "")
     }
     
     serializer = AttendanceSerializer(data=data)
-    if serializer.is_valid():
-        attendance = serializer.save()
-        return Response(serializer.data, status=status.HTTP_201_CREATED)
-    return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+    if not serializer.is_valid():
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+    # Requests without a key get a unique one, so we can tell whether our insert won.
+    key = str(key) if key is not None else uuid.uuid4().hex
+    Attendance.objects.bulk_create(
+        [Attendance(**serializer.validated_data, idempotency_key=key)], ignore_conflicts=True
+    )
+    records = Attendance.objects.filter(employee=request.user).select_related('employee', 'shift')
+    attendance = (
+        records.filter(idempotency_key=key).first()
+        or records.filter(shift=shift, clock_out_time__isnull=True).first()
+    )
+    if attendance is None:
+        # The open record we collided with was clocked out in the meantime.
+        return Response({"detail": "Please retry the clock-in."}, status=status.HTTP_409_CONFLICT)
+    created = attendance.idempotency_key == key
+    if created:
+        update_presence([attendance])
+    return Response(
+        AttendanceSerializer(attendance).data,
+        status=status.HTTP_201_CREATED if created else status.HTTP_200_OK
+    )
+
+
+@api_view(['POST'])
+@permission_classes([permissions.IsAuthenticated])
+def upload_punches(request):
+    """
+    Ingests a batch of clock events recorded offline by a kiosk or the app.
+
+    Expects JSON:
+      {
+        "events": [
+          {"event_id": "<client id>", "type": "in" | "out", "shift": <shift_id>,
+           "timestamp": "<ISO timestamp>", "location": "<latitude,longitude>"},
+          ...
+        ]
+      }
+
+    Events are de-duplicated by event_id, ordered by timestamp and paired
+    into Attendance records, all written in one transaction. Returns one
+    result per event (status created, closed, duplicate, already_open or
+    rejected, and the attendance id), so a whole batch can be safely
+    replayed after a dropped connection.
+    """
+    events = request.data.get('events')
+    if not isinstance(events, list) or not events:
+        return Response({"events": "A non-empty list of events is required."}, status=status.HTTP_400_BAD_REQUEST)
+    if len(events) > max_events():
+        return Response(
+            {"events": f"At most {max_events()} events can be uploaded at once."},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    try:
+        results = ingest_punches(request.user, events)
+    except IntegrityError:
+        # A concurrent clock-in opened the same shift; replaying the batch resolves it.
+        return Response({"detail": "Please retry the upload."}, status=status.HTTP_409_CONFLICT)
+    return Response({"results": results}, status=status.HTTP_200_OK)
 
 
 @api_view(['PATCH'])
@@ -58,13 +173,14 @@ def clock_out(request, pk):
       }
     """
     try:
-        attendance = Attendance.objects.get(id=pk)
+        attendance = Attendance.objects.select_related('employee', 'shift').get(id=pk)
     except Attendance.DoesNotExist:
         return Response({"detail": "Attendance record not found"}, status=status.HTTP_404_NOT_FOUND)
     
     serializer = AttendanceSerializer(attendance, data=request.data, partial=True)
     if serializer.is_valid():
         attendance = serializer.save()  # This triggers the model's save() to compute total_hours if applicable
+        update_presence([attendance])
         return Response(serializer.data, status=status.HTTP_200_OK)
     return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
@@ -74,16 +190,31 @@ class AllAttendanceView(generics.ListAPIView):
     """
     Returns all Attendance records. Accessible only to admin users.
     """
-    queryset = Attendance.objects.all()
+    queryset = Attendance.objects.select_related('employee', 'shift')
     serializer_class = AttendanceSerializer
     permission_classes = [permissions.IsAdminUser]
 @api_view(['GET'])
 @permission_classes([permissions.IsAuthenticated])
 def user_attendance(request, pk):
+    """
+    An employee's own attendance history, most recent first.
+    Optional ?date_from / ?date_to (YYYY-MM-DD, inclusive) filter on the
+    clock-in date; cursor pagination via ?page_size / ?cursor.
+    """
     if request.user.id != int(pk):
         return Response({"detail": "Unauthorized"}, status=status.HTTP_403_FORBIDDEN)
-    records = Attendance.objects.filter(employee_id=pk)
-    serializer = AttendanceSerializer(records, many=True)
+    date_from, date_to = parse_date_range(request.query_params)
+    records = Attendance.objects.filter(employee_id=pk).select_related('employee', 'shift')
+    if date_from:
+        records = records.filter(clock_in_time__gte=day_start(date_from))
+    if date_to:
+        records = records.filter(clock_in_time__lt=day_end(date_to))
+
+    paginator = AttendanceCursorPagination()
+    page = paginator.paginate_queryset(records, request)
+    if page is not None:
+        return paginator.get_paginated_response(AttendanceSerializer(page, many=True).data)
+    serializer = AttendanceSerializer(records.order_by(*paginator.ordering), many=True)
     return Response(serializer.data, status=status.HTTP_200_OK)
 @api_view(['GET'])
 @permission_classes([permissions.IsAuthenticated])
@@ -92,9 +223,166 @@ def active_attendance(request):
     active_records = Attendance.objects.filter(
         employee=request.user, 
         clock_out_time__isnull=True
-    ).order_by('-clock_in_time')  # Get most recent
+    ).select_related('employee', 'shift').order_by('-clock_in_time')  # Get most recent
     
     if active_records.exists():
         serializer = AttendanceSerializer(active_records.first())
         return Response(serializer.data, status=status.HTTP_200_OK)
-    return Response({"detail": "No active attendance found."}, status=status.HTTP_404_NOT_FOUND)
\ No newline at end of file
+    return Response({"detail": "No active attendance found."}, status=status.HTTP_404_NOT_FOUND)
+
+
+@api_view(['GET'])
+@permission_classes([permissions.IsAdminUser])
+def live_presence(request):
+    """
+    Admin Endpoint:
+    Who is on the clock right now, per location, read from the Redis
+    presence index without touching the database. Optional ?location.
+
+    Returns [{"location": ..., "headcount": n, "people": [{"attendance",
+    "employee", "name", "email", "shift", "clock_in_time"}, ...]}, ...]
+    """
+    try:
+        floor = current_presence(request.query_params.get('location') or None)
+    except RedisError:
+        return Response({"detail": "Live presence is unavailable."}, status=status.HTTP_503_SERVICE_UNAVAILABLE)
+    return Response(floor, status=status.HTTP_200_OK)
+
+
+@api_view(['GET'])
+@permission_classes([permissions.IsAdminUser])
+def export_attendance_csv(request):
+    """
+    Admin Endpoint:
+    Stream attendance records as a CSV download, ordered by clock-in time.
+    Optional ?date_from / ?date_to (YYYY-MM-DD, inclusive) filter on the
+    clock-in date.
+    """
+    date_from, date_to = parse_date_range(request.query_params)
+    records = Attendance.objects.order_by('clock_in_time', 'id')
+    if date_from:
+        records = records.filter(clock_in_time__gte=day_start(date_from))
+    if date_to:
+        records = records.filter(clock_in_time__lt=day_end(date_to))
+    return csv_response(records, ATTENDANCE_EXPORT_COLUMNS, "attendance.csv")
+
+
+@api_view(['GET'])
+@permission_classes([permissions.IsAdminUser])
+def attendance_hours(request):
+    """
+    Admin Endpoint:
+    Worked hours summed in the database, grouped by any of employee, day,
+    week (starting Monday) and location (the shift's location).
+
+    Query parameters:
+      ?group_by=employee,week   comma-separated dimensions (default: employee)
+      ?date_from / ?date_to     clock-in date range (YYYY-MM-DD, inclusive)
+      ?employee=<id>            a single employee
+
+    Returns one compact row per group, e.g.
+      {"employee": 3, "employee__email": "...", "week": "2025-03-03", "hours": "38.50", "records": 5}
+    Open records (not clocked out yet) are counted but add no hours.
+    Always a single query.
+    """
+    group_by = [name.strip() for name in request.query_params.get('group_by', 'employee').split(',') if name.strip()]
+    unknown = [name for name in group_by if name not in HOURS_GROUPS]
+    if unknown or not group_by:
+        return Response(
+            {"group_by": f"Choose from: {', '.join(HOURS_GROUPS)}."},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+
+    date_from, date_to = parse_date_range(request.query_params)
+    records = Attendance.objects.all()
+    if date_from:
+        records = records.filter(clock_in_time__gte=day_start(date_from))
+    if date_to:
+        records = records.filter(clock_in_time__lt=day_end(date_to))
+    employee = request.query_params.get('employee')
+    if employee:
+        if not employee.isdigit():
+            return Response({"employee": "Must be a user id."}, status=status.HTTP_400_BAD_REQUEST)
+        records = records.filter(employee_id=employee)
+
+    fields, annotations = [], {}
+    for name in dict.fromkeys(group_by):
+        group_fields, group_annotations = HOURS_GROUPS[name]
+        fields.extend(group_fields)
+        annotations.update(group_annotations)
+
+    rows = (
+        records.annotate(**annotations)
+        .values(*fields)
+        .annotate(hours=Sum('total_hours'), records=Count('id'))
+        .order_by(*fields)
+    )
+    return Response(list(rows), status=status.HTTP_200_OK)
+
+
+@api_view(['POST'])
+@permission_classes([permissions.IsAdminUser])
+def reconcile_attendance(request):
+    """
+    Admin Endpoint:
+    Compares the shifts starting between ?date_from and ?date_to
+    (YYYY-MM-DD, inclusive, required) with their attendance and replaces
+    the exceptions recorded for that range. The same job runs nightly via
+    `manage.py reconcile_attendance`.
+    """
+    date_from, date_to = parse_date_range(request.query_params)
+    if not date_from or not date_to:
+        return Response({"detail": "date_from and date_to are required."}, status=status.HTTP_400_BAD_REQUEST)
+    if (date_to - date_from).days >= MAX_RECONCILE_DAYS:
+        return Response(
+            {"date_to": f"At most {MAX_RECONCILE_DAYS} days can be reconciled at once."},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    return Response(reconcile(date_from, date_to), status=status.HTTP_200_OK)
+
+
+class AttendanceExceptionListView(generics.ListAPIView):
+    """
+    Admin Endpoint:
+    Lists attendance exceptions by shift start. Optional filters:
+    ?kind (comma-separated), ?employee=<id>, ?min_minutes and
+    ?date_from / ?date_to (YYYY-MM-DD, inclusive, on the shift start).
+    """
+    serializer_class = AttendanceExceptionSerializer
+    permission_classes = [permissions.IsAdminUser]
+
+    def get_queryset(self):
+        params = self.request.query_params
+        exceptions = AttendanceException.objects.select_related('employee')
+        date_from, date_to = parse_date_range(params)
+        if date_from:
+            exceptions = exceptions.filter(shift_start__gte=day_start(date_from))
+        if date_to:
+            exceptions = exceptions.filter(shift_start__lt=day_end(date_to))
+        if params.get('kind'):
+            exceptions = exceptions.filter(kind__in=params['kind'].split(','))
+        if params.get('employee', '').isdigit():
+            exceptions = exceptions.filter(employee_id=params['employee'])
+        if params.get('min_minutes', '').isdigit():
+            exceptions = exceptions.filter(minutes__gte=params['min_minutes'])
+        return exceptions
+
+
+@api_view(['GET'])
+@permission_classes([permissions.IsAdminUser])
+def attendance_audit(request):
+    """
+    Admin Endpoint:
+    Attendance records clocked in between ?date_from and ?date_to
+    (YYYY-MM-DD, inclusive, required), including those moved to the
+    archive, for payroll audits. Optional ?employee=<id>. Each record has
+    an "archived" flag.
+    """
+    date_from, date_to = parse_date_range(request.query_params)
+    if not date_from or not date_to:
+        return Response({"detail": "date_from and date_to are required."}, status=status.HTTP_400_BAD_REQUEST)
+    employee = request.query_params.get('employee')
+    if employee and not employee.isdigit():
+        return Response({"employee": "Must be a user id."}, status=status.HTTP_400_BAD_REQUEST)
+    records = archived_union(day_start(date_from), day_end(date_to), int(employee) if employee else None)
+    return Response(list(records), status=status.HTTP_200_OK)
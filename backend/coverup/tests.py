@@ -1,3 +1,23 @@
 from django.test import TestCase
 
-# Create your tests here.
+from shiftwise_backend.testing import QueryBudgetMixin, api_client, make_admin, make_users
+from shifts.tests import make_shifts
+from .models import CoverUpShift
+
+
+class CoverUpQueryBudgetTests(QueryBudgetMixin, TestCase):
+    def setUp(self):
+        self.admin = make_admin()
+        self.employees = make_users(20)
+
+    def make_cover_shifts(self, count):
+        CoverUpShift.objects.bulk_create([
+            CoverUpShift(shift=shift, posted_by=shift.employee)
+            for shift in make_shifts(self.employees, count)
+        ])
+
+    def test_open_cover_shifts(self):
+        self.assertQueryBudget(api_client(self.employees[0]), "/api/coverup/open/", 1, self.make_cover_shifts)
+
+    def test_admin_cover_shifts(self):
+        self.assertQueryBudget(api_client(self.admin), "/api/coverup/admin/", 1, self.make_cover_shifts)
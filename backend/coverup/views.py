@@ -7,8 +7,11 @@ from rest_framework import status
 from django.db import transaction
 from .models import CoverUpShift
 
+# Relations read by CoverUpShiftSerializer (the shift's __str__ reads its employee).
+COVERUP_RELATED = ('shift__employee', 'posted_by', 'claimed_by')
+
 class ListOpenCoverShiftsView(generics.ListAPIView):
-    queryset = CoverUpShift.objects.filter(status="open")
+    queryset = CoverUpShift.objects.filter(status="open").select_related(*COVERUP_RELATED)
     serializer_class = CoverUpShiftSerializer
     permission_classes = [permissions.IsAuthenticated]
 
@@ -26,6 +29,6 @@ class ClaimCoverShiftView(APIView):
         except CoverUpShift.DoesNotExist:
            return Response({"error": "This shift is already claimed or unavailable."}, status=status.HTTP_400_BAD_REQUEST)
 class AdminCoverShiftListView(generics.ListAPIView):
-    queryset = CoverUpShift.objects.all().order_by("-created_at")
+    queryset = CoverUpShift.objects.select_related(*COVERUP_RELATED).order_by("-created_at")
     serializer_class = CoverUpShiftSerializer
     permission_classes = [permissions.IsAdminUser]
@@ -1,3 +1,29 @@
 from django.test import TestCase
 
-# Create your tests here.
+from shiftwise_backend.testing import QueryBudgetMixin, api_client, make_admin, make_users
+from .models import Inquiry
+
+
+class InquiryQueryBudgetTests(QueryBudgetMixin, TestCase):
+    def setUp(self):
+        self.admin = make_admin()
+        self.employee = make_users(1, prefix="staff")[0]
+
+    def make_inquiries(self, employees, count):
+        Inquiry.objects.bulk_create([
+            Inquiry(employee=employees[i % len(employees)], subject="Question", message="Body")
+            for i in range(count)
+        ])
+
+    def test_employee_inquiries(self):
+        self.assertQueryBudget(
+            api_client(self.employee), "/api/inquiries/", 1,
+            lambda rows: self.make_inquiries([self.employee], rows),
+        )
+
+    def test_admin_inquiries(self):
+        employees = make_users(20)
+        self.assertQueryBudget(
+            api_client(self.admin), "/api/inquiries/admin/", 1,
+            lambda rows: self.make_inquiries(employees, rows),
+        )
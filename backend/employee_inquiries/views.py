@@ -11,7 +11,7 @@ class EmployeeInquiryListCreateView(generics.ListCreateAPIView):
 
     def get_queryset(self):
         """Employees can only see their own inquiries."""
-        return Inquiry.objects.filter(employee=self.request.user)
+        return Inquiry.objects.filter(employee=self.request.user).select_related('employee')
 
     def perform_create(self, serializer):
         """Saves inquiry with the authenticated employee as the owner."""
@@ -27,13 +27,13 @@ class AdminInquiryListView(generics.ListAPIView):
         """Admins can see all inquiries, employees are restricted."""
         user = self.request.user
         if user.is_staff:  # ✅ Ensure only staff (admins) can access all inquiries
-            return Inquiry.objects.all()
+            return Inquiry.objects.select_related('employee')
         return Inquiry.objects.none()  # Return empty list if non-admin tries to access
 
 
 # For admins: Update a specific inquiry (e.g., to answer it).
 class AdminInquiryUpdateView(generics.RetrieveUpdateAPIView):
-    queryset = Inquiry.objects.all()
+    queryset = Inquiry.objects.select_related('employee')
     serializer_class = InquirySerializer
     permission_classes = [permissions.IsAdminUser]
 
@@ -1,3 +1,5 @@
+from datetime import time
+
 from django.db import models
 from django.conf import settings
 
@@ -14,6 +16,13 @@ class LeaveRequest(models.Model):
         ("night", "Night"),
     ]
 
+    # Clock window covered by each shift time; the night window runs past midnight.
+    SHIFT_TIME_WINDOWS = {
+        "morning": (time(6), time(12)),
+        "afternoon": (time(12), time(18)),
+        "night": (time(18), time(6)),
+    }
+
     employee = models.ForeignKey(
         settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="leave_requests"
     )
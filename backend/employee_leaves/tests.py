@@ -1,3 +1,40 @@
+from datetime import date, timedelta
+
 from django.test import TestCase
 
-# Create your tests here.
+from shiftwise_backend.testing import QueryBudgetMixin, api_client, make_admin, make_users
+from .models import LeaveRequest
+
+
+def make_leave_requests(employees, count, status="pending"):
+    """Bulk-creates `count` leave requests spread over the given employees."""
+    return LeaveRequest.objects.bulk_create([
+        LeaveRequest(
+            employee=employees[i % len(employees)],
+            shift_date=date(2025, 1, 1) + timedelta(days=i),
+            shift_time="morning",
+            location="Main",
+            reason="Appointment",
+            status=status,
+        )
+        for i in range(count)
+    ])
+
+
+class LeaveRequestQueryBudgetTests(QueryBudgetMixin, TestCase):
+    def setUp(self):
+        self.admin = make_admin()
+        self.employee = make_users(1, prefix="staff")[0]
+
+    def test_employee_leave_requests(self):
+        self.assertQueryBudget(
+            api_client(self.employee), "/api/leaves/", 1,
+            lambda rows: make_leave_requests([self.employee], rows),
+        )
+
+    def test_admin_leave_requests(self):
+        employees = make_users(20)
+        self.assertQueryBudget(
+            api_client(self.admin), "/api/leaves/admin/", 1,
+            lambda rows: make_leave_requests(employees, rows),
+        )
@@ -10,7 +10,7 @@ class EmployeeLeaveRequestView(generics.ListCreateAPIView):
 
     def get_queryset(self):
         """Fetch only the leave requests made by the authenticated employee."""
-        return LeaveRequest.objects.filter(employee=self.request.user)
+        return LeaveRequest.objects.filter(employee=self.request.user).select_related("employee")
 
     def perform_create(self, serializer):
         """Ensure employee cannot create duplicate leave requests for the same shift."""
@@ -43,14 +43,14 @@ class AdminLeaveListView(generics.ListAPIView):
 
     def get_queryset(self):
         """Fetch all leave requests for the admin panel."""
-        return LeaveRequest.objects.all()
+        return LeaveRequest.objects.select_related("employee")
 
 
 class AdminLeaveApprovalView(generics.RetrieveUpdateDestroyAPIView):
     """
     Allows Admin to approve, deny, or delete leave requests.
     """
-    queryset = LeaveRequest.objects.all()
+    queryset = LeaveRequest.objects.select_related("employee")
     serializer_class = LeaveRequestSerializer
     permission_classes = [permissions.IsAdminUser]
 
@@ -0,0 +1,134 @@
+# payroll/calculator.py
+"""
+Vectorized salary calculation for a whole payroll run.
+
+All amounts are integer cents and all hours integer hundredths of an hour,
+held in int64 NumPy arrays, so there is no float arithmetic at all: each
+result is an exact fraction of integers, rounded once to the cent with an
+explicit rule. The rules are the same as calculate_salary() in
+payroll/utils.py, which this replaces on the hot path:
+
+  - base_salary is the pay for PAYROLL_STANDARD_HOURS hours;
+  - up to that, pay is pro rata: base * hours / standard;
+  - beyond it, the full base plus overtime at PAYROLL_OVERTIME_MULTIPLIER
+    times the hourly rate;
+  - deductions are PAYROLL_DEDUCTION_RATE of the gross pay.
+
+Employees paid by role (roles/rates.py) go through calculate_hourly_pay()
+instead: their straight-time pay is every hour at the rate in effect when
+it was worked, and overtime hours are paid at PAYROLL_OVERTIME_MULTIPLIER
+times their regular rate, the hours-weighted average of those rates. With
+a single rate this is rate * hours plus the overtime premium, exactly as
+for a salary of rate * PAYROLL_STANDARD_HOURS.
+
+PAYROLL_ROUNDING selects how cents are rounded: "half_up" (the default,
+matching the Decimal path), "half_even" or "down".
+"""
+from collections import namedtuple
+from decimal import ROUND_HALF_UP, Decimal
+from fractions import Fraction
+
+import numpy as np
+from django.conf import settings
+
+HALF_UP = "half_up"
+HALF_EVEN = "half_even"
+DOWN = "down"
+ROUNDING_MODES = (HALF_UP, HALF_EVEN, DOWN)
+
+Salaries = namedtuple("Salaries", ["base_salary", "overtime_pay", "deductions", "net_salary"])
+
+
+def round_div(numerator, denominator, mode=HALF_UP):
+    """Rounds numerator / denominator (non-negative int arrays, positive int) to integers."""
+    quotient, remainder = np.divmod(numerator, denominator)
+    if mode == DOWN:
+        return quotient
+    twice = 2 * remainder
+    if mode == HALF_UP:
+        return quotient + (twice >= denominator)
+    if mode == HALF_EVEN:
+        return quotient + ((twice > denominator) | ((twice == denominator) & (quotient % 2 == 1)))
+    raise ValueError(f"Unknown rounding mode {mode!r}; choose from {', '.join(ROUNDING_MODES)}.")
+
+
+def to_unit(value):
+    """Decimal (or int) amount -> int hundredths (cents), rounded half up."""
+    return int((Decimal(value) * 100).to_integral_value(rounding=ROUND_HALF_UP))
+
+
+def to_units(values):
+    """Decimal (or int) amounts -> int64 array of hundredths (cents), rounded half up."""
+    return np.array([to_unit(value) for value in values], dtype=np.int64)
+
+
+def from_cents(cents):
+    """int64 cents -> Decimal with two places."""
+    return Decimal(int(cents)).scaleb(-2)
+
+
+def rules(standard_hours=None, overtime_multiplier=None, deduction_rate=None, rounding=None):
+    """
+    The salary rules as exact Fractions (and the rounding mode). Arguments
+    left as None default to the PAYROLL_* settings; 0 is a valid value.
+    """
+    def rule(value, setting, default):
+        return value if value is not None else getattr(settings, setting, default)
+
+    return (
+        Fraction(str(rule(standard_hours, "PAYROLL_STANDARD_HOURS", "40"))),
+        Fraction(str(rule(overtime_multiplier, "PAYROLL_OVERTIME_MULTIPLIER", "1.5"))),
+        Fraction(str(rule(deduction_rate, "PAYROLL_DEDUCTION_RATE", "0"))),
+        rule(rounding, "PAYROLL_ROUNDING", HALF_UP),
+    )
+
+
+def calculate_salaries(base_cents, hundredth_hours, standard_hours=None, overtime_multiplier=None,
+                       deduction_rate=None, rounding=None):
+    """
+    Computes Salaries of int64 cent arrays from `base_cents` (weekly base
+    salaries in cents) and `hundredth_hours` (worked hours x 100). The
+    keyword arguments default to the PAYROLL_* settings.
+    """
+    standard, multiplier, deduction, rounding = rules(standard_hours, overtime_multiplier, deduction_rate, rounding)
+    base = np.asarray(base_cents, dtype=np.int64)
+    hours = np.asarray(hundredth_hours, dtype=np.int64)
+    # Standard hours in hundredths as p / q, so that e.g. 37.5 stays exact.
+    standard_units = standard * 100
+    p, q = standard_units.numerator, standard_units.denominator
+    scaled = hours * q
+
+    # Pro rata pay: base * hours / standard.
+    regular = round_div(base * np.minimum(scaled, p), p, rounding)
+    # Overtime: extra hours * (base / standard) * multiplier.
+    over = np.maximum(scaled - p, 0)
+    overtime = round_div(base * over * multiplier.numerator, p * multiplier.denominator, rounding)
+    gross = np.where(over > 0, base + overtime, regular)
+    deductions = round_div(gross * deduction.numerator, deduction.denominator, rounding)
+    return Salaries(base, overtime, deductions, gross - deductions)
+
+
+def calculate_hourly_pay(straight_units, hundredth_hours, standard_hours=None, overtime_multiplier=None,
+                         deduction_rate=None, rounding=None):
+    """
+    Computes Salaries of int64 cent arrays for hourly employees from
+    `straight_units` (the sum over their records of hundredth-hours x rate
+    cents) and `hundredth_hours` (their total hours x 100). base_salary is
+    the pay of the hours up to the standard at the regular rate.
+    """
+    standard, multiplier, deduction, rounding = rules(standard_hours, overtime_multiplier, deduction_rate, rounding)
+    straight = np.asarray(straight_units, dtype=np.int64)
+    hours = np.asarray(hundredth_hours, dtype=np.int64)
+    standard_units = standard * 100
+    p, q = standard_units.numerator, standard_units.denominator
+    scaled = hours * q
+    # The regular rate is straight / hours cents per hour; with hours scaled by q and
+    # pay in cents, pay for x scaled hundredths is straight * x / (scaled * 100).
+    divisor = np.maximum(scaled, 1) * 100
+
+    regular = round_div(straight * np.minimum(scaled, p), divisor, rounding)
+    over = np.maximum(scaled - p, 0)
+    overtime = round_div(straight * over * multiplier.numerator, divisor * multiplier.denominator, rounding)
+    gross = regular + overtime
+    deductions = round_div(gross * deduction.numerator, deduction.denominator, rounding)
+    return Salaries(regular, overtime, deductions, gross - deductions)
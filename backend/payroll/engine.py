@@ -0,0 +1,290 @@
+# payroll/engine.py
+"""
+Payroll run processing.
+
+A run pays every EmployeeProfile, in chunks of PAYROLL_CHUNK_SIZE profiles
+ordered by id. For each chunk the worked hours of the period are summed per
+employee and week in the database, with one grouped query per attendance
+table (the archive is only read for periods it may cover, see
+attendance/archive.py). The pay rules are weekly (base_salary covers
+PAYROLL_STANDARD_HOURS a week), so each employee-week is priced on its own,
+for the whole chunk at once (payroll/calculator.py), and an employee is
+paid the sum of their weeks, like payroll/simulation.py does. The chunk's
+PayrollDetail rows are written with bulk_create in the same transaction
+that advances the run's progress cursor. A run that
+fails part-way can therefore be resumed: it continues after the last
+chunk that was saved, without recomputing the others.
+
+Employees who hold a role (roles/rates.py) at the start of the period
+are paid by the hour at their role's rate; if their role changes during
+the period, each record is paid at the rate in effect at its clock-in.
+The others are paid from their weekly base_salary.
+
+Every detail keeps a fingerprint of its attendance (record count and
+latest updated_at) and its pay_basis (the salary or the rates). After
+corrections, refresh_payroll() compares the fingerprints with the
+database and only recomputes the employees whose inputs changed.
+"""
+from collections import namedtuple
+from datetime import timedelta
+from decimal import ROUND_HALF_UP, Decimal
+
+import numpy as np
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, F, Max, Sum
+from django.db.models.functions import TruncWeek
+from django.utils import timezone
+
+from attendance.archive import attendance_models
+from roles.rates import RateTable, RateTimeline
+from shiftwise_backend.exports import day_end, day_start
+from .calculator import Salaries, calculate_hourly_pay, calculate_salaries, from_cents, to_unit, to_units
+from .models import EmployeeProfile, PayrollDetail, PayrollRun
+
+CENT = Decimal("0.01")
+
+# What an employee's pay is computed from: worked hours in total and by week
+# ({monday: hours}), plus the record count and latest change of their
+# attendance as a fingerprint.
+AttendanceInput = namedtuple("AttendanceInput", ["hours", "count", "updated_at", "weeks"])
+NO_ATTENDANCE = AttendanceInput(Decimal(0), 0, None, {})
+
+
+def to_cents(amount):
+    return Decimal(amount).quantize(CENT, rounding=ROUND_HALF_UP)
+
+
+def week_of(moment):
+    """The local Monday of the week `moment` falls in."""
+    day = timezone.localtime(moment).date()
+    return day - timedelta(days=day.weekday())
+
+
+def attendance_inputs(start_date, end_date, user_ids=None):
+    """
+    {user_id: AttendanceInput} for the attendance clocked in on
+    [start_date, end_date] (inclusive), for `user_ids` only when given.
+    One query per attendance table, grouped by employee and week.
+    """
+    start, end = day_start(start_date), day_end(end_date)
+    inputs = {}
+    for model in attendance_models(start, end):
+        rows = model.objects.filter(clock_in_time__gte=start, clock_in_time__lt=end)
+        if user_ids is not None:
+            rows = rows.filter(employee_id__in=user_ids)
+        rows = (
+            rows.values("employee_id", week=TruncWeek("clock_in_time")).order_by()
+            .annotate(hours=Sum("total_hours"), count=Count("id"), updated_at=Max("updated_at"))
+            .values_list("employee_id", "week", "hours", "count", "updated_at")
+        )
+        # Weeks of one employee come in several rows, and records may be split
+        # between the hot table and the archive.
+        for user_id, week, hours, count, updated_at in rows:
+            hours = hours or Decimal(0)
+            other = inputs.get(user_id, NO_ATTENDANCE)
+            weeks = dict(other.weeks)
+            monday = week_of(week)
+            weeks[monday] = weeks.get(monday, Decimal(0)) + hours
+            inputs[user_id] = AttendanceInput(
+                other.hours + hours, other.count + count,
+                max(other.updated_at, updated_at) if other.updated_at else updated_at, weeks,
+            )
+    return inputs
+
+
+def pay_rates(payroll_run, profiles):
+    """
+    {user_id: [RoleRate, ...]}, the role rates each of `profiles` is paid
+    at during the run's period; empty for employees paid from their
+    salary, i.e. without a role at the start of the period.
+    """
+    start, end = day_start(payroll_run.start_date), day_end(payroll_run.end_date)
+    table = RateTable(profile.user_id for profile in profiles)
+    rates = {}
+    for profile in profiles:
+        timeline = table.timeline(profile.user_id)
+        rates[profile.user_id] = timeline.between(start, end) if timeline.at(start) is not None else []
+    return rates
+
+
+def pay_basis(profile, rates):
+    """What an employee is paid from, readably; compared by refresh_payroll()."""
+    if not rates:
+        return f"salary {to_cents(profile.base_salary)}"
+    return "; ".join(
+        f"{rate.name} at {to_cents(rate.pay_per_hour)}/h from {rate.effective_from.isoformat()}" for rate in rates
+    )
+
+
+def straight_pay(payroll_run, rates, hours):
+    """
+    {(user_id, monday): sum of hundredth-hours x rate cents} for the weeks
+    in `hours` ({(user_id, monday): hundredths}) of the hourly employees in
+    `rates`. With one rate this is their hours times it; the records of
+    employees whose rate changed are read (one query per attendance table)
+    and paid at the rate in effect at their clock-in.
+    """
+    units, changed = {}, {}
+    for (user_id, monday), week_hours in hours.items():
+        user_rates = rates.get(user_id)
+        if not user_rates:
+            continue
+        if len(user_rates) == 1:
+            units[user_id, monday] = week_hours * to_unit(user_rates[0].pay_per_hour)
+        else:
+            units[user_id, monday] = 0
+            changed[user_id] = RateTimeline(user_rates)
+    if changed:
+        start, end = day_start(payroll_run.start_date), day_end(payroll_run.end_date)
+        for model in attendance_models(start, end):
+            records = model.objects.filter(
+                employee_id__in=changed, clock_in_time__gte=start, clock_in_time__lt=end, total_hours__isnull=False
+            ).values_list("employee_id", "clock_in_time", "total_hours")
+            for user_id, clock_in, total_hours in records:
+                rate = changed[user_id].at(clock_in).pay_per_hour
+                units[user_id, week_of(clock_in)] += to_unit(total_hours) * to_unit(rate)
+    return units
+
+
+def build_details(payroll_run, profiles, inputs, rates=None):
+    """
+    Unsaved PayrollDetail rows for `profiles` (EmployeeProfile instances).
+    Every employee-week is priced in one vectorized pass and each detail
+    sums its employee's weeks. `rates` defaults to pay_rates() of the
+    profiles.
+    """
+    if rates is None:
+        rates = pay_rates(payroll_run, profiles)
+    found = [inputs.get(profile.user_id, NO_ATTENDANCE) for profile in profiles]
+    hours = to_units(entry.hours for entry in found)
+
+    # One row per employee-week; employees without attendance get one empty week.
+    owner, week_keys, week_hours = [], [], []
+    for i, (profile, entry) in enumerate(zip(profiles, found)):
+        for monday, worked in (entry.weeks or {None: Decimal(0)}).items():
+            owner.append(i)
+            week_keys.append((profile.user_id, monday))
+            week_hours.append(to_unit(worked))
+    owner = np.array(owner, dtype=np.int64)
+    week_hours = np.array(week_hours, dtype=np.int64)
+    straight = straight_pay(
+        payroll_run, {profile.user_id: rates[profile.user_id] for profile in profiles},
+        {key: int(week_hours[row]) for row, key in enumerate(week_keys)},
+    )
+    hourly = np.array([bool(rates[profile.user_id]) for profile in profiles], dtype=bool)[owner]
+    base = to_units(profile.base_salary for profile in profiles)[owner]
+    salaried = calculate_salaries(base, week_hours)
+    by_rate = calculate_hourly_pay([straight.get(key, 0) for key in week_keys], week_hours)
+    weekly = [np.where(hourly, pay, salary) for pay, salary in zip(by_rate, salaried)]
+    totals = [np.zeros(len(profiles), dtype=np.int64) for _ in weekly]
+    for total, values in zip(totals, weekly):
+        np.add.at(total, owner, values)
+    salaries = Salaries(*totals)
+    return [
+        PayrollDetail(
+            payroll_run=payroll_run,
+            employee=profile,
+            worked_hours=from_cents(hours[i]),
+            base_salary=from_cents(salaries.base_salary[i]),
+            overtime_pay=from_cents(salaries.overtime_pay[i]),
+            deductions=from_cents(salaries.deductions[i]),
+            net_salary=from_cents(salaries.net_salary[i]),
+            attendance_count=entry.count,
+            attendance_updated_at=entry.updated_at,
+            pay_basis=pay_basis(profile, rates[profile.user_id]),
+        )
+        for i, (profile, entry) in enumerate(zip(profiles, found))
+    ]
+
+
+def chunk_size():
+    return getattr(settings, "PAYROLL_CHUNK_SIZE", 500)
+
+
+def process_chunk(payroll_run, profiles):
+    """Saves the details of `profiles` and advances the run's progress, atomically."""
+    inputs = attendance_inputs(payroll_run.start_date, payroll_run.end_date, [profile.user_id for profile in profiles])
+    details = build_details(payroll_run, profiles, inputs)
+    with transaction.atomic():
+        PayrollDetail.objects.bulk_create(details)
+        PayrollRun.objects.filter(pk=payroll_run.pk).update(
+            processed_employees=F("processed_employees") + len(profiles),
+            last_employee_id=profiles[-1].id,
+        )
+    payroll_run.processed_employees += len(profiles)
+    payroll_run.last_employee_id = profiles[-1].id
+
+
+def run_payroll(run_id):
+    """
+    Processes (or resumes) a pending or failed run, chunk by chunk.
+    Returns False when the run was not in a state to be processed, e.g.
+    because another worker has already claimed it.
+    """
+    claimed = PayrollRun.objects.filter(
+        pk=run_id, status__in=(PayrollRun.PENDING, PayrollRun.FAILED)
+    ).update(status=PayrollRun.RUNNING, error="")
+    if not claimed:
+        return False
+
+    payroll_run = PayrollRun.objects.get(pk=run_id)
+    profiles = EmployeeProfile.objects.only("id", "user_id", "base_salary").order_by("id")
+    try:
+        payroll_run.total_employees = payroll_run.processed_employees + profiles.filter(
+            id__gt=payroll_run.last_employee_id
+        ).count()
+        PayrollRun.objects.filter(pk=run_id).update(total_employees=payroll_run.total_employees)
+        size = chunk_size()
+        while True:
+            chunk = list(profiles.filter(id__gt=payroll_run.last_employee_id)[:size])
+            if not chunk:
+                break
+            process_chunk(payroll_run, chunk)
+    except Exception as exc:
+        PayrollRun.objects.filter(pk=run_id).update(status=PayrollRun.FAILED, error=f"{type(exc).__name__}: {exc}")
+        raise
+
+    PayrollRun.objects.filter(pk=run_id).update(
+        status=PayrollRun.COMPLETED,
+        total_employees=payroll_run.processed_employees,
+        finished_at=timezone.now(),
+    )
+    return True
+
+
+def refresh_payroll(payroll_run):
+    """
+    Brings a completed run up to date after attendance corrections. Only
+    employees whose attendance fingerprint or pay basis changed since their
+    detail was computed (and employees added since the run) are
+    recomputed; their details are upserted in one statement. Returns
+    {"checked": <employees>, "updated": <details written>}.
+    """
+    inputs = attendance_inputs(payroll_run.start_date, payroll_run.end_date)
+    saved = {
+        employee_id: (count, updated_at, basis)
+        for employee_id, count, updated_at, basis in payroll_run.details.values_list(
+            "employee_id", "attendance_count", "attendance_updated_at", "pay_basis"
+        )
+    }
+    profiles = list(EmployeeProfile.objects.only("id", "user_id", "base_salary").order_by("id"))
+    rates = pay_rates(payroll_run, profiles)
+    changed = []
+    for profile in profiles:
+        found = inputs.get(profile.user_id, NO_ATTENDANCE)
+        if saved.get(profile.id) != (found.count, found.updated_at, pay_basis(profile, rates[profile.user_id])):
+            changed.append(profile)
+
+    if changed:
+        PayrollDetail.objects.bulk_create(
+            build_details(payroll_run, changed, inputs, rates),
+            update_conflicts=True,
+            unique_fields=["payroll_run", "employee"],
+            update_fields=[
+                "worked_hours", "base_salary", "overtime_pay", "deductions", "net_salary",
+                "attendance_count", "attendance_updated_at", "pay_basis",
+            ],
+        )
+    return {"checked": len(profiles), "updated": len(changed)}
@@ -0,0 +1,42 @@
+import random
+import time
+from decimal import ROUND_HALF_UP, Decimal
+
+from django.core.management.base import BaseCommand
+
+from payroll.calculator import calculate_salaries, to_units
+from payroll.models import EmployeeProfile
+from payroll.utils import calculate_salary
+
+
+class Command(BaseCommand):
+    help = "Benchmarks the vectorized salary calculator against per-employee calculate_salary()."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--employees", type=int, default=100000)
+        parser.add_argument("--seed", type=int, default=1)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options["seed"])
+        count = options["employees"]
+        salaries = [Decimal(rng.randint(30000, 200000)).scaleb(-2) for _ in range(count)]
+        hours = [Decimal(rng.randint(0, 6000)).scaleb(-2) for _ in range(count)]
+        cent = Decimal("0.01")
+
+        started = time.perf_counter()
+        for salary, worked in zip(salaries, hours):
+            calc = calculate_salary(EmployeeProfile(base_salary=salary), worked)
+            Decimal(calc["net_salary"]).quantize(cent, rounding=ROUND_HALF_UP)
+        per_employee = time.perf_counter() - started
+
+        started = time.perf_counter()
+        base, worked = to_units(salaries), to_units(hours)
+        converted = time.perf_counter() - started
+        calculate_salaries(base, worked)
+        vectorized = time.perf_counter() - started
+
+        self.stdout.write(
+            f"{count} employees: calculate_salary() {per_employee * 1000:.1f} ms, "
+            f"calculate_salaries() {vectorized * 1000:.1f} ms "
+            f"({converted * 1000:.1f} ms of it converting Decimals to cents)."
+        )
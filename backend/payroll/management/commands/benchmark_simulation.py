@@ -0,0 +1,53 @@
+import random
+import time
+from datetime import date, datetime, time as clock, timedelta
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from payroll.simulation import DraftShift, PaidEmployee, price_shifts
+from roles.rates import RateTimeline, RoleRate
+
+
+class Command(BaseCommand):
+    help = "Benchmarks the labor-cost simulation of a draft week (without the database)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--shifts", type=int, default=1000)
+        parser.add_argument("--employees", type=int, default=200)
+        parser.add_argument("--seed", type=int, default=1)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options["seed"])
+        monday = date(2025, 1, 6)
+        employee_ids = range(1, options["employees"] + 1)
+        employees = {
+            employee_id: PaidEmployee(rng.randint(50000, 150000), f"Department {employee_id % 5}")
+            for employee_id in employee_ids
+        }
+        # Half the employees hold a role, some promoted mid-week.
+        since = timezone.make_aware(datetime(2024, 1, 1))
+        timelines = {}
+        for employee_id in employee_ids[::2]:
+            rates = [RoleRate(since, 1, "Cashier", Decimal(rng.randint(1500, 3000)).scaleb(-2))]
+            if rng.random() < 0.2:
+                promoted = timezone.make_aware(datetime.combine(monday + timedelta(days=3), clock()))
+                rates.append(RoleRate(promoted, 2, "Lead", Decimal(rng.randint(3000, 4000)).scaleb(-2)))
+            timelines[employee_id] = RateTimeline(rates)
+        shifts = []
+        for _ in range(options["shifts"]):
+            start = rng.randint(6, 14)
+            shifts.append(DraftShift(
+                rng.choice(employee_ids), monday + timedelta(days=rng.randint(0, 6)),
+                clock(start), clock((start + rng.randint(4, 10)) % 24), f"Store {rng.randint(1, 10)}",
+            ))
+
+        started = time.perf_counter()
+        result = price_shifts(shifts, employees, timelines)
+        elapsed = time.perf_counter() - started
+
+        self.stdout.write(
+            f"{len(shifts)} shifts, {len(employees)} employees: priced in {elapsed * 1000:.1f} ms "
+            f"(cost {result['cost']}, {result['overtime_hours']} overtime hours)."
+        )
@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand
+
+from payroll.engine import run_payroll
+from payroll.models import PayrollRun
+
+
+class Command(BaseCommand):
+    help = "Processes pending and failed payroll runs in this process, resuming after their last saved chunk."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--include-running", action="store_true",
+            help="Also resume runs left running by a stopped worker. Only use when no worker is active.",
+        )
+
+    def handle(self, *args, **options):
+        if options["include_running"]:
+            PayrollRun.objects.filter(status=PayrollRun.RUNNING).update(status=PayrollRun.PENDING)
+        run_ids = list(
+            PayrollRun.objects.filter(status__in=(PayrollRun.PENDING, PayrollRun.FAILED))
+            .order_by("id").values_list("id", flat=True)
+        )
+        for run_id in run_ids:
+            try:
+                run_payroll(run_id)
+            except Exception as exc:
+                self.stderr.write(f"Payroll run {run_id} failed: {exc}")
+            else:
+                self.stdout.write(f"Payroll run {run_id} processed.")
@@ -0,0 +1,59 @@
+# Generated by Django 4.2.19 on 2026-10-18 19:22
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+
+
+def mark_existing_runs_completed(apps, schema_editor):
+    """Runs created before background processing were finished inside their request."""
+    PayrollRun = apps.get_model('payroll', 'PayrollRun')
+    PayrollDetail = apps.get_model('payroll', 'PayrollDetail')
+    details = (
+        PayrollDetail.objects.filter(payroll_run=OuterRef('pk')).values('payroll_run')
+        .annotate(count=Count('id')).values('count')
+    )
+    PayrollRun.objects.update(status='completed')
+    PayrollRun.objects.filter(details__isnull=False).update(
+        total_employees=Subquery(details), processed_employees=Subquery(details)
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('payroll', '0002_department_employeeprofile_payrolldetail_payrollrun_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='payrollrun',
+            name='error',
+            field=models.TextField(blank=True),
+        ),
+        migrations.AddField(
+            model_name='payrollrun',
+            name='finished_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='payrollrun',
+            name='last_employee_id',
+            field=models.PositiveBigIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='payrollrun',
+            name='processed_employees',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='payrollrun',
+            name='status',
+            field=models.CharField(choices=[('pending', 'Pending'), ('running', 'Running'), ('completed', 'Completed'), ('failed', 'Failed')], default='pending', max_length=20),
+        ),
+        migrations.AddField(
+            model_name='payrollrun',
+            name='total_employees',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(mark_existing_runs_completed, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 4.2.19 on 2026-10-18 19:24
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('payroll', '0003_payroll_run_progress'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='payrolldetail',
+            name='attendance_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='payrolldetail',
+            name='attendance_updated_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddConstraint(
+            model_name='payrolldetail',
+            constraint=models.UniqueConstraint(fields=('payroll_run', 'employee'), name='payroll_detail_run_employee'),
+        ),
+    ]
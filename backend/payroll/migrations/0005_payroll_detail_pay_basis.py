@@ -0,0 +1,29 @@
+# Generated by Django 4.2.19 on 2026-10-18 19:31
+
+from django.db import migrations, models
+
+
+def mark_existing_details_salaried(apps, schema_editor):
+    """Details computed before role rates were all paid from the salary they record."""
+    PayrollDetail = apps.get_model('payroll', 'PayrollDetail')
+    details = []
+    for detail in PayrollDetail.objects.only('id', 'base_salary').iterator():
+        detail.pay_basis = f"salary {detail.base_salary:.2f}"
+        details.append(detail)
+    PayrollDetail.objects.bulk_update(details, ['pay_basis'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('payroll', '0004_payroll_detail_fingerprint'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='payrolldetail',
+            name='pay_basis',
+            field=models.TextField(blank=True),
+        ),
+        migrations.RunPython(mark_existing_details_salaried, migrations.RunPython.noop),
+    ]
@@ -21,9 +21,28 @@ class EmployeeProfile(models.Model):
         return f"{self.user.name} ({self.department})"
 
 class PayrollRun(models.Model):
+    PENDING = 'pending'
+    RUNNING = 'running'
+    COMPLETED = 'completed'
+    FAILED = 'failed'
+    STATUS_CHOICES = (
+        (PENDING, 'Pending'),
+        (RUNNING, 'Running'),
+        (COMPLETED, 'Completed'),
+        (FAILED, 'Failed'),
+    )
+
     start_date = models.DateField(help_text="Start of the payroll period")
     end_date = models.DateField(help_text="End of the payroll period")
     created_at = models.DateTimeField(auto_now_add=True)
+    # Processing state, updated by the background worker (see payroll/worker.py).
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=PENDING)
+    total_employees = models.PositiveIntegerField(default=0)
+    processed_employees = models.PositiveIntegerField(default=0)
+    # Highest EmployeeProfile id whose detail is saved; a resumed run continues after it.
+    last_employee_id = models.PositiveBigIntegerField(default=0)
+    error = models.TextField(blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
 
     def __str__(self):
         return f"Payroll from {self.start_date} to {self.end_date}"
@@ -36,6 +55,17 @@ class PayrollDetail(models.Model):
     overtime_pay = models.DecimalField(max_digits=10, decimal_places=2, default=0)
     deductions = models.DecimalField(max_digits=10, decimal_places=2, default=0)
     net_salary = models.DecimalField(max_digits=10, decimal_places=2, default=0)
+    # Fingerprint of the attendance the detail was computed from: a refresh
+    # of the run only recomputes details whose fingerprint changed.
+    attendance_count = models.PositiveIntegerField(default=0)
+    attendance_updated_at = models.DateTimeField(null=True, blank=True)
+    # The salary or role rates the employee was paid from (see payroll/engine.py).
+    pay_basis = models.TextField(blank=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['payroll_run', 'employee'], name='payroll_detail_run_employee'),
+        ]
 
     def __str__(self):
         return f"Payroll Detail for {self.employee.user.name}"
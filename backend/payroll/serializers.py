@@ -1,4 +1,5 @@
 # payroll/serializers.py
+from django.conf import settings
 from rest_framework import serializers
 from .models import Department, EmployeeProfile, PayrollRun, PayrollDetail
 
@@ -24,3 +25,52 @@ class PayrollRunSerializer(serializers.ModelSerializer):
     class Meta:
         model = PayrollRun
         fields = '__all__'
+
+
+class PayrollRunStatusSerializer(serializers.ModelSerializer):
+    """A run's processing state without its details, for polling."""
+    progress = serializers.SerializerMethodField()
+
+    class Meta:
+        model = PayrollRun
+        fields = [
+            'id', 'start_date', 'end_date', 'status', 'total_employees', 'processed_employees',
+            'progress', 'error', 'created_at', 'finished_at',
+        ]
+
+    def get_progress(self, run):
+        """Percentage of employees processed."""
+        if run.status == PayrollRun.COMPLETED:
+            return 100
+        if not run.total_employees:
+            return 0
+        return round(100 * run.processed_employees / run.total_employees)
+
+class PayrollPeriodSerializer(serializers.Serializer):
+    start_date = serializers.DateField()
+    end_date = serializers.DateField()
+
+    def validate(self, attrs):
+        if attrs['end_date'] < attrs['start_date']:
+            raise serializers.ValidationError({'end_date': 'end_date must not be before start_date.'})
+        return attrs
+
+class DraftShiftSerializer(serializers.Serializer):
+    employee = serializers.IntegerField(min_value=1)
+    date = serializers.DateField()
+    start_time = serializers.TimeField()
+    end_time = serializers.TimeField()
+    location = serializers.CharField(max_length=100)
+
+class LaborCostSimulationSerializer(serializers.Serializer):
+    shifts = DraftShiftSerializer(many=True, required=False, default=list)
+    shift_ids = serializers.ListField(child=serializers.IntegerField(min_value=1), required=False, default=list)
+
+    def validate(self, attrs):
+        total = len(attrs['shifts']) + len(attrs['shift_ids'])
+        if not total:
+            raise serializers.ValidationError('Provide draft shifts and/or shift_ids.')
+        limit = getattr(settings, 'PAYROLL_SIMULATION_MAX_SHIFTS', 5000)
+        if total > limit:
+            raise serializers.ValidationError(f'At most {limit} shifts can be simulated at once.')
+        return attrs
@@ -0,0 +1,193 @@
+# payroll/simulation.py
+"""
+Labor-cost what-if simulation for a draft schedule.
+
+Prices a set of shifts as if each were worked exactly as scheduled. The
+shifts can be unsaved drafts, saved shifts referenced by id, or both. It
+uses the payroll rules and writes nothing. Every (employee, week) is paid
+like a one-week payroll period (payroll/engine.py):
+  - Employees holding a role on the Monday are paid the role rate in
+    effect at each shift's start.
+  - The others are paid pro rata of their weekly base_salary.
+  - In both cases, overtime applies beyond PAYROLL_STANDARD_HOURS.
+Cost is the gross pay; deductions are withheld from it, not added to it.
+Employees without an EmployeeProfile are not paid by payroll: they cost
+nothing here and are listed under "unpaid_employees".
+
+The database is read with one query for the employees (with their
+profiles and departments), one for their role rates (none when cached)
+and one for saved shifts. The pay is computed with NumPy over all
+employee-weeks at once. Each employee-week's pay and overtime are split
+between locations in proportion to the hours worked there.
+"""
+from collections import namedtuple
+from datetime import timedelta
+
+import numpy as np
+from django.contrib.auth import get_user_model
+from rest_framework import serializers
+
+from roles.rates import RateTable
+from shifts.models import Shift, shift_span
+from shiftwise_backend.exports import day_start
+from .calculator import (
+    Salaries, calculate_hourly_pay, calculate_salaries, from_cents, round_div, rules, to_unit,
+)
+
+User = get_user_model()
+
+DraftShift = namedtuple("DraftShift", ["employee_id", "date", "start_time", "end_time", "location"])
+# A paid employee: their weekly base salary in cents and department name.
+PaidEmployee = namedtuple("PaidEmployee", ["base_cents", "department"])
+
+
+def amounts(hours, overtime_hours, regular_pay, overtime_pay):
+    """Hundredths of hours and cents -> the decimal strings of a result row."""
+    return {
+        "hours": str(from_cents(hours)),
+        "overtime_hours": str(from_cents(overtime_hours)),
+        "regular_pay": str(from_cents(regular_pay)),
+        "overtime_pay": str(from_cents(overtime_pay)),
+        "cost": str(from_cents(regular_pay + overtime_pay)),
+    }
+
+
+def price_shifts(shifts, employees, timelines):
+    """
+    Simulates the pay of `shifts` (DraftShifts). `employees` maps the
+    paid employees' ids to PaidEmployee and `timelines` their ids to their
+    RateTimeline. Returns the totals (hours, overtime_hours, regular_pay,
+    overtime_pay, cost) of the whole schedule, and the same per employee,
+    location and department.
+    """
+    standard = rules()[0]
+    standard_units = standard * 100
+    p, q = standard_units.numerator, standard_units.denominator
+
+    count = len(shifts)
+    hours = np.empty(count, dtype=np.int64)
+    rate_cents = np.zeros(count, dtype=np.int64)
+    group_of = np.empty(count, dtype=np.int64)
+    location_of = np.empty(count, dtype=np.int64)
+    groups, locations, cents = {}, {}, {}
+    for i, shift in enumerate(shifts):
+        start, end = shift_span(shift.date, shift.start_time, shift.end_time)
+        # Hundredths of an hour, rounded like Attendance.total_hours.
+        hours[i] = round((end - start).total_seconds() / 36)
+        monday = shift.date - timedelta(days=shift.date.weekday())
+        group_of[i] = groups.setdefault((shift.employee_id, monday), len(groups))
+        location_of[i] = locations.setdefault(shift.location, len(locations))
+        timeline = timelines.get(shift.employee_id)
+        rate = timeline.at(start) if timeline else None
+        if rate is not None:
+            if rate.pay_per_hour not in cents:
+                cents[rate.pay_per_hour] = to_unit(rate.pay_per_hour)
+            rate_cents[i] = cents[rate.pay_per_hour]
+
+    # Employee-weeks: paid from a role when one is held at the start of the week.
+    size = len(groups)
+    base = np.zeros(size, dtype=np.int64)
+    hourly = np.zeros(size, dtype=bool)
+    paid = np.zeros(size, dtype=bool)
+    employee_ids = []
+    employee_of = np.empty(size, dtype=np.int64)
+    employee_index = {}
+    for (employee_id, monday), group in groups.items():
+        employee = employees.get(employee_id)
+        if employee is not None:
+            paid[group] = True
+            base[group] = employee.base_cents
+            timeline = timelines.get(employee_id)
+            hourly[group] = timeline is not None and timeline.at(day_start(monday)) is not None
+        if employee_id not in employee_index:
+            employee_index[employee_id] = len(employee_ids)
+            employee_ids.append(employee_id)
+        employee_of[group] = employee_index[employee_id]
+
+    week_hours = np.zeros(size, dtype=np.int64)
+    np.add.at(week_hours, group_of, hours)
+    straight = np.zeros(size, dtype=np.int64)
+    np.add.at(straight, group_of, hours * rate_cents)
+    salaried = calculate_salaries(base, week_hours)
+    by_rate = calculate_hourly_pay(straight, week_hours)
+    pay = Salaries(*(np.where(hourly, hourly_pay, salary) for hourly_pay, salary in zip(by_rate, salaried)))
+    gross = np.where(paid, pay.net_salary + pay.deductions, 0)
+    overtime_pay = np.where(paid, pay.overtime_pay, 0)
+    overtime_hours = round_div(np.maximum(week_hours * q - p, 0), q)
+
+    # Per employee, summed over their weeks.
+    people = len(employee_ids)
+    employee_totals = np.zeros((4, people), dtype=np.int64)
+    for row, values in enumerate((week_hours, overtime_hours, gross - overtime_pay, overtime_pay)):
+        np.add.at(employee_totals[row], employee_of, values)
+
+    # Per location, each week split in proportion to the hours of its shifts.
+    share_of = np.maximum(week_hours[group_of], 1)
+    shift_overtime_hours = round_div(overtime_hours[group_of] * hours, share_of)
+    shift_overtime_pay = round_div(overtime_pay[group_of] * hours, share_of)
+    shift_cost = round_div(gross[group_of] * hours, share_of)
+    location_totals = np.zeros((4, len(locations)), dtype=np.int64)
+    for row, values in enumerate((hours, shift_overtime_hours, shift_cost - shift_overtime_pay, shift_overtime_pay)):
+        np.add.at(location_totals[row], location_of, values)
+
+    department_totals = {}
+    employee_rows = []
+    for index, employee_id in enumerate(employee_ids):
+        employee = employees.get(employee_id)
+        department = employee.department if employee else None
+        totals = employee_totals[:, index]
+        employee_rows.append({
+            "employee": employee_id, "department": department, "paid": employee is not None, **amounts(*totals),
+        })
+        if employee is not None:
+            department_totals[department] = department_totals.get(department, 0) + totals
+
+    return {
+        "shifts": count,
+        **amounts(*employee_totals.sum(axis=1)),
+        "employees": employee_rows,
+        "locations": [
+            {"location": location, **amounts(*location_totals[:, index])}
+            for location, index in sorted(locations.items())
+        ],
+        "departments": [
+            {"department": department, **amounts(*totals)}
+            # Employees without a department last.
+            for department, totals in sorted(department_totals.items(), key=lambda item: (item[0] is None, item[0]))
+        ],
+        "unpaid_employees": [employee_id for employee_id in employee_ids if employee_id not in employees],
+    }
+
+
+def simulate(drafts=(), shift_ids=()):
+    """
+    Prices `drafts` (DraftShifts) together with the saved shifts
+    `shift_ids`. Raises ValidationError for unknown shifts or employees.
+    """
+    shifts = list(drafts)
+    if shift_ids:
+        saved = Shift.objects.filter(id__in=shift_ids).values_list(
+            "id", "employee_id", "date", "start_time", "end_time", "location"
+        )
+        found = set()
+        for shift_id, *fields in saved:
+            found.add(shift_id)
+            shifts.append(DraftShift(*fields))
+        missing = sorted(set(shift_ids) - found)
+        if missing:
+            raise serializers.ValidationError({"shift_ids": [f"Unknown shifts: {missing}."]})
+
+    user_ids = {shift.employee_id for shift in shifts}
+    employees, known = {}, set()
+    rows = User.objects.filter(id__in=user_ids).values_list(
+        "id", "employeeprofile__id", "employeeprofile__base_salary", "employeeprofile__department__name"
+    )
+    for user_id, profile_id, base_salary, department in rows:
+        known.add(user_id)
+        if profile_id is not None:
+            employees[user_id] = PaidEmployee(to_unit(base_salary), department)
+    missing = sorted(user_ids - known)
+    if missing:
+        raise serializers.ValidationError({"shifts": [f"Unknown employees: {missing}."]})
+
+    return price_shifts(shifts, employees, RateTable(employees).timelines)
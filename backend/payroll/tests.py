@@ -1,3 +1,350 @@
-from django.test import TestCase
+import random
+import time
+from datetime import date, datetime, timedelta
+from decimal import ROUND_HALF_UP, Decimal
 
-# Create your tests here.
+from django.db import connection
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from shiftwise_backend.testing import QueryBudgetMixin, api_client, make_admin, make_users
+from attendance.models import Attendance
+from roles.models import Role, UserRoleAssignment
+from shifts.tests import make_shifts
+from .calculator import calculate_salaries, from_cents, to_units
+from .engine import run_payroll
+from .models import Department, EmployeeProfile, PayrollDetail, PayrollRun
+from .utils import calculate_salary
+
+
+class PayrollQueryBudgetTests(QueryBudgetMixin, TestCase):
+    def setUp(self):
+        self.admin = make_admin()
+        self.department = Department.objects.create(name="Retail")
+
+    def make_profiles(self, count):
+        EmployeeProfile.objects.bulk_create([
+            EmployeeProfile(user=user, department=self.department, base_salary=Decimal("800.00"))
+            for user in make_users(count)
+        ])
+
+    def test_employee_list(self):
+        self.assertQueryBudget(api_client(self.admin), "/api/payroll/employees/", 1, self.make_profiles)
+
+    def test_export_filters_runs_by_period(self):
+        self.make_profiles(2)
+        january = PayrollRun.objects.create(start_date=date(2025, 1, 1), end_date=date(2025, 1, 31))
+        february = PayrollRun.objects.create(start_date=date(2025, 2, 1), end_date=date(2025, 2, 28))
+        PayrollDetail.objects.bulk_create([
+            PayrollDetail(payroll_run=run, employee=profile, worked_hours=Decimal("40"), net_salary=Decimal("800"))
+            for run in (january, february) for profile in EmployeeProfile.objects.all()
+        ])
+
+        with self.assertNumQueries(1):
+            response = api_client(self.admin).get("/api/payroll/export/", {"date_from": "2025-02-10"})
+            lines = b"".join(response.streaming_content).decode().splitlines()
+
+        self.assertEqual(len(lines), 3)
+        self.assertTrue(all(line.startswith(f"{february.id},2025-02-01,2025-02-28,") for line in lines[1:]))
+        self.assertIn(",Retail,40.00,", lines[1])
+
+
+class ProcessPayrollTests(TestCase):
+    def setUp(self):
+        self.admin = make_admin()
+        self.client = api_client(self.admin)
+
+    def make_profiles(self, count, hours):
+        """Profiles on 800/week, each with one attendance record of `hours` on 2025-01-06."""
+        users = make_users(count)
+        EmployeeProfile.objects.bulk_create([
+            EmployeeProfile(user=user, base_salary=Decimal("800.00")) for user in users
+        ])
+        clock_in = timezone.make_aware(datetime(2025, 1, 6, 9))
+        Attendance.objects.bulk_create([
+            Attendance(
+                shift=shift, employee=shift.employee, clock_in_time=clock_in,
+                clock_out_time=clock_in + timedelta(hours=hours), total_hours=Decimal(hours),
+            )
+            for shift in make_shifts(users, count)
+        ])
+        return users
+
+    def process(self, start_date="2025-01-06", end_date="2025-01-12"):
+        """Starts a run and then does the background worker's job in this thread."""
+        with self.captureOnCommitCallbacks() as callbacks:
+            response = self.client.post(
+                "/api/payroll/process/", {"start_date": start_date, "end_date": end_date}, format="json"
+            )
+        self.assertEqual((response.status_code, response.data["status"], len(callbacks)), (202, "pending", 1))
+        run_payroll(response.data["id"])
+        return response.data["id"]
+
+    def test_pays_worked_hours_with_overtime(self):
+        self.make_profiles(1, 44)
+        self.make_profiles(1, 20)
+        # Outside the period.
+        Attendance.objects.filter(total_hours=20).update(clock_in_time=timezone.make_aware(datetime(2025, 1, 13, 9)))
+
+        run_id = self.process()
+
+        status = self.client.get(f"/api/payroll/runs/{run_id}/").data
+        self.assertEqual((status["status"], status["progress"], status["processed_employees"]), ("completed", 100, 2))
+        details = self.client.get(f"/api/payroll/runs/{run_id}/details/").data["details"]
+        overtime, absent = sorted(details, key=lambda detail: detail["employee"]["id"])
+        self.assertEqual(overtime["worked_hours"], "44.00")
+        self.assertEqual(overtime["overtime_pay"], "120.00")
+        self.assertEqual(overtime["net_salary"], "920.00")
+        self.assertEqual((absent["worked_hours"], absent["net_salary"]), ("0.00", "0.00"))
+
+    def test_applies_the_standard_hours_per_week(self):
+        steady, busy = self.make_profiles(2, 40)
+        # A second week of 40 hours for one, 4 more hours in the first week for the other.
+        for user, day, hours in ((steady, 13, 40), (busy, 7, 4)):
+            clock_in = timezone.make_aware(datetime(2025, 1, day, 9))
+            Attendance.objects.create(
+                shift=Attendance.objects.get(employee=user).shift, employee=user, clock_in_time=clock_in,
+                clock_out_time=clock_in + timedelta(hours=hours),
+            )
+
+        self.process(end_date="2025-01-19")
+
+        details = {detail.employee.user_id: detail for detail in PayrollDetail.objects.select_related("employee")}
+        paid = details[steady.id]
+        self.assertEqual((paid.worked_hours, paid.base_salary, paid.overtime_pay, paid.net_salary),
+                         (Decimal("80.00"), Decimal("1600.00"), Decimal("0.00"), Decimal("1600.00")))
+        paid = details[busy.id]
+        self.assertEqual((paid.worked_hours, paid.overtime_pay, paid.net_salary),
+                         (Decimal("44.00"), Decimal("120.00"), Decimal("920.00")))
+
+    def test_pays_role_rates_by_the_hour(self):
+        fixed, promoted = self.make_profiles(2, 44)
+        cashier = Role.objects.create(name="Cashier", pay_per_hour=Decimal("20.00"))
+        lead = Role.objects.create(name="Lead", pay_per_hour=Decimal("30.00"))
+        for user, role, day in ((fixed, cashier, 1), (promoted, cashier, 1), (promoted, lead, 8)):
+            assignment = UserRoleAssignment.objects.create(user=user, role=role)
+            UserRoleAssignment.objects.filter(pk=assignment.pk).update(
+                assigned_at=timezone.make_aware(datetime(2025, 1, day))
+            )
+        # Worked after the promotion, so paid at the Lead rate.
+        clock_in = timezone.make_aware(datetime(2025, 1, 9, 9))
+        Attendance.objects.create(
+            shift=Attendance.objects.get(employee=promoted).shift, employee=promoted,
+            clock_in_time=clock_in, clock_out_time=clock_in + timedelta(hours=4),
+        )
+
+        run_id = self.process()
+
+        details = {detail.employee.user_id: detail for detail in PayrollDetail.objects.select_related("employee")}
+        paid = details[fixed.id]
+        self.assertEqual((paid.base_salary, paid.overtime_pay, paid.net_salary),
+                         (Decimal("800.00"), Decimal("120.00"), Decimal("920.00")))
+        self.assertTrue(paid.pay_basis.startswith("Cashier at 20.00/h from 2025-01-01"))
+        # 1000.00 for 48 hours: overtime at 1.5 times the 20.83 average.
+        paid = details[promoted.id]
+        self.assertEqual((paid.worked_hours, paid.base_salary, paid.overtime_pay, paid.net_salary),
+                         (Decimal("48.00"), Decimal("833.33"), Decimal("250.00"), Decimal("1083.33")))
+
+        cashier.pay_per_hour = Decimal("25.00")
+        cashier.save()
+        self.assertEqual(self.client.post(f"/api/payroll/runs/{run_id}/refresh/").data["updated"], 2)
+        self.assertEqual(PayrollDetail.objects.get(employee__user=fixed).net_salary, Decimal("1150.00"))
+
+    @override_settings(PAYROLL_CHUNK_SIZE=100)
+    def test_runs_a_fixed_number_of_queries(self):
+        counts = []
+        # Runs pay everyone so far (10, then 70): one chunk and one bulk INSERT each (SQLite caps parameters).
+        for size in (10, 60):
+            self.make_profiles(size, 8)
+            with CaptureQueriesContext(connection) as queries:
+                self.process()
+            counts.append(len(queries))
+        self.assertEqual(counts[0], counts[1])
+        self.assertEqual(PayrollDetail.objects.filter(worked_hours=8).count(), 10 + 70)
+
+    @override_settings(PAYROLL_CHUNK_SIZE=2)
+    def test_failed_run_resumes_after_the_saved_chunks(self):
+        self.make_profiles(5, 80)
+        # Overflows net_salary (10 digits) in the second chunk.
+        broken = EmployeeProfile.objects.order_by("id")[3]
+        EmployeeProfile.objects.filter(pk=broken.pk).update(base_salary=Decimal("99999999.00"))
+
+        with self.assertRaises(Exception):
+            self.process()
+        run = PayrollRun.objects.get()
+        self.assertEqual((run.status, run.processed_employees, run.total_employees), ("failed", 2, 5))
+        self.assertTrue(run.error)
+        saved = list(PayrollDetail.objects.values_list("id", flat=True))
+
+        EmployeeProfile.objects.filter(pk=broken.pk).update(base_salary=Decimal("800.00"))
+        with self.captureOnCommitCallbacks(execute=False):
+            response = self.client.post(f"/api/payroll/runs/{run.id}/resume/")
+        self.assertEqual(response.status_code, 202)
+        run_payroll(run.id)
+
+        run.refresh_from_db()
+        self.assertEqual((run.status, run.processed_employees), ("completed", 5))
+        self.assertEqual(PayrollDetail.objects.count(), 5)
+        self.assertEqual(list(PayrollDetail.objects.order_by("id").values_list("id", flat=True)[:2]), saved)
+        self.assertEqual(self.client.post(f"/api/payroll/runs/{run.id}/resume/").status_code, 409)
+
+    def test_rejects_invalid_periods(self):
+        response = self.client.post(
+            "/api/payroll/process/", {"start_date": "2025-01-12", "end_date": "2025-01-06"}, format="json"
+        )
+        self.assertEqual(response.status_code, 400)
+        employee = api_client(make_users(1)[0])
+        self.assertEqual(employee.post("/api/payroll/process/", {}, format="json").status_code, 403)
+
+    def test_refresh_only_recomputes_changed_employees(self):
+        users = self.make_profiles(20, 8)
+        run_id = self.process()
+        before = dict(PayrollDetail.objects.values_list("employee__user_id", "net_salary"))
+
+        # A corrected clock-out and a new employee.
+        record = Attendance.objects.get(employee=users[3])
+        record.clock_out_time += timedelta(hours=2)
+        record.save()
+        newcomer = self.make_profiles(1, 4)[0]
+
+        response = self.client.post(f"/api/payroll/runs/{run_id}/refresh/")
+
+        self.assertEqual((response.data["checked"], response.data["updated"]), (21, 2))
+        after = dict(PayrollDetail.objects.values_list("employee__user_id", "net_salary"))
+        self.assertEqual(after[users[3].id], Decimal("200.00"))
+        self.assertEqual(after[newcomer.id], Decimal("80.00"))
+        self.assertEqual({k: v for k, v in after.items() if k not in (users[3].id, newcomer.id)},
+                         {k: v for k, v in before.items() if k != users[3].id})
+
+        self.assertEqual(self.client.post(f"/api/payroll/runs/{run_id}/refresh/").data["updated"], 0)
+
+
+class SalaryCalculatorTests(TestCase):
+    def test_matches_calculate_salary_to_the_cent(self):
+        rng = random.Random(7)
+        salaries = [Decimal(rng.randint(0, 500000)).scaleb(-2) for _ in range(3000)]
+        # Random hours plus the overtime boundary and its neighbours.
+        hours = [Decimal(rng.randint(0, 9000)).scaleb(-2) for _ in range(2996)]
+        hours += [Decimal("0"), Decimal("39.99"), Decimal("40"), Decimal("40.01")]
+
+        result = calculate_salaries(to_units(salaries), to_units(hours))
+
+        cent = Decimal("0.01")
+        for i, (salary, worked) in enumerate(zip(salaries, hours)):
+            expected = calculate_salary(EmployeeProfile(base_salary=salary), worked)
+            for field in ("base_salary", "overtime_pay", "deductions", "net_salary"):
+                self.assertEqual(
+                    from_cents(getattr(result, field)[i]),
+                    Decimal(expected[field]).quantize(cent, rounding=ROUND_HALF_UP),
+                    f"{field} for {salary} and {worked} hours",
+                )
+
+    def test_rounding_modes_and_deductions(self):
+        # 1 cent for 20 of 40 hours is half a cent.
+        for mode, cents in (("half_up", 1), ("half_even", 0), ("down", 0)):
+            self.assertEqual(calculate_salaries([1], [2000], rounding=mode).net_salary[0], cents)
+        with self.settings(PAYROLL_DEDUCTION_RATE="0.125", PAYROLL_STANDARD_HOURS="37.5"):
+            result = calculate_salaries([75000], [4500])
+        # 7.5 overtime hours at 1.5 x 20.00 = 225.00; gross 975.00, 12.5% deducted.
+        self.assertEqual(
+            [int(value[0]) for value in result], [75000, 22500, 12188, 85312]
+        )
+
+    def test_explicit_zero_overrides_the_settings(self):
+        with self.settings(PAYROLL_DEDUCTION_RATE="0.125"):
+            result = calculate_salaries([75000], [4500], overtime_multiplier=0, deduction_rate=0)
+        # 5 overtime hours paid at 0 x the hourly rate, and nothing deducted.
+        self.assertEqual([int(value[0]) for value in result], [75000, 0, 0, 75000])
+
+
+class LaborCostSimulationTests(TestCase):
+    def setUp(self):
+        self.client = api_client(make_admin())
+
+    def draft(self, user, day, start, end, location="Main"):
+        return {"employee": user.id, "date": f"2025-01-{day:02d}", "start_time": start, "end_time": end,
+                "location": location}
+
+    def test_projects_cost_per_employee_location_and_department(self):
+        salaried, hourly, unpaid = make_users(3)
+        retail = Department.objects.create(name="Retail")
+        EmployeeProfile.objects.create(user=salaried, department=retail, base_salary=Decimal("800.00"))
+        EmployeeProfile.objects.create(user=hourly, base_salary=Decimal("800.00"))
+        assignment = UserRoleAssignment.objects.create(
+            user=hourly, role=Role.objects.create(name="Cashier", pay_per_hour=Decimal("20.00"))
+        )
+        UserRoleAssignment.objects.filter(pk=assignment.pk).update(
+            assigned_at=timezone.make_aware(datetime(2025, 1, 1))
+        )
+        saved = make_shifts([hourly], 1)[0]
+
+        # 45 hours for the salaried employee, the last 9 at North.
+        drafts = [self.draft(salaried, day, "09:00", "18:00") for day in range(6, 10)]
+        drafts += [self.draft(salaried, 10, "09:00", "18:00", "North"), self.draft(unpaid, 7, "10:00", "14:00")]
+        with self.assertNumQueries(3):  # saved shifts, employees, role rates
+            response = self.client.post(
+                "/api/payroll/simulate/", {"shifts": drafts, "shift_ids": [saved.id]}, format="json"
+            )
+
+        self.assertEqual(response.status_code, 200)
+        result = response.data
+        self.assertEqual((result["shifts"], result["hours"], result["overtime_hours"], result["cost"]),
+                         (7, "57.00", "5.00", "1110.00"))
+        employees = {row["employee"]: row for row in result["employees"]}
+        # 800.00 plus 5 overtime hours at 1.5 x 20.00.
+        self.assertEqual((employees[salaried.id]["overtime_pay"], employees[salaried.id]["cost"]), ("150.00", "950.00"))
+        self.assertEqual(employees[hourly.id]["cost"], "160.00")
+        self.assertEqual((employees[unpaid.id]["paid"], employees[unpaid.id]["cost"]), (False, "0.00"))
+        self.assertEqual(result["unpaid_employees"], [unpaid.id])
+        self.assertEqual(
+            [(row["location"], row["hours"], row["overtime_hours"], row["cost"]) for row in result["locations"]],
+            [("Main", "48.00", "4.00", "920.00"), ("North", "9.00", "1.00", "190.00")],
+        )
+        self.assertEqual([(row["department"], row["cost"]) for row in result["departments"]],
+                         [("Retail", "950.00"), (None, "160.00")])
+        self.assertFalse(PayrollRun.objects.exists())
+
+    def test_prices_a_thousand_shift_week_in_fixed_queries(self):
+        users = make_users(200)
+        EmployeeProfile.objects.bulk_create([
+            EmployeeProfile(user=user, base_salary=Decimal("800.00")) for user in users
+        ])
+        drafts = [self.draft(users[i % 200], 6 + i // 200, "08:00", "17:00", f"Store {i % 7}") for i in range(1000)]
+
+        with self.assertNumQueries(2):  # employees, role rates
+            response = self.client.post("/api/payroll/simulate/", {"shifts": drafts}, format="json")
+
+        # Five 9-hour shifts each: 45 hours, 5 of them overtime.
+        self.assertEqual((response.data["hours"], response.data["overtime_hours"]), ("9000.00", "1000.00"))
+        self.assertEqual(response.data["cost"], str(Decimal("950.00") * 200))
+
+    def test_rejects_unknown_shifts_and_employees(self):
+        employee = make_users(1)[0]
+        unknown = dict(self.draft(employee, 6, "09:00", "17:00"), employee=999)
+        for body in ({}, {"shift_ids": [999]}, {"shifts": [unknown]}):
+            self.assertEqual(self.client.post("/api/payroll/simulate/", body, format="json").status_code, 400)
+        with self.settings(PAYROLL_SIMULATION_MAX_SHIFTS=1):
+            body = {"shifts": [self.draft(employee, 6, "09:00", "17:00")] * 2}
+            self.assertEqual(self.client.post("/api/payroll/simulate/", body, format="json").status_code, 400)
+        self.assertEqual(api_client(employee).post("/api/payroll/simulate/", {}, format="json").status_code, 403)
+
+
+class BackgroundPayrollTests(TransactionTestCase):
+    def test_worker_processes_the_run_after_the_request(self):
+        admin = make_admin()
+        EmployeeProfile.objects.bulk_create([
+            EmployeeProfile(user=user, base_salary=Decimal("800.00")) for user in make_users(30)
+        ])
+        client = api_client(admin)
+
+        response = client.post("/api/payroll/process/", {"start_date": "2025-01-06", "end_date": "2025-01-12"}, format="json")
+        self.assertEqual(response.status_code, 202)
+
+        deadline = time.monotonic() + 10
+        while time.monotonic() < deadline:
+            status = client.get(f"/api/payroll/runs/{response.data['id']}/").data
+            if status["status"] in ("completed", "failed"):
+                break
+            time.sleep(0.05)
+        self.assertEqual((status["status"], status["processed_employees"]), ("completed", 30))
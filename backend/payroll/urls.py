@@ -1,8 +1,17 @@
 # payroll/urls.py
 from django.urls import path
-from .views import EmployeeListView, ProcessPayrollView
+from .views import (
+    EmployeeListView, ProcessPayrollView, PayrollExportView, PayrollRunStatusView, PayrollRunDetailsView,
+    ResumePayrollRunView, RefreshPayrollRunView, LaborCostSimulationView,
+)
 
 urlpatterns = [
     path('employees/', EmployeeListView.as_view(), name='employee-list'),
     path('process/', ProcessPayrollView.as_view(), name='process-payroll'),
+    path('export/', PayrollExportView.as_view(), name='payroll-export'),
+    path('simulate/', LaborCostSimulationView.as_view(), name='payroll-simulate'),
+    path('runs/<int:pk>/', PayrollRunStatusView.as_view(), name='payroll-run-status'),
+    path('runs/<int:pk>/details/', PayrollRunDetailsView.as_view(), name='payroll-run-details'),
+    path('runs/<int:pk>/resume/', ResumePayrollRunView.as_view(), name='payroll-run-resume'),
+    path('runs/<int:pk>/refresh/', RefreshPayrollRunView.as_view(), name='payroll-run-refresh'),
 ]
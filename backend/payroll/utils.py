@@ -1,8 +1,15 @@
 # payroll/utils.py
+from decimal import Decimal
+
+
 def calculate_salary(employee_profile, worked_hours):
     """
     Calculate salary based on base_salary and worked hours.
     Adjust with overtime if worked_hours > standard (e.g., 40 hours).
+
+    Payroll runs use the vectorized calculate_salaries() in
+    payroll/calculator.py, which must give the same results (rounded to
+    cents); this per-employee version is kept as its reference.
     """
     # Let's assume base_salary is the pay for 40 hours a week.
     standard_hours = 40
@@ -14,7 +21,7 @@ def calculate_salary(employee_profile, worked_hours):
     else:
         # Overtime rate: 1.5x base rate
         overtime_hours = worked_hours - standard_hours
-        overtime_rate = (base_salary / standard_hours) * 1.5
+        overtime_rate = (base_salary / standard_hours) * Decimal("1.5")
         overtime_pay = overtime_hours * overtime_rate
         net_salary = base_salary + overtime_pay
 
@@ -1,49 +1,157 @@
 # payroll/views.py
 from rest_framework.views import APIView
 from rest_framework.response import Response
-from rest_framework import status
+from rest_framework import generics, permissions, status
+from django.db import transaction
+from django.db.models import Prefetch
 from .models import EmployeeProfile, PayrollRun, PayrollDetail
-from .serializers import EmployeeProfileSerializer, PayrollRunSerializer
-from .utils import calculate_salary
-import requests  # If you need to call the attendance API
+from .engine import refresh_payroll
+from .serializers import (
+    EmployeeProfileSerializer, LaborCostSimulationSerializer, PayrollPeriodSerializer, PayrollRunSerializer,
+    PayrollRunStatusSerializer,
+)
+from .simulation import DraftShift, simulate
+from .worker import enqueue
+from shiftwise_backend.exports import csv_response, parse_date_range
+
+# (header, field) columns of the CSV payroll export.
+PAYROLL_EXPORT_COLUMNS = (
+    ("payroll_run", "payroll_run_id"),
+    ("period_start", "payroll_run__start_date"),
+    ("period_end", "payroll_run__end_date"),
+    ("employee_email", "employee__user__email"),
+    ("employee_id_code", "employee__user__id_code"),
+    ("department", "employee__department__name"),
+    ("worked_hours", "worked_hours"),
+    ("base_salary", "base_salary"),
+    ("overtime_pay", "overtime_pay"),
+    ("deductions", "deductions"),
+    ("net_salary", "net_salary"),
+)
 
 class EmployeeListView(APIView):
     def get(self, request):
-        employees = EmployeeProfile.objects.all()
+        employees = EmployeeProfile.objects.select_related('department')
         serializer = EmployeeProfileSerializer(employees, many=True)
         return Response(serializer.data)
 
 class ProcessPayrollView(APIView):
+    """
+    Admin Endpoint:
+    Starts a payroll run for a period. Expects JSON {"start_date":
+    "YYYY-MM-DD", "end_date": "YYYY-MM-DD"}; worked hours come from the
+    attendance clocked in during the period (see payroll/engine.py).
+
+    The run is processed by the background worker: the response (202) is
+    the pending run, whose progress can be polled at runs/<id>/.
+    """
+    permission_classes = [permissions.IsAdminUser]
+
+    def post(self, request):
+        period = PayrollPeriodSerializer(data=request.data)
+        period.is_valid(raise_exception=True)
+
+        with transaction.atomic():
+            payroll_run = PayrollRun.objects.create(**period.validated_data)
+            enqueue(payroll_run.pk)
+        return Response(PayrollRunStatusSerializer(payroll_run).data, status=status.HTTP_202_ACCEPTED)
+
+class PayrollRunStatusView(generics.RetrieveAPIView):
+    """
+    Admin Endpoint:
+    A payroll run's status and progress, without its details.
+    """
+    queryset = PayrollRun.objects.all()
+    serializer_class = PayrollRunStatusSerializer
+    permission_classes = [permissions.IsAdminUser]
+
+class PayrollRunDetailsView(generics.RetrieveAPIView):
+    """
+    Admin Endpoint:
+    A payroll run with every employee's detail.
+    """
+    queryset = PayrollRun.objects.prefetch_related(
+        Prefetch('details', queryset=PayrollDetail.objects.select_related('employee__department'))
+    )
+    serializer_class = PayrollRunSerializer
+    permission_classes = [permissions.IsAdminUser]
+
+class ResumePayrollRunView(APIView):
+    """
+    Admin Endpoint:
+    Queues a failed run again. Processing continues after the last chunk
+    that was saved.
+    """
+    permission_classes = [permissions.IsAdminUser]
+
+    def post(self, request, pk):
+        payroll_run = generics.get_object_or_404(PayrollRun, pk=pk)
+        if payroll_run.status != PayrollRun.FAILED:
+            return Response({"detail": "Only failed runs can be resumed."}, status=status.HTTP_409_CONFLICT)
+        enqueue(payroll_run.pk)
+        return Response(PayrollRunStatusSerializer(payroll_run).data, status=status.HTTP_202_ACCEPTED)
+
+class RefreshPayrollRunView(APIView):
+    """
+    Admin Endpoint:
+    Recomputes a completed run for the employees whose attendance (or
+    salary) changed since it was processed, e.g. after a corrected
+    clock-out. Returns {"checked": n, "updated": n} and the run's status.
+    """
+    permission_classes = [permissions.IsAdminUser]
+
+    def post(self, request, pk):
+        with transaction.atomic():
+            payroll_run = generics.get_object_or_404(PayrollRun.objects.select_for_update(), pk=pk)
+            if payroll_run.status != PayrollRun.COMPLETED:
+                return Response({"detail": "Only completed runs can be refreshed."}, status=status.HTTP_409_CONFLICT)
+            result = refresh_payroll(payroll_run)
+        return Response(
+            {**result, "run": PayrollRunStatusSerializer(payroll_run).data}, status=status.HTTP_200_OK
+        )
+
+class LaborCostSimulationView(APIView):
+    """
+    Admin Endpoint:
+    Projects the hours, overtime and cost of a draft schedule with the
+    payroll rules, without creating a run (see payroll/simulation.py).
+    Expects JSON with draft shifts and/or saved shift ids:
+      {"shifts": [{"employee": <id>, "date": "YYYY-MM-DD", "start_time": "HH:MM",
+                   "end_time": "HH:MM", "location": "..."}, ...],
+       "shift_ids": [<id>, ...]}
+    Returns the totals, and the same per employee, location and department.
+    """
+    permission_classes = [permissions.IsAdminUser]
+
     def post(self, request):
-        # Get the payroll period dates from the request or define them
-        start_date = request.data.get("start_date")
-        end_date = request.data.get("end_date")
-
-        # Create a new PayrollRun record
-        payroll_run = PayrollRun.objects.create(start_date=start_date, end_date=end_date)
-
-        # Get all employees
-        employees = EmployeeProfile.objects.all()
-
-        # For each employee, fetch attendance data (example API call) and calculate salary
-        for emp in employees:
-            # Example: fetch attendance hours for this employee (you may need to authenticate and supply parameters)
-            # attendance_response = requests.get(f"http://127.0.0.1:8000/api/attendance/{emp.user.id}/?start_date={start_date}&end_date={end_date}")
-            # For demonstration, let's assume worked_hours is returned as a number
-            # worked_hours = attendance_response.json().get("worked_hours", 0)
-            worked_hours = 42  # For demo purposes, assume every employee worked 42 hours
-
-            calc = calculate_salary(emp, worked_hours)
-
-            PayrollDetail.objects.create(
-                payroll_run=payroll_run,
-                employee=emp,
-                worked_hours=worked_hours,
-                base_salary=calc["base_salary"],
-                overtime_pay=calc["overtime_pay"],
-                deductions=calc["deductions"],
-                net_salary=calc["net_salary"]
-            )
-
-        serializer = PayrollRunSerializer(payroll_run)
-        return Response(serializer.data, status=status.HTTP_201_CREATED)
+        serializer = LaborCostSimulationSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        drafts = [
+            DraftShift(shift['employee'], shift['date'], shift['start_time'], shift['end_time'], shift['location'])
+            for shift in serializer.validated_data['shifts']
+        ]
+        return Response(simulate(drafts, serializer.validated_data['shift_ids']), status=status.HTTP_200_OK)
+
+class PayrollExportView(APIView):
+    """
+    Admin Endpoint:
+    Stream payroll details as a CSV download, one row per employee per run.
+    Optional filters:
+      ?date_from / ?date_to  runs whose period overlaps this range (YYYY-MM-DD)
+      ?payroll_run=<id>      a single run
+    """
+    permission_classes = [permissions.IsAdminUser]
+
+    def get(self, request):
+        date_from, date_to = parse_date_range(request.query_params)
+        details = PayrollDetail.objects.order_by('payroll_run_id', 'id')
+        if date_from:
+            details = details.filter(payroll_run__end_date__gte=date_from)
+        if date_to:
+            details = details.filter(payroll_run__start_date__lte=date_to)
+        payroll_run = request.query_params.get('payroll_run')
+        if payroll_run:
+            if not payroll_run.isdigit():
+                return Response({"payroll_run": "Must be a payroll run id."}, status=status.HTTP_400_BAD_REQUEST)
+            details = details.filter(payroll_run_id=payroll_run)
+        return csv_response(details, PAYROLL_EXPORT_COLUMNS, "payroll.csv")
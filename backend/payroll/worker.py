@@ -0,0 +1,46 @@
+# payroll/worker.py
+"""
+In-process background worker for payroll runs.
+
+Runs are handed to a small thread pool once the transaction that created
+them commits, so no broker is needed and the request returns at once.
+A run interrupted by a restart stays pending or running in the database;
+`manage.py resume_payroll_runs` queues those again, and a failed run can
+be resumed through the API. Either way only the chunks that were not
+saved are computed again.
+"""
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import connection, transaction
+
+from .engine import run_payroll
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+
+
+def executor():
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=getattr(settings, "PAYROLL_WORKERS", 1), thread_name_prefix="payroll"
+        )
+    return _executor
+
+
+def run_in_background(run_id):
+    try:
+        run_payroll(run_id)
+    except Exception:
+        logger.exception("Payroll run %s failed.", run_id)
+    finally:
+        # Worker threads get their own database connection; do not leak it.
+        connection.close()
+
+
+def enqueue(run_id):
+    """Starts processing `run_id` in the background after the current transaction commits."""
+    transaction.on_commit(lambda: executor().submit(run_in_background, run_id))
@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class RolesConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'roles'
+
+    def ready(self):
+        # Register the rate cache invalidation receivers
+        from . import signals  # noqa: F401
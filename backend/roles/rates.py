@@ -0,0 +1,128 @@
+# roles/rates.py
+"""
+Effective-dated role pay rates.
+
+A role assignment applies from its assigned_at until the user's next
+assignment, so a user's assignments, oldest first, form a rate timeline.
+"Which role and rate applied to user U at time T" is a bisect on the
+timeline's start times: O(log n), without a query.
+
+RateTable loads the timelines of many users together: from the cache in
+one round trip, and for the users it misses from one query joining their
+assignments to the roles (the result is then cached). Timelines are
+cached per user, so a change only invalidates the timelines it affects
+(see roles/signals.py): an assignment its user's, a role those of the
+users who hold or held it. Bulk writes skip the signals; call
+invalidate() after them.
+
+The cache only saves queries: when it is unreachable the tables are read
+from the database.
+"""
+import logging
+from bisect import bisect_left, bisect_right
+from collections import namedtuple
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+from redis.exceptions import RedisError
+
+from .models import UserRoleAssignment
+
+logger = logging.getLogger(__name__)
+
+RoleRate = namedtuple("RoleRate", ["effective_from", "role_id", "name", "pay_per_hour"])
+
+
+def cache_key(user_id):
+    return f"role_rates:{user_id}"
+
+
+def cache_timeout():
+    return getattr(settings, "ROLE_RATE_CACHE_SECONDS", 3600)
+
+
+class RateTimeline:
+    """One user's RoleRates, oldest first."""
+
+    def __init__(self, rates=()):
+        self.rates = list(rates)
+        self.starts = [rate.effective_from for rate in self.rates]
+
+    def at(self, moment=None):
+        """The RoleRate in effect at `moment` (default: now), or None before the first assignment."""
+        index = bisect_right(self.starts, moment or timezone.now()) - 1
+        return self.rates[index] if index >= 0 else None
+
+    def between(self, start, end):
+        """The RoleRates in effect at some point of [start, end), oldest first."""
+        if not self.rates or self.starts[0] >= end:
+            return []
+        first = max(bisect_right(self.starts, start) - 1, 0)
+        return self.rates[first:bisect_left(self.starts, end)]
+
+
+EMPTY = RateTimeline()
+
+
+class RateTable:
+    """The rate timelines of `user_ids`, loaded together."""
+
+    def __init__(self, user_ids):
+        self.timelines = load_timelines(set(user_ids))
+
+    def timeline(self, user_id):
+        return self.timelines.get(user_id, EMPTY)
+
+    def at(self, user_id, moment=None):
+        return self.timeline(user_id).at(moment)
+
+
+def load_timelines(user_ids):
+    """{user_id: RateTimeline} for `user_ids`, from the cache or one query."""
+    keys = {cache_key(user_id): user_id for user_id in user_ids}
+    try:
+        cached = cache.get_many(list(keys)) if keys else {}
+    except RedisError as exc:
+        # Nothing is lost without the cache, so this is not worth a warning.
+        logger.info("Role rate cache unavailable (%s); reading the database.", exc)
+        cached = None
+
+    rows = {keys[key]: value for key, value in (cached or {}).items()}
+    missing = [user_id for user_id in user_ids if user_id not in rows]
+    if missing:
+        found = {user_id: [] for user_id in missing}
+        assignments = (
+            UserRoleAssignment.objects.filter(user_id__in=missing)
+            .order_by("user_id", "assigned_at", "id")
+            .values_list("user_id", "assigned_at", "role_id", "role__name", "role__pay_per_hour")
+        )
+        for user_id, *rate in assignments:
+            found[user_id].append(tuple(rate))
+        rows.update(found)
+        if cached is not None:
+            try:
+                cache.set_many({cache_key(user_id): value for user_id, value in found.items()}, cache_timeout())
+            except RedisError as exc:
+                logger.info("Role rate cache unavailable (%s); not caching.", exc)
+
+    return {
+        user_id: RateTimeline(RoleRate(*rate) for rate in value)
+        for user_id, value in rows.items() if value
+    }
+
+
+def invalidate(user_ids):
+    """Drops the cached timelines of `user_ids` once the current transaction commits."""
+    keys = [cache_key(user_id) for user_id in set(user_ids)]
+    if not keys:
+        return
+
+    def drop():
+        try:
+            cache.delete_many(keys)
+        except RedisError as exc:
+            logger.warning("Could not invalidate cached role rates (%s); they expire within %ss.", exc, cache_timeout())
+
+    transaction.on_commit(drop)
@@ -0,0 +1,19 @@
+# roles/signals.py
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import Role, UserRoleAssignment
+from .rates import invalidate
+
+
+@receiver([post_save, post_delete], sender=UserRoleAssignment)
+def assignment_changed(sender, instance, **kwargs):
+    invalidate([instance.user_id])
+
+
+@receiver([post_save, post_delete], sender=Role)
+def role_changed(sender, instance, created=False, **kwargs):
+    # A new role has no holders yet; a deleted one's assignments were deleted (and invalidated) first.
+    if created or kwargs["signal"] is post_delete:
+        return
+    invalidate(UserRoleAssignment.objects.filter(role_id=instance.pk).values_list("user_id", flat=True).distinct())
@@ -1,3 +1,91 @@
-from django.test import TestCase
+from datetime import datetime, timedelta
+from decimal import Decimal
 
-# Create your tests here.
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from shiftwise_backend.testing import api_client, make_admin, make_users
+from .models import Role, UserRoleAssignment
+from .rates import RateTable, RateTimeline, RoleRate
+
+LOCAL_CACHE = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+
+
+def at(day, hour=0):
+    return timezone.make_aware(datetime(2025, 1, day, hour))
+
+
+class RateTimelineTests(TestCase):
+    def test_rate_in_effect_at_a_time(self):
+        timeline = RateTimeline([
+            RoleRate(at(1), 1, "Cashier", Decimal("18.00")),
+            RoleRate(at(10), 2, "Lead", Decimal("22.00")),
+            RoleRate(at(10), 3, "Manager", Decimal("30.00")),
+        ])
+        self.assertIsNone(timeline.at(at(1) - timedelta(seconds=1)))
+        self.assertEqual(timeline.at(at(1)).name, "Cashier")
+        self.assertEqual(timeline.at(at(9, 23)).name, "Cashier")
+        # Of two assignments at the same time, the later one wins.
+        self.assertEqual(timeline.at(at(10)).name, "Manager")
+
+        self.assertEqual([rate.role_id for rate in timeline.between(at(2), at(9))], [1])
+        self.assertEqual([rate.role_id for rate in timeline.between(at(2), at(10))], [1])
+        self.assertEqual([rate.role_id for rate in timeline.between(at(2), at(11))], [1, 2, 3])
+        self.assertEqual(timeline.between(at(1) - timedelta(days=5), at(1)), [])
+        self.assertEqual(RateTimeline().at(at(5)), None)
+
+
+@override_settings(CACHES=LOCAL_CACHE)
+class RateTableTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.cashier = Role.objects.create(name="Cashier", pay_per_hour=Decimal("18.00"))
+        self.lead = Role.objects.create(name="Lead", pay_per_hour=Decimal("22.00"))
+        self.users = make_users(3)
+        for user, role in zip(self.users, (self.cashier, self.cashier, self.lead)):
+            UserRoleAssignment.objects.create(user=user, role=role)
+
+    def load(self):
+        return RateTable(user.id for user in self.users)
+
+    def test_loads_once_then_serves_from_the_cache(self):
+        with self.assertNumQueries(1):
+            table = self.load()
+        with self.assertNumQueries(0):
+            self.assertEqual(self.load().at(self.users[2].id).pay_per_hour, Decimal("22.00"))
+        self.assertEqual(table.at(self.users[0].id).name, "Cashier")
+        self.assertIsNone(table.at(self.users[0].id, at(1)))
+        newcomer = make_users(1, prefix="new")[0]
+        self.assertIsNone(RateTable([newcomer.id]).at(newcomer.id))
+
+    def test_changes_only_invalidate_the_affected_users(self):
+        self.load()
+        with self.captureOnCommitCallbacks(execute=True):
+            UserRoleAssignment.objects.create(user=self.users[0], role=self.lead)
+        with self.assertNumQueries(1):
+            self.assertEqual(self.load().at(self.users[0].id).name, "Lead")
+        self.assertEqual(len(cache.get_many([f"role_rates:{user.id}" for user in self.users])), 3)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.cashier.pay_per_hour = Decimal("19.00")
+            self.cashier.save()
+        # Dropped for everyone who holds or held the role (users[0] did), but not users[2].
+        self.assertEqual(
+            set(cache.get_many([f"role_rates:{user.id}" for user in self.users])),
+            {f"role_rates:{self.users[2].id}"},
+        )
+        table = self.load()
+        self.assertEqual(table.at(self.users[1].id).pay_per_hour, Decimal("19.00"))
+        self.assertEqual(table.timeline(self.users[0].id).rates[0].pay_per_hour, Decimal("19.00"))
+
+    def test_user_list_resolves_roles_without_a_query_per_user(self):
+        admin = make_admin()
+        client = api_client(admin)
+        client.get("/api/users/admin/users/")
+        # Every timeline is cached now, so listing only reads the users.
+        with self.assertNumQueries(1):
+            response = client.get("/api/users/admin/users/")
+        roles = {user["id"]: user["assigned_role"] for user in response.data}
+        self.assertEqual(roles[self.users[2].id], {"name": "Lead", "pay_per_hour": "22.00"})
+        self.assertIsNone(roles[admin.id])
@@ -0,0 +1,16 @@
+# roles/utils.py
+from .models import UserRoleAssignment
+
+
+def current_role_by_user(user_ids=None):
+    """
+    Returns {user_id: role_id} using each user's most recent role
+    assignment, in one query. Limit to `user_ids` when given.
+    """
+    assignments = UserRoleAssignment.objects.order_by("user_id", "-assigned_at")
+    if user_ids is not None:
+        assignments = assignments.filter(user_id__in=user_ids)
+    roles = {}
+    for user_id, role_id in assignments.values_list("user_id", "role_id"):
+        roles.setdefault(user_id, role_id)
+    return roles
@@ -1,22 +1,56 @@
-from rest_framework import generics, permissions, status
+import io
+import tempfile
+from copy import copy
+
+from rest_framework import generics, permissions, serializers, status
 from rest_framework.response import Response
 from rest_framework.decorators import api_view, permission_classes
+
 from django.contrib.auth import get_user_model
-from .models import Shift
-from .serializers import ShiftSerializer
+from django.core.files import File
+from django.http import FileResponse
+from django.shortcuts import get_object_or_404
+from django.urls import reverse
+from .models import Shift, ShiftImport, ShiftTemplate
+from .serializers import ShiftSerializer, ShiftTemplateSerializer
+from .recurrence import clear_future_shifts, materialize, regenerate
+from .scheduler import DemandSerializer, generate_schedule
+from .coverage import CoverageQuerySerializer, location_coverage
+from .bulk import MAX_BULK_ROWS, build_shifts, drop_conflicting, save_shifts
+from .importer import InvalidHeaderError, import_shifts
+from .filters import ShiftFilterBackend
+from .pagination import ShiftCursorPagination
+from shiftwise_backend.exports import csv_response
 
 User = get_user_model()
 
+# (header, field) columns of the CSV shift export.
+SHIFT_EXPORT_COLUMNS = (
+    ("id", "id"),
+    ("date", "date"),
+    ("start_time", "start_time"),
+    ("end_time", "end_time"),
+    ("employee_email", "employee__email"),
+    ("employee_id_code", "employee__id_code"),
+    ("location", "location"),
+    ("status", "status"),
+    ("template", "template_id"),
+)
+
 class ShiftListCreateView(generics.ListCreateAPIView):
     """
     Admin Endpoint:
-    - GET: List all shifts.
+    - GET: List all shifts, ordered by (date, start_time, id).
+           Supports ?date_from, ?date_to, ?location, ?status filters and
+           cursor pagination via ?page_size / ?cursor.
     - POST: Create a new shift.
     Only admin users (is_staff=True) can access this endpoint.
     """
-    queryset = Shift.objects.all()
+    queryset = Shift.objects.select_related('employee').order_by('date', 'start_time', 'id')
     serializer_class = ShiftSerializer
     permission_classes = [permissions.IsAdminUser]
+    filter_backends = [ShiftFilterBackend]
+    pagination_class = ShiftCursorPagination
 
     def get_serializer_context(self):
         context = super().get_serializer_context()
@@ -31,7 +65,7 @@ class ShiftDetailView(generics.RetrieveUpdateDestroyAPIView):
     - DELETE: Delete a shift.
     Only admin users (is_staff=True) can perform these actions.
     """
-    queryset = Shift.objects.all()
+    queryset = Shift.objects.select_related('employee')
     serializer_class = ShiftSerializer
     permission_classes = [permissions.IsAdminUser]
 
@@ -76,12 +110,270 @@ def create_shift_with_user(request):
         return Response(serializer.data, status=status.HTTP_201_CREATED)
     return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
+@api_view(['POST'])
+@permission_classes([permissions.IsAdminUser])
+def bulk_create_shifts(request):
+    """
+    Admin Endpoint:
+    Create many shifts in one request.
+
+    Expects JSON:
+      {
+        "shifts": [
+          {"email": "...", "date": "YYYY-MM-DD", "start_time": "HH:MM", "end_time": "HH:MM",
+           "location": "...", "status": "pending"},
+          ...
+        ]
+      }
+
+    All employees are resolved with a single query and the valid rows are
+    inserted together in one transaction. Invalid rows are reported per
+    row (by index) and do not prevent the valid rows from being created.
+    """
+    rows = request.data.get("shifts")
+    if not isinstance(rows, list) or not rows:
+        return Response({"error": "A non-empty 'shifts' list is required."}, status=status.HTTP_400_BAD_REQUEST)
+    if len(rows) > MAX_BULK_ROWS:
+        return Response(
+            {"error": f"At most {MAX_BULK_ROWS} shifts can be created per request."},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+
+    shifts, errors = build_shifts(rows)
+    created = save_shifts([shift for _, shift in shifts]) if shifts else []
+
+    return Response(
+        {
+            "created": ShiftSerializer(created, many=True).data,
+            "errors": errors,
+        },
+        status=status.HTTP_201_CREATED if created else status.HTTP_400_BAD_REQUEST
+    )
+
+@api_view(['POST'])
+@permission_classes([permissions.IsAdminUser])
+def import_shifts_csv(request):
+    """
+    Admin Endpoint:
+    Import shifts from a CSV upload (multipart field "file").
+
+    Columns: email and/or id_code, date, start_time, end_time, location,
+    and optionally status. An optional "batch_size" form field overrides
+    SHIFT_IMPORT_BATCH_SIZE.
+
+    The file is streamed and processed in batches, so large files are
+    imported with flat memory use. Valid rows are created even when others
+    are rejected; the rejected rows can be downloaded as a CSV error report
+    from the returned "error_report" URL. If the file cannot be decoded
+    past its header, the import stops there: it is still recorded, and
+    "error" says which line it stopped at.
+    """
+    upload = request.FILES.get("file")
+    if upload is None:
+        return Response({"error": "A CSV 'file' upload is required."}, status=status.HTTP_400_BAD_REQUEST)
+
+    batch_size = request.data.get("batch_size")
+    if batch_size:
+        try:
+            batch_size = int(batch_size)
+        except (TypeError, ValueError):
+            batch_size = 0
+        if batch_size < 1:
+            return Response({"error": "batch_size must be a positive integer."}, status=status.HTTP_400_BAD_REQUEST)
+
+    shift_import = ShiftImport(uploaded_by=request.user, file_name=upload.name)
+    with tempfile.TemporaryFile() as report:
+        report_text = io.TextIOWrapper(report, encoding="utf-8", newline="")
+        try:
+            totals = import_shifts(io.TextIOWrapper(upload, encoding="utf-8-sig", newline=""), report_text, batch_size)
+        except InvalidHeaderError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        report_text.flush()
+        report_text.detach()
+
+        shift_import.total_rows = totals["rows"]
+        shift_import.created_count = totals["created"]
+        shift_import.rejected_count = totals["rejected"]
+        shift_import.save()
+        if totals["rejected"]:
+            report.seek(0)
+            shift_import.error_report.save(f"shift-import-{shift_import.id}-errors.csv", File(report))
+
+    error_report = None
+    if shift_import.error_report:
+        error_report = request.build_absolute_uri(reverse("shift_import_errors", args=[shift_import.id]))
+    return Response(
+        {"id": shift_import.id, **totals, "error_report": error_report},
+        status=status.HTTP_201_CREATED if totals["created"] else status.HTTP_400_BAD_REQUEST
+    )
+
+@api_view(['GET'])
+@permission_classes([permissions.IsAdminUser])
+def shift_import_errors(request, pk):
+    """
+    Admin Endpoint:
+    Download the CSV error report of a shift import.
+    """
+    shift_import = get_object_or_404(ShiftImport, pk=pk)
+    if not shift_import.error_report:
+        return Response({"error": "This import has no rejected rows."}, status=status.HTTP_404_NOT_FOUND)
+    return FileResponse(
+        shift_import.error_report.open("rb"),
+        as_attachment=True,
+        filename=f"shift-import-{shift_import.id}-errors.csv",
+        content_type="text/csv",
+    )
+
+@api_view(['GET'])
+@permission_classes([permissions.IsAdminUser])
+def export_shifts_csv(request):
+    """
+    Admin Endpoint:
+    Stream shifts as a CSV download, ordered by (date, start_time, id).
+    Accepts the same ?date_from, ?date_to, ?location and ?status filters
+    as the shift list.
+    """
+    shifts = ShiftFilterBackend().filter_queryset(
+        request, Shift.objects.order_by('date', 'start_time', 'id'), None
+    )
+    return csv_response(shifts, SHIFT_EXPORT_COLUMNS, "shifts.csv")
+
 class AdminManageShiftsView(generics.ListAPIView):
     """
     Admin Endpoint:
     A custom view for managing shifts if additional logic is needed.
+    Supports the same filters and cursor pagination as ShiftListCreateView.
     Only admin users (is_staff=True) can access this endpoint.
     """
-    queryset = Shift.objects.all()
+    queryset = Shift.objects.select_related('employee').order_by('date', 'start_time', 'id')
     serializer_class = ShiftSerializer
     permission_classes = [permissions.IsAdminUser]
+    filter_backends = [ShiftFilterBackend]
+    pagination_class = ShiftCursorPagination
+
+
+class ShiftTemplateListCreateView(generics.ListCreateAPIView):
+    """
+    Admin Endpoint:
+    - GET: List recurring shift templates.
+    - POST: Create a template. Its shifts are generated right away for the
+            rolling horizon (SHIFT_TEMPLATE_HORIZON_WEEKS).
+    """
+    queryset = ShiftTemplate.objects.select_related('employee', 'role').order_by('weekday', 'start_time', 'id')
+    serializer_class = ShiftTemplateSerializer
+    permission_classes = [permissions.IsAdminUser]
+
+    def perform_create(self, serializer):
+        template = serializer.save()
+        materialize([template])
+
+
+class ShiftTemplateDetailView(generics.RetrieveUpdateDestroyAPIView):
+    """
+    Admin Endpoint:
+    - GET: Retrieve a template.
+    - PUT/PATCH: Update a template. If the schedule changes, its future
+                 shifts (after today) are updated, added or deleted to
+                 match. Shifts that were edited or are referenced (e.g. by
+                 attendance or a swap request) are kept as they are.
+    - DELETE: Delete a template together with its untouched future shifts.
+    """
+    queryset = ShiftTemplate.objects.select_related('employee', 'role')
+    serializer_class = ShiftTemplateSerializer
+    permission_classes = [permissions.IsAdminUser]
+
+    def perform_update(self, serializer):
+        previous = copy(serializer.instance)
+        template = serializer.save()
+        if any(getattr(template, field) != getattr(previous, field) for field in ShiftTemplate.SCHEDULE_FIELDS):
+            regenerate(template, previous)
+
+    def perform_destroy(self, instance):
+        clear_future_shifts(instance)
+        instance.delete()
+
+
+@api_view(['POST'])
+@permission_classes([permissions.IsAdminUser])
+def materialize_shift_templates(request):
+    """
+    Admin Endpoint:
+    Extend every active template's shifts up to the rolling horizon.
+    Only days that have not been generated yet are inserted.
+    """
+    result = materialize()
+    return Response(result, status=status.HTTP_200_OK)
+
+
+@api_view(['POST'])
+@permission_classes([permissions.IsAdminUser])
+def generate_schedule_view(request):
+    """
+    Admin Endpoint:
+    Propose a roster that fills staffing demand at the lowest labour cost.
+
+    Expects JSON:
+      {
+        "demand": [
+          {"date": "YYYY-MM-DD", "start_time": "HH:MM", "end_time": "HH:MM",
+           "location": "...", "role": <role_id or null>, "headcount": 2},
+          ...
+        ],
+        "employees": [<user_id>, ...],   # optional, defaults to all active employees
+        "commit": false                  # true saves the proposed shifts
+      }
+    """
+    demand = DemandSerializer(data=request.data.get("demand"), many=True)
+    if not demand.is_valid():
+        return Response({"demand": demand.errors}, status=status.HTTP_400_BAD_REQUEST)
+    try:
+        employee_ids = serializers.ListField(child=serializers.IntegerField(), allow_null=True).run_validation(
+            request.data.get("employees")
+        )
+    except serializers.ValidationError as exc:
+        return Response({"employees": exc.detail}, status=status.HTTP_400_BAD_REQUEST)
+
+    result = generate_schedule(demand.validated_data, employee_ids)
+    assignments = result["assignments"]
+
+    created = []
+    if request.data.get("commit"):
+        accepted, _ = drop_conflicting([(i, assignment["shift"]) for i, assignment in enumerate(assignments)])
+        created = save_shifts([shift for _, shift in accepted])
+
+    for assignment in assignments:
+        del assignment["shift"]
+    return Response(
+        {
+            "assignments": assignments,
+            "unfilled": result["unfilled"],
+            "total_cost": result["total_cost"],
+            "created": len(created),
+        },
+        status=status.HTTP_201_CREATED if created else status.HTTP_200_OK
+    )
+
+@api_view(['GET'])
+@permission_classes([permissions.IsAdminUser])
+def location_coverage_view(request):
+    """
+    Admin Endpoint:
+    Staffing headcount per location in 15-minute buckets.
+
+    Query parameters:
+      ?date_from=YYYY-MM-DD&date_to=YYYY-MM-DD  required, inclusive, at most 62 days
+      ?location=<name>                          optional, repeatable
+      ?target=<n>                               optional minimum headcount; reports gaps below it
+      ?open=HH:MM&close=HH:MM                   optional daily hours that gaps are checked within
+
+    Returns {"start", "end", "bucket_minutes", "locations", "headcount", "gaps"},
+    where headcount has one row of bucket counts per location.
+    """
+    params = CoverageQuerySerializer(data=request.query_params)
+    if not params.is_valid():
+        return Response(params.errors, status=status.HTTP_400_BAD_REQUEST)
+    data = params.validated_data
+    return Response(location_coverage(
+        data["date_from"], data["date_to"], data.get("location"),
+        data.get("target"), data.get("open"), data.get("close"),
+    ))
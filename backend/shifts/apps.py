@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class ShiftsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'shifts'
+
+    def ready(self):
+        # Register the shift notification receivers
+        from . import signals  # noqa: F401
@@ -0,0 +1,128 @@
+# shifts/bulk.py
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from rest_framework import serializers
+
+from notifications.models import Notification
+from .conflicts import find_conflicts
+from .models import Shift
+from .signals import build_shift_notification
+
+User = get_user_model()
+
+# Upper bound on how many rows a single bulk request may carry.
+MAX_BULK_ROWS = 5000
+
+
+class BulkShiftRowSerializer(serializers.Serializer):
+    """
+    Validates one row of a bulk shift upload.
+    The employee is referenced by email and resolved separately, so that
+    validating a row never hits the database.
+    """
+    email = serializers.EmailField()
+    date = serializers.DateField()
+    start_time = serializers.TimeField()
+    end_time = serializers.TimeField()
+    location = serializers.CharField(max_length=100)
+    status = serializers.ChoiceField(choices=Shift.STATUS_CHOICES, default='pending')
+
+
+def resolve_employees(emails):
+    """
+    Returns a dict mapping email -> User for every email that exists,
+    using a single query.
+    """
+    return {user.email: user for user in User.objects.filter(email__in=set(emails))}
+
+
+def build_shifts(rows, find_employee=None, first_row=0, row_serializer=BulkShiftRowSerializer):
+    """
+    Validates a list of raw shift rows and builds unsaved Shift instances.
+    Rows that conflict with existing shifts, approved leave or an earlier
+    row of the same batch are rejected.
+
+    `find_employee` maps a validated row to its User (or None); by default
+    employees are looked up by email with one query. Rows are numbered from
+    `first_row`, so a large upload can be processed in chunks.
+
+    Returns (shifts, errors) where `shifts` is a list of (row_index, Shift)
+    and `errors` is a list of {"row": index, "errors": {...}}.
+    """
+    shifts = []
+    errors = []
+    validated = []
+
+    # One serializer validates every row: building its fields is far more
+    # expensive than validating a row, so it is not repeated per row.
+    serializer = row_serializer()
+    for index, row in enumerate(rows, first_row):
+        try:
+            validated.append((index, serializer.run_validation(row)))
+        except serializers.ValidationError as exc:
+            errors.append({"row": index, "errors": exc.detail})
+
+    if find_employee is None:
+        users = resolve_employees(data["email"] for _, data in validated)
+        find_employee = lambda data: users.get(data["email"])
+    seen = set()
+
+    for index, data in validated:
+        user = find_employee(data)
+        if user is None:
+            errors.append({"row": index, "errors": {"email": ["User not found. Please sign up first."]}})
+            continue
+
+        # Reject the same employee being booked twice for the same slot within one batch.
+        key = (user.id, data["date"], data["start_time"])
+        if key in seen:
+            errors.append({"row": index, "errors": {"non_field_errors": ["Duplicate shift in this batch."]}})
+            continue
+        seen.add(key)
+
+        shifts.append((index, Shift(
+            employee=user,
+            date=data["date"],
+            start_time=data["start_time"],
+            end_time=data["end_time"],
+            location=data["location"],
+            status=data["status"],
+        )))
+
+    shifts, conflict_errors = drop_conflicting(shifts)
+    errors.extend(conflict_errors)
+
+    errors.sort(key=lambda error: error["row"])
+    return shifts, errors
+
+
+def drop_conflicting(shifts):
+    """
+    Runs the conflict engine over a list of (row_index, Shift) in one pass.
+    Returns (accepted, errors); when two rows clash, the later row is rejected.
+    """
+    candidates = []
+    for index, shift in shifts:
+        if shift.status == 'cancelled':
+            continue
+        shift.sync_span()
+        candidates.append((index, shift.employee_id, shift.start_at, shift.end_at))
+
+    conflicts = find_conflicts(candidates)
+    accepted = [(index, shift) for index, shift in shifts if index not in conflicts]
+    errors = [{"row": index, "errors": {"conflicts": found}} for index, found in conflicts.items()]
+    return accepted, errors
+
+
+def save_shifts(shifts):
+    """
+    Inserts the given unsaved Shift instances and their notifications
+    in one transaction. bulk_create() bypasses post_save, so the
+    notifications are created here as a batch instead.
+    """
+    for shift in shifts:
+        shift.sync_span()
+    with transaction.atomic():
+        created = Shift.objects.bulk_create(shifts)
+        Notification.objects.bulk_create([build_shift_notification(shift) for shift in created])
+    return created
@@ -0,0 +1,174 @@
+# shifts/conflicts.py
+"""
+Per-employee shift conflict detection.
+
+For the employees touched by a set of candidate shifts, every existing
+(non-cancelled) shift and approved leave in the surrounding window is
+loaded in one query each. Each employee's intervals are then sorted and
+swept once, so checking a whole batch costs O(n log n) rather than one
+query per shift.
+
+A candidate conflicts when it
+  - overlaps another shift of the same employee ("overlap"),
+  - starts or ends less than SHIFT_MIN_REST_HOURS from another shift ("rest"),
+  - overlaps an approved leave request ("leave").
+"""
+import heapq
+from collections import defaultdict, namedtuple
+from datetime import timedelta
+
+from django.conf import settings
+
+from employee_leaves.models import LeaveRequest
+from .models import Shift, shift_span
+
+SHIFT = "shift"
+LEAVE = "leave"
+
+# `key` identifies a candidate (e.g. its row index); it is None for rows loaded from the database.
+# `ref` is the database id of an existing shift or leave request.
+Interval = namedtuple("Interval", ["start", "end", "kind", "key", "ref"])
+
+
+def leave_span(shift_date, shift_time):
+    """Returns the aware (start, end) datetimes covered by a leave request."""
+    start_time, end_time = LeaveRequest.SHIFT_TIME_WINDOWS[shift_time]
+    return shift_span(shift_date, start_time, end_time)
+
+
+def min_rest():
+    return timedelta(hours=getattr(settings, "SHIFT_MIN_REST_HOURS", 0))
+
+
+def load_intervals(employee_ids, window_start, window_end, exclude_shift_ids=()):
+    """
+    Returns {employee_id: [Interval, ...]} with every non-cancelled shift and
+    approved leave of the given employees that touches [window_start, window_end).
+    Runs exactly two queries.
+    """
+    intervals = defaultdict(list)
+
+    shifts = (
+        Shift.objects.overlapping(window_start, window_end)
+        .filter(employee_id__in=employee_ids)
+        .exclude(status="cancelled")
+        .exclude(id__in=exclude_shift_ids)
+        .values_list("id", "employee_id", "start_at", "end_at")
+    )
+    for shift_id, employee_id, start_at, end_at in shifts:
+        intervals[employee_id].append(Interval(start_at, end_at, SHIFT, None, shift_id))
+
+    # Leave windows are at most a day long, so pad the date range by one day.
+    leaves = LeaveRequest.objects.filter(
+        employee_id__in=employee_ids,
+        status="approved",
+        shift_date__gte=window_start.date() - timedelta(days=1),
+        shift_date__lte=window_end.date(),
+    ).values_list("id", "employee_id", "shift_date", "shift_time")
+    for leave_id, employee_id, shift_date, shift_time in leaves:
+        start, end = leave_span(shift_date, shift_time)
+        if start < window_end and end > window_start:
+            intervals[employee_id].append(Interval(start, end, LEAVE, None, leave_id))
+
+    return intervals
+
+
+def _describe(candidate, other, rest):
+    """Builds the conflict entry reported for `candidate` against `other`."""
+    if other.kind == LEAVE:
+        return {"type": "leave", "leave": other.ref,
+                "message": f"Overlaps approved leave from {other.start:%Y-%m-%d %H:%M} to {other.end:%Y-%m-%d %H:%M}."}
+    conflict_type = "overlap" if candidate.start < other.end and other.start < candidate.end else "rest"
+    entry = {"type": conflict_type}
+    if other.ref is not None:
+        entry["shift"] = other.ref
+    else:
+        entry["row"] = other.key
+    if conflict_type == "overlap":
+        entry["message"] = f"Overlaps another shift from {other.start:%Y-%m-%d %H:%M} to {other.end:%Y-%m-%d %H:%M}."
+    else:
+        entry["message"] = (
+            f"Less than {rest.total_seconds() / 3600:g} hours of rest next to the shift "
+            f"from {other.start:%Y-%m-%d %H:%M} to {other.end:%Y-%m-%d %H:%M}."
+        )
+    return entry
+
+
+def sweep(intervals, rest):
+    """
+    Finds every conflicting pair among one employee's intervals in a single
+    pass over them sorted by start time.
+
+    Yields (earlier, later) pairs where at least one side is a candidate.
+    Shifts stay "active" until their end plus the rest gap; leaves until
+    their end. Anything that has expired by the time the next interval
+    starts is popped from its heap and never looked at again.
+    """
+    active_shifts = []  # heap of (end + rest, seq, Interval)
+    active_leaves = []  # heap of (end, seq, Interval)
+
+    for seq, current in enumerate(sorted(intervals, key=lambda interval: (interval.start, interval.end))):
+        while active_shifts and active_shifts[0][0] <= current.start:
+            heapq.heappop(active_shifts)
+        while active_leaves and active_leaves[0][0] <= current.start:
+            heapq.heappop(active_leaves)
+
+        for _, _, earlier in active_shifts:
+            if earlier.key is None and current.key is None:
+                continue
+            if current.kind == SHIFT or earlier.end > current.start:
+                # Shift/shift pairs also conflict on the rest gap; shift/leave only on overlap.
+                yield earlier, current
+
+        if current.kind == SHIFT:
+            for _, _, earlier in active_leaves:
+                if earlier.key is None and current.key is None:
+                    continue
+                yield earlier, current
+            heapq.heappush(active_shifts, (current.end + rest, seq, current))
+        else:
+            heapq.heappush(active_leaves, (current.end, seq, current))
+
+
+def find_conflicts(candidates, exclude_shift_ids=(), rest=None):
+    """
+    Checks candidate shifts against each other and against the database.
+
+    `candidates` is a list of (key, employee_id, start_at, end_at). Keys must
+    be orderable; when two candidates conflict, the conflict is reported on
+    the later key so the earlier one can still be accepted.
+
+    Returns {key: [conflict, ...]} for the conflicting candidates only.
+    """
+    if not candidates:
+        return {}
+    rest = min_rest() if rest is None else rest
+
+    window_start = min(start for _, _, start, _ in candidates) - rest
+    window_end = max(end for _, _, _, end in candidates) + rest
+    employee_ids = {employee_id for _, employee_id, _, _ in candidates}
+    intervals = load_intervals(employee_ids, window_start, window_end, exclude_shift_ids)
+
+    for key, employee_id, start_at, end_at in candidates:
+        intervals[employee_id].append(Interval(start_at, end_at, SHIFT, key, None))
+
+    return detect_conflicts(intervals, rest)
+
+
+def detect_conflicts(intervals, rest):
+    """
+    In-memory half of find_conflicts(): sweeps {employee_id: [Interval]}
+    and returns {key: [conflict, ...]}.
+    """
+    conflicts = defaultdict(list)
+    for employee_intervals in intervals.values():
+        for earlier, later in sweep(employee_intervals, rest):
+            if earlier.key is None:
+                conflicts[later.key].append(_describe(later, earlier, rest))
+            elif later.key is None:
+                conflicts[earlier.key].append(_describe(earlier, later, rest))
+            elif earlier.key < later.key:
+                conflicts[later.key].append(_describe(later, earlier, rest))
+            else:
+                conflicts[earlier.key].append(_describe(earlier, later, rest))
+    return dict(conflicts)
@@ -0,0 +1,156 @@
+# shifts/coverage.py
+"""
+Staffing coverage per location in 15-minute buckets.
+
+Only (location, start_at, end_at) is loaded for the shifts in the range,
+grouped in the database with a count, since most shifts of a schedule
+share the same blocks. Each group adds its count at its first bucket and
+subtracts it after its last one in a difference array (locations x
+buckets); a cumulative sum along the time axis then gives the headcount
+of every bucket at once, so the cost does not depend on how long the
+shifts are.
+
+A shift counts towards a bucket only when it covers the whole bucket,
+so a bucket that is staffed for part of its 15 minutes shows up as a gap
+rather than hiding one.
+"""
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+import numpy as np
+from django.db.models import Count
+from django.utils import timezone
+from rest_framework import serializers
+
+from .models import Shift
+
+BUCKET_MINUTES = 15
+# Longest range a single coverage request may span.
+MAX_COVERAGE_DAYS = 62
+
+
+class CoverageQuerySerializer(serializers.Serializer):
+    """Query parameters of the coverage endpoint."""
+    date_from = serializers.DateField()
+    date_to = serializers.DateField()
+    location = serializers.ListField(child=serializers.CharField(max_length=100), required=False)
+    # Minimum headcount wanted in every bucket; gaps are only reported when given.
+    target = serializers.IntegerField(min_value=1, required=False)
+    # Daily opening hours that gap detection is limited to (the whole day by default).
+    open = serializers.TimeField(required=False)
+    close = serializers.TimeField(required=False)
+
+    def validate(self, attrs):
+        if attrs["date_to"] < attrs["date_from"]:
+            raise serializers.ValidationError({"date_to": "date_to must not be before date_from."})
+        if (attrs["date_to"] - attrs["date_from"]).days >= MAX_COVERAGE_DAYS:
+            raise serializers.ValidationError({"date_to": f"At most {MAX_COVERAGE_DAYS} days can be requested."})
+        if ("open" in attrs) != ("close" in attrs):
+            raise serializers.ValidationError({"open": "open and close must be given together."})
+        return attrs
+
+
+def coverage_matrix(location_index, starts, ends, n_locations, n_buckets, window_start, bucket_seconds, staff=None):
+    """
+    Pure NumPy core: builds the (n_locations, n_buckets) headcount matrix
+    from int arrays of location index and epoch start/end seconds. `staff`
+    optionally gives the number of shifts behind each entry (default 1).
+    """
+    if staff is None:
+        staff = np.ones(len(location_index), dtype=np.int32)
+    first = -(-(starts - window_start) // bucket_seconds)  # first bucket starting at or after the start
+    last = (ends - window_start) // bucket_seconds        # first bucket not fully covered
+    first = np.clip(first, 0, n_buckets)
+    last = np.clip(last, 0, n_buckets)
+    keep = first < last
+
+    diff = np.zeros((n_locations, n_buckets + 1), dtype=np.int32)
+    np.add.at(diff, (location_index[keep], first[keep]), staff[keep])
+    np.add.at(diff, (location_index[keep], last[keep]), -staff[keep])
+    return np.cumsum(diff, axis=1)[:, :n_buckets]
+
+
+def find_gaps(headcount, target, mask=None):
+    """
+    Returns (location_index, first_bucket, end_bucket) arrays for every run
+    of consecutive buckets below `target`, restricted to `mask` when given.
+    """
+    short = headcount < target
+    if mask is not None:
+        short &= mask[None, :]
+    edges = np.diff(np.pad(short.astype(np.int8), ((0, 0), (1, 1))), axis=1)
+    # np.nonzero walks row by row, so run starts and ends pair up in order.
+    locations, firsts = np.nonzero(edges == 1)
+    _, ends = np.nonzero(edges == -1)
+    return locations, firsts, ends
+
+
+def opening_mask(bucket_starts, open_time, close_time):
+    """Boolean array marking the buckets that start within daily opening hours."""
+    times = [timezone.localtime(moment).time() for moment in bucket_starts]
+    if open_time <= close_time:
+        return np.array([open_time <= t < close_time for t in times], dtype=bool)
+    # Overnight opening hours, e.g. 18:00-02:00.
+    return np.array([t >= open_time or t < close_time for t in times], dtype=bool)
+
+
+def location_coverage(date_from, date_to, locations=None, target=None, open_time=None, close_time=None):
+    """
+    Computes headcount per location per bucket for [date_from, date_to]
+    (inclusive, local days) and, when `target` is given, the understaffed
+    stretches.
+
+    Returns {"start", "end", "bucket_minutes", "locations", "headcount", "gaps"}
+    where headcount[i][j] is the staff on shift at locations[i] during
+    bucket j, which starts bucket_minutes * j after start.
+    """
+    window_start = timezone.make_aware(datetime.combine(date_from, datetime.min.time()))
+    window_end = timezone.make_aware(datetime.combine(date_to + timedelta(days=1), datetime.min.time()))
+    # Bucket arithmetic is done on epoch seconds so DST changes do not shift buckets.
+    start_epoch = int(window_start.timestamp())
+    bucket_seconds = BUCKET_MINUTES * 60
+    n_buckets = (int(window_end.timestamp()) - start_epoch) // bucket_seconds
+
+    def bucket_start(index):
+        return datetime.fromtimestamp(start_epoch + int(index) * bucket_seconds, tz=dt_timezone.utc)
+
+    shifts = Shift.objects.overlapping(window_start, window_end).exclude(status="cancelled")
+    if locations:
+        shifts = shifts.filter(location__in=locations)
+    rows = list(
+        shifts.values("location", "start_at", "end_at").order_by()
+        .annotate(staff=Count("id")).values_list("location", "start_at", "end_at", "staff")
+    )
+
+    names = sorted(set(locations or ()) | {row[0] for row in rows})
+    position = {name: i for i, name in enumerate(names)}
+    headcount = coverage_matrix(
+        np.array([position[row[0]] for row in rows], dtype=np.int64),
+        np.array([int(row[1].timestamp()) for row in rows], dtype=np.int64),
+        np.array([int(row[2].timestamp()) for row in rows], dtype=np.int64),
+        len(names), n_buckets, start_epoch, bucket_seconds,
+        np.array([row[3] for row in rows], dtype=np.int32),
+    )
+
+    gaps = []
+    if target is not None:
+        mask = None
+        if open_time is not None:
+            mask = opening_mask([bucket_start(i) for i in range(n_buckets)], open_time, close_time)
+        for location, first, end in zip(*find_gaps(headcount, target, mask)):
+            staffed = int(headcount[location, first:end].min())
+            gaps.append({
+                "location": names[location],
+                "start": bucket_start(first),
+                "end": bucket_start(end),
+                "headcount": staffed,
+                "shortfall": target - staffed,
+            })
+
+    return {
+        "start": window_start,
+        "end": window_end,
+        "bucket_minutes": BUCKET_MINUTES,
+        "locations": names,
+        "headcount": headcount.tolist(),
+        "gaps": gaps,
+    }
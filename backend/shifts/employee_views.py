@@ -1,19 +1,39 @@
+import hashlib
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import Count, Max
+from django.http import Http404, StreamingHttpResponse
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+from django.views.decorators.http import require_GET
 from rest_framework import generics, permissions, status
+from rest_framework.decorators import api_view, permission_classes
 from rest_framework.response import Response
-from .models import Shift
+from .ical import EVENT_FIELDS, render_calendar
+from .models import CalendarToken, Shift
 from .serializers import ShiftSerializer
+from .filters import ShiftFilterBackend
+from .matching import find_swap_candidates
+from .pagination import ShiftCursorPagination
 
 class MyShiftsView(generics.ListAPIView):
     """
     Employee Endpoint:
     Lists only the shifts assigned to the logged-in employee.
+    Supports ?date_from, ?date_to, ?location, ?status filters and
+    cursor pagination via ?page_size / ?cursor.
     """
     serializer_class = ShiftSerializer
     permission_classes = [permissions.IsAuthenticated]
+    filter_backends = [ShiftFilterBackend]
+    pagination_class = ShiftCursorPagination
 
     def get_queryset(self):
         # Return only shifts that belong to the logged-in user.
-        return Shift.objects.filter(employee=self.request.user)
+        return Shift.objects.filter(employee=self.request.user).select_related('employee').order_by('date', 'start_time', 'id')
 
 class EmployeeShiftDetailView(generics.RetrieveUpdateAPIView):
     """
@@ -27,7 +47,7 @@ class EmployeeShiftDetailView(generics.RetrieveUpdateAPIView):
 
     def get_queryset(self):
         # Ensure that an employee can access only their own shifts.
-        return Shift.objects.filter(employee=self.request.user)
+        return Shift.objects.filter(employee=self.request.user).select_related('employee')
 
     def partial_update(self, request, *args, **kwargs):
         new_status = request.data.get("status")
@@ -45,14 +65,113 @@ class EmployeeShiftDetailView(generics.RetrieveUpdateAPIView):
                 status=status.HTTP_403_FORBIDDEN,
             )
         return super().partial_update(request, *args, **kwargs)
-class AvailableShiftsForSwapView(generics.ListAPIView):
+class AvailableShiftsForSwapView(generics.GenericAPIView):
     """
-    Returns shifts that are not assigned to the current user
-    and can be requested for swap.
+    Employee Endpoint:
+    Lists other employees' upcoming shifts that the logged-in employee
+    could take in a swap: same role, no overlap or short rest next to
+    their own shifts, no clash with their approved leave.
+
+    Query parameters:
+      ?give_up=<shift_id>       one of the employee's own upcoming shifts;
+                                its owner must be able to take it in return,
+                                and candidates at its location rank first
+      ?date_from / ?date_to     window to search (default: the next 14 days)
+      ?limit=<n>                at most this many results (default 50, max 200)
+
+    Results are ordered best first and carry "same_location" and
+    "hours_apart" (from the given-up shift, or from now).
     """
     serializer_class = ShiftSerializer
     permission_classes = [permissions.IsAuthenticated]
 
-    def get_queryset(self):
-        user = self.request.user
-        return Shift.objects.exclude(user=user).filter(date__gte=date.today())
+    def get(self, request):
+        params = request.query_params
+        date_from = ShiftFilterBackend.parse_date(params, 'date_from')
+        date_to = ShiftFilterBackend.parse_date(params, 'date_to')
+
+        try:
+            limit = min(int(params.get('limit', 50)), 200)
+        except ValueError:
+            return Response({"limit": "Must be an integer."}, status=status.HTTP_400_BAD_REQUEST)
+
+        give_up = None
+        if params.get('give_up'):
+            give_up = Shift.objects.filter(
+                pk=params['give_up'] if params['give_up'].isdigit() else None,
+                employee=request.user,
+                start_at__gt=timezone.now(),
+            ).exclude(status='cancelled').first()
+            if give_up is None:
+                return Response(
+                    {"give_up": "Must be one of your upcoming shifts."},
+                    status=status.HTTP_400_BAD_REQUEST,
+                )
+
+        matches = find_swap_candidates(request.user, give_up, date_from, date_to, max(limit, 1))
+        data = self.get_serializer([match.shift for match in matches], many=True).data
+        for item, match in zip(data, matches):
+            item["same_location"] = match.same_location
+            item["hours_apart"] = match.hours_apart
+        return Response(data, status=status.HTTP_200_OK)
+
+
+@api_view(['GET', 'POST'])
+@permission_classes([permissions.IsAuthenticated])
+def calendar_feed_token(request):
+    """
+    Employee Endpoint:
+    - GET: Return the URL of the logged-in employee's .ics shift feed
+           (the secret token is created on first use).
+    - POST: Rotate the token; previously shared feed URLs stop working.
+    """
+    calendar_token, created = CalendarToken.objects.get_or_create(user=request.user)
+    if request.method == 'POST' and not created:
+        calendar_token.delete()
+        calendar_token = CalendarToken.objects.create(user=request.user)
+    url = request.build_absolute_uri(reverse("shift_calendar_feed", args=[calendar_token.token]))
+    return Response({"url": url}, status=status.HTTP_200_OK)
+
+
+@require_GET
+def shift_calendar_feed(request, token):
+    """
+    Public, token-authenticated iCalendar feed of one employee's shifts,
+    from CALENDAR_FEED_PAST_DAYS ago onwards.
+
+    The ETag and Last-Modified headers come from a single aggregate over the
+    employee's shifts (count and newest updated_at), so an unchanged calendar
+    is answered with 304 Not Modified without reading any shift rows. Otherwise
+    the feed is streamed straight from a values() iterator.
+    """
+    try:
+        calendar_token = CalendarToken.objects.select_related('user').get(token=token)
+    except CalendarToken.DoesNotExist:
+        raise Http404("Unknown calendar feed.")
+    user = calendar_token.user
+
+    since = timezone.localdate() - timedelta(days=getattr(settings, "CALENDAR_FEED_PAST_DAYS", 90))
+    shifts = Shift.objects.filter(employee=user, date__gte=since, start_at__isnull=False)
+    summary = shifts.aggregate(count=Count('id'), latest=Max('updated_at'))
+
+    etag = '"%s"' % hashlib.md5(
+        f"{user.id}:{since}:{summary['count']}:{summary['latest']}".encode()
+    ).hexdigest()
+    last_modified = int(summary['latest'].timestamp()) if summary['latest'] else None
+
+    not_modified = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if not_modified is not None:
+        return not_modified
+
+    events = shifts.order_by('start_at', 'id').values(*EVENT_FIELDS).iterator(chunk_size=500)
+    response = StreamingHttpResponse(
+        render_calendar(events, f"{user.name or user.email} - Shifts", request.get_host()),
+        content_type="text/calendar; charset=utf-8",
+    )
+    response["ETag"] = etag
+    if last_modified is not None:
+        response["Last-Modified"] = http_date(last_modified)
+    # Let calendar clients cache the feed but always revalidate it.
+    response["Cache-Control"] = "private, no-cache"
+    response["Content-Disposition"] = 'inline; filename="shifts.ics"'
+    return response
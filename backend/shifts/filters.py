@@ -0,0 +1,46 @@
+# shifts/filters.py
+from datetime import date
+
+from rest_framework.exceptions import ValidationError
+from rest_framework.filters import BaseFilterBackend
+
+
+class ShiftFilterBackend(BaseFilterBackend):
+    """
+    Filters shift lists by query parameters:
+      ?date_from=YYYY-MM-DD  shifts on or after this date
+      ?date_to=YYYY-MM-DD    shifts on or before this date
+      ?location=<name>       exact location match
+      ?status=<status>       exact status match
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        params = request.query_params
+
+        date_from = self.parse_date(params, 'date_from')
+        if date_from:
+            queryset = queryset.filter(date__gte=date_from)
+
+        date_to = self.parse_date(params, 'date_to')
+        if date_to:
+            queryset = queryset.filter(date__lte=date_to)
+
+        location = params.get('location')
+        if location:
+            queryset = queryset.filter(location=location)
+
+        status = params.get('status')
+        if status:
+            queryset = queryset.filter(status=status)
+
+        return queryset
+
+    @staticmethod
+    def parse_date(params, name):
+        value = params.get(name)
+        if not value:
+            return None
+        try:
+            return date.fromisoformat(value)
+        except ValueError:
+            raise ValidationError({name: "Date format must be YYYY-MM-DD."})
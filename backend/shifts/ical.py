@@ -0,0 +1,79 @@
+# shifts/ical.py
+"""
+Minimal iCalendar (RFC 5545) writer for shift feeds.
+
+Events are produced one at a time from a values() iterator so a feed can
+be streamed without building model instances or the whole body in memory.
+"""
+from datetime import timezone as dt_timezone
+
+PRODID = "-//ShiftWise//Shift Calendar//EN"
+CRLF = "\r\n"
+
+# Fields read from Shift.objects.values() for each event.
+EVENT_FIELDS = ("id", "start_at", "end_at", "location", "status", "updated_at")
+
+
+def escape(text):
+    return (
+        str(text)
+        .replace("\\", "\\\\")
+        .replace(";", "\\;")
+        .replace(",", "\\,")
+        .replace("\n", "\\n")
+    )
+
+
+def fold(line):
+    """Folds a content line to 75 octets as required by RFC 5545."""
+    encoded = line.encode("utf-8")
+    if len(encoded) <= 75:
+        return line + CRLF
+    parts = []
+    while len(encoded) > 75:
+        cut = 75 if not parts else 74
+        # Do not split a multi-byte UTF-8 character.
+        while cut and (encoded[cut] & 0xC0) == 0x80:
+            cut -= 1
+        parts.append(encoded[:cut].decode("utf-8"))
+        encoded = encoded[cut:]
+    parts.append(encoded.decode("utf-8"))
+    return (CRLF + " ").join(parts) + CRLF
+
+
+def format_utc(moment):
+    return moment.astimezone(dt_timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+
+
+def render_event(shift, host):
+    status = "CANCELLED" if shift["status"] == "cancelled" else (
+        "CONFIRMED" if shift["status"] in ("confirmed", "employee_confirmed") else "TENTATIVE"
+    )
+    lines = [
+        "BEGIN:VEVENT",
+        f"UID:shift-{shift['id']}@{host}",
+        f"DTSTAMP:{format_utc(shift['updated_at'])}",
+        f"LAST-MODIFIED:{format_utc(shift['updated_at'])}",
+        f"DTSTART:{format_utc(shift['start_at'])}",
+        f"DTEND:{format_utc(shift['end_at'])}",
+        f"SUMMARY:{escape('Shift at ' + shift['location'])}",
+        f"LOCATION:{escape(shift['location'])}",
+        f"STATUS:{status}",
+        "END:VEVENT",
+    ]
+    return "".join(fold(line) for line in lines)
+
+
+def render_calendar(shifts, name, host):
+    """Yields the calendar in chunks: header, one chunk per event, footer."""
+    yield "".join(fold(line) for line in (
+        "BEGIN:VCALENDAR",
+        "VERSION:2.0",
+        f"PRODID:{PRODID}",
+        "CALSCALE:GREGORIAN",
+        "METHOD:PUBLISH",
+        f"X-WR-CALNAME:{escape(name)}",
+    ))
+    for shift in shifts:
+        yield render_event(shift, host)
+    yield fold("END:VCALENDAR")
@@ -0,0 +1,152 @@
+# shifts/importer.py
+"""
+Streaming CSV import of shifts.
+
+The file is read row by row and handled in chunks of
+SHIFT_IMPORT_BATCH_SIZE rows: each chunk is validated, checked for
+conflicts and inserted before the next one is read, so memory stays flat
+however large the file is. Employees are matched by email or id_code
+against an in-memory directory loaded with a single query up front.
+
+Expected columns: email and/or id_code, date, start_time, end_time,
+location and optionally status. Rejected rows are written to an error
+report as they are found, together with their line number and errors.
+
+A file that cannot be decoded is rejected when its header is unreadable.
+Past the header, earlier batches are already committed, so the import
+stops and reports the line it stopped at instead.
+"""
+import csv
+import json
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from rest_framework import serializers
+
+from .bulk import BulkShiftRowSerializer, build_shifts, save_shifts
+
+User = get_user_model()
+
+REQUIRED_COLUMNS = ("date", "start_time", "end_time", "location")
+EMPLOYEE_COLUMNS = ("email", "id_code")
+
+
+class InvalidHeaderError(ValueError):
+    """The CSV header is unreadable or lacks a required column; nothing was imported."""
+
+
+class ShiftImportRowSerializer(BulkShiftRowSerializer):
+    """A CSV row may identify the employee by email, id_code or both."""
+    email = serializers.EmailField(required=False)
+    id_code = serializers.CharField(max_length=20, required=False)
+
+    def validate(self, attrs):
+        if not attrs.get("email") and not attrs.get("id_code"):
+            raise serializers.ValidationError({"email": ["Either email or id_code is required."]})
+        return attrs
+
+
+class EmployeeDirectory:
+    """
+    Email and id_code lookup over every user, loaded with one query.
+    Only ids are kept; lookups return a bare User carrying the id, which is
+    all a Shift needs to be inserted. One such User is shared by all rows of
+    the same employee.
+    """
+
+    def __init__(self):
+        self.by_email = {}
+        self.by_id_code = {}
+        self.users = {}
+        for user_id, email, id_code in User.objects.values_list("id", "email", "id_code").iterator():
+            self.by_email[email.lower()] = user_id
+            self.by_id_code[id_code] = user_id
+
+    def __call__(self, data):
+        user_id = None
+        if data.get("email"):
+            user_id = self.by_email.get(data["email"].lower())
+        if user_id is None and data.get("id_code"):
+            user_id = self.by_id_code.get(data["id_code"])
+        if user_id is None:
+            return None
+        if user_id not in self.users:
+            self.users[user_id] = User(pk=user_id)
+        return self.users[user_id]
+
+
+def chunked(rows, size):
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def clean_row(row):
+    """Drops empty cells (so defaults apply) and cells beyond the header."""
+    return {column: value for column, value in row.items() if column is not None and value not in (None, "")}
+
+
+def import_shifts(stream, error_report=None, batch_size=None):
+    """
+    Imports shifts from a text stream containing CSV.
+
+    Rejected rows are written as CSV to `error_report` (a writable text
+    stream) when given. Raises InvalidHeaderError when the header cannot be
+    decoded or lacks a required column.
+
+    Returns {"rows": ..., "created": ..., "rejected": ..., "error": ...}.
+    "error" is None unless the file could not be decoded past the header:
+    the import then stops, and "rows" only counts the rows handled before.
+    """
+    batch_size = batch_size or getattr(settings, "SHIFT_IMPORT_BATCH_SIZE", 1000)
+    reader = csv.DictReader(stream)
+    try:
+        columns = [column.strip() for column in reader.fieldnames or []]
+    except UnicodeDecodeError as exc:
+        raise InvalidHeaderError(f"The file could not be decoded: {exc.reason}.") from exc
+    reader.fieldnames = columns
+
+    missing = [column for column in REQUIRED_COLUMNS if column not in columns]
+    if not any(column in columns for column in EMPLOYEE_COLUMNS):
+        missing.append(" or ".join(EMPLOYEE_COLUMNS))
+    if missing:
+        raise InvalidHeaderError(f"Missing required columns: {', '.join(missing)}.")
+
+    writer = csv.writer(error_report) if error_report is not None else None
+    if writer:
+        writer.writerow(["line", *columns, "errors"])
+
+    find_employee = EmployeeDirectory()
+    totals = {"rows": 0, "created": 0, "rejected": 0, "error": None}
+
+    try:
+        for chunk in chunked(reader, batch_size):
+            # Line numbers as shown in a spreadsheet: the header is line 1.
+            first_line = totals["rows"] + 2
+            shifts, errors = build_shifts(
+                [clean_row(row) for row in chunk], find_employee, first_line, ShiftImportRowSerializer
+            )
+            if shifts:
+                save_shifts([shift for _, shift in shifts])
+
+            totals["rows"] += len(chunk)
+            totals["created"] += len(shifts)
+            totals["rejected"] += len(errors)
+            if writer:
+                for error in errors:
+                    row = chunk[error["row"] - first_line]
+                    writer.writerow([
+                        error["row"], *(row.get(column) or "" for column in columns), json.dumps(error["errors"]),
+                    ])
+    except UnicodeDecodeError as exc:
+        totals["error"] = (
+            f"The file could not be decoded ({exc.reason}); the import stopped at line {totals['rows'] + 2}. "
+            f"The rows before it were imported."
+        )
+
+    return totals
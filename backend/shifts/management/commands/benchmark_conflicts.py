@@ -0,0 +1,45 @@
+import random
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+
+from django.core.management.base import BaseCommand
+
+from shifts.conflicts import SHIFT, Interval, detect_conflicts, min_rest
+
+
+class Command(BaseCommand):
+    help = "Benchmarks the in-memory shift conflict sweep on synthetic data."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--shifts", type=int, default=10000, help="Number of candidate shifts.")
+        parser.add_argument("--employees", type=int, default=500, help="Number of employees.")
+        parser.add_argument("--existing", type=int, default=10000, help="Number of already scheduled shifts.")
+        parser.add_argument("--days", type=int, default=28, help="Length of the scheduling window in days.")
+        parser.add_argument("--seed", type=int, default=1)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options["seed"])
+        origin = datetime(2025, 1, 6, tzinfo=timezone.utc)
+
+        def random_span():
+            start = origin + timedelta(days=rng.randrange(options["days"]), hours=rng.randrange(24))
+            return start, start + timedelta(hours=rng.choice((4, 6, 8, 10)))
+
+        intervals = defaultdict(list)
+        for ref in range(options["existing"]):
+            start, end = random_span()
+            intervals[rng.randrange(options["employees"])].append(Interval(start, end, SHIFT, None, ref))
+        for key in range(options["shifts"]):
+            start, end = random_span()
+            intervals[rng.randrange(options["employees"])].append(Interval(start, end, SHIFT, key, None))
+
+        started = time.perf_counter()
+        conflicts = detect_conflicts(intervals, min_rest())
+        elapsed = time.perf_counter() - started
+
+        self.stdout.write(
+            f"Checked {options['shifts']} candidate shifts against {options['existing']} existing shifts "
+            f"for {options['employees']} employees in {elapsed * 1000:.1f} ms; "
+            f"{len(conflicts)} candidates conflict."
+        )
@@ -0,0 +1,39 @@
+import time
+
+import numpy as np
+from django.core.management.base import BaseCommand
+
+from shifts.coverage import BUCKET_MINUTES, coverage_matrix, find_gaps
+
+
+class Command(BaseCommand):
+    help = "Benchmarks the coverage heatmap's NumPy core on a synthetic month of shifts."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--locations", type=int, default=50)
+        parser.add_argument("--days", type=int, default=31)
+        parser.add_argument("--shifts-per-day", type=int, default=40, help="Shifts per location per day.")
+        parser.add_argument("--target", type=int, default=3)
+        parser.add_argument("--seed", type=int, default=1)
+
+    def handle(self, *args, **options):
+        rng = np.random.default_rng(options["seed"])
+        n_locations, days = options["locations"], options["days"]
+        n_shifts = n_locations * days * options["shifts_per_day"]
+        bucket_seconds = BUCKET_MINUTES * 60
+        n_buckets = days * 24 * 3600 // bucket_seconds
+
+        # Shifts start on a quarter hour and last 4 to 10 hours.
+        start = rng.integers(0, n_buckets, n_shifts) * bucket_seconds
+        end = start + rng.integers(16, 41, n_shifts) * bucket_seconds
+        location = rng.integers(0, n_locations, n_shifts)
+
+        started = time.perf_counter()
+        headcount = coverage_matrix(location, start, end, n_locations, n_buckets, 0, bucket_seconds)
+        gaps = find_gaps(headcount, options["target"])
+        elapsed = time.perf_counter() - started
+
+        self.stdout.write(
+            f"Built {n_locations} x {n_buckets} coverage from {n_shifts} shifts and found "
+            f"{len(gaps[0])} gaps in {elapsed * 1000:.1f} ms."
+        )
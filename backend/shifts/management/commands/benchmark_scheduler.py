@@ -0,0 +1,58 @@
+import time
+
+import numpy as np
+from django.core.management.base import BaseCommand
+
+from shifts.scheduler import NO_ROLE, Busy, Seats, solve
+
+
+class Command(BaseCommand):
+    help = "Benchmarks the schedule generator's solver on a synthetic week of demand."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--employees", type=int, default=500)
+        parser.add_argument("--seats", type=int, default=2000, help="Number of demand seats in the week.")
+        parser.add_argument("--roles", type=int, default=5)
+        parser.add_argument("--leave", type=int, default=200, help="Number of approved leave windows.")
+        parser.add_argument("--max-weekly-hours", type=float, default=40)
+        parser.add_argument("--rest-hours", type=float, default=8)
+        parser.add_argument("--seed", type=int, default=1)
+
+    def handle(self, *args, **options):
+        rng = np.random.default_rng(options["seed"])
+        n_emp, n_seats = options["employees"], options["seats"]
+        hour = 3600
+
+        # Seats start on the hour in one of three daily blocks across seven days.
+        day = rng.integers(0, 7, n_seats)
+        block_start = rng.choice([6, 14, 22], n_seats)
+        start = (day * 24 + block_start) * hour
+        seats = Seats(
+            start=start.astype(np.int64),
+            end=(start + rng.choice([4, 6, 8], n_seats) * hour).astype(np.int64),
+            role=np.where(rng.random(n_seats) < 0.3, NO_ROLE, rng.integers(0, options["roles"], n_seats)).astype(np.int64),
+            week=np.zeros(n_seats, dtype=np.int64),
+        )
+
+        leave_start = rng.integers(0, 7 * 24, options["leave"]) * hour
+        busy = Busy(
+            employee=rng.integers(0, n_emp, options["leave"]).astype(np.int64),
+            start=leave_start.astype(np.int64),
+            end=(leave_start + 6 * hour).astype(np.int64),
+            pad=np.zeros(options["leave"], dtype=np.int64),
+        )
+        emp_role = rng.integers(0, options["roles"], n_emp).astype(np.int64)
+        emp_rate = rng.uniform(15, 35, n_emp).round(2)
+
+        started = time.perf_counter()
+        assigned = solve(
+            seats, emp_role, emp_rate, busy, np.zeros((n_emp, 1)),
+            options["max_weekly_hours"] * hour, int(options["rest_hours"] * hour),
+        )
+        elapsed = time.perf_counter() - started
+
+        filled = assigned >= 0
+        self.stdout.write(
+            f"Assigned {int(filled.sum())}/{n_seats} seats to {len(np.unique(assigned[filled]))} of {n_emp} "
+            f"employees in {elapsed:.2f} s."
+        )
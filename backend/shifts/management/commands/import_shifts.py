@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from shifts.importer import InvalidHeaderError, import_shifts
+
+
+class Command(BaseCommand):
+    help = "Imports shifts from a CSV file, streaming it in batches."
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="CSV file with email and/or id_code, date, start_time, end_time, location[, status].")
+        parser.add_argument("--batch-size", type=int, help="Rows validated and inserted together (default: SHIFT_IMPORT_BATCH_SIZE).")
+        parser.add_argument("--errors", help="Write rejected rows to this CSV file.")
+
+    def handle(self, *args, **options):
+        if options["batch_size"] is not None and options["batch_size"] < 1:
+            raise CommandError("--batch-size must be a positive integer.")
+
+        error_report = open(options["errors"], "w", newline="", encoding="utf-8") if options["errors"] else None
+        try:
+            with open(options["path"], newline="", encoding="utf-8-sig") as stream:
+                totals = import_shifts(stream, error_report, options["batch_size"])
+        except (OSError, InvalidHeaderError) as e:
+            raise CommandError(str(e))
+        finally:
+            if error_report:
+                error_report.close()
+
+        self.stdout.write(f"Read {totals['rows']} rows: created {totals['created']} shifts, rejected {totals['rejected']}.")
+        if totals["error"]:
+            raise CommandError(totals["error"])
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from shifts.recurrence import materialize
+
+
+class Command(BaseCommand):
+    help = "Extends recurring shift templates up to the rolling horizon. Meant to run daily."
+
+    def handle(self, *args, **options):
+        result = materialize()
+        self.stdout.write(f"Created {result['created']} shifts, skipped {result['skipped']} conflicting occurrences.")
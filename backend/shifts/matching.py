@@ -0,0 +1,135 @@
+# shifts/matching.py
+"""
+Swap-candidate matching.
+
+Given an employee (and optionally the shift they want to give up), finds
+the other employees' upcoming shifts they could actually take:
+  - the shift belongs to someone holding the same current role,
+  - it does not overlap the requester's own shifts or come closer to them
+    than SHIFT_MIN_REST_HOURS (the given-up shift no longer counts),
+  - it does not overlap the requester's approved leave,
+  - when a shift is given up, its owner can take that shift in return.
+
+The requester's shifts and leave in the window are loaded once and turned
+into a BusyIndex: a sorted list of merged busy intervals, so each candidate
+is checked with a binary search instead of a scan. Candidates are ranked
+by location (same as the given-up shift first) and then by how close in
+time they are to it.
+"""
+from bisect import bisect_left
+from collections import namedtuple
+from datetime import datetime, timedelta
+
+from django.db.models import OuterRef, Subquery
+from django.utils import timezone
+
+from roles.models import UserRoleAssignment
+from roles.utils import current_role_by_user
+from .conflicts import LEAVE, load_intervals, min_rest
+from .models import Shift
+
+# Default number of days ahead that candidates are looked for in.
+SWAP_WINDOW_DAYS = 14
+
+Candidate = namedtuple("Candidate", ["shift", "same_location", "hours_apart"])
+
+
+class BusyIndex:
+    """
+    One employee's busy time as sorted, non-overlapping intervals. Shifts
+    are padded by the rest gap on both sides; leave is not.
+    """
+
+    def __init__(self, intervals, rest):
+        merged = []
+        padded = (
+            (interval.start, interval.end) if interval.kind == LEAVE
+            else (interval.start - rest, interval.end + rest)
+            for interval in intervals
+        )
+        for start, end in sorted(padded):
+            if merged and start <= merged[-1][1]:
+                merged[-1][1] = max(merged[-1][1], end)
+            else:
+                merged.append([start, end])
+        self.starts = [start for start, _ in merged]
+        self.ends = [end for _, end in merged]
+
+    def is_free(self, start, end):
+        """True when [start, end) touches no busy interval."""
+        # Intervals are disjoint and sorted, so only the last one starting before `end` can overlap.
+        i = bisect_left(self.starts, end) - 1
+        return i < 0 or self.ends[i] <= start
+
+
+def current_role_subquery():
+    return Subquery(
+        UserRoleAssignment.objects.filter(user=OuterRef("employee")).order_by("-assigned_at").values("role")[:1]
+    )
+
+
+def find_swap_candidates(user, give_up=None, date_from=None, date_to=None, limit=50):
+    """
+    Returns up to `limit` Candidate tuples for `user`, best first.
+    `give_up` is one of the user's own shifts; the window defaults to the
+    next SWAP_WINDOW_DAYS days.
+    """
+    now = timezone.now()
+    date_from = date_from or timezone.localdate()
+    date_to = date_to or date_from + timedelta(days=SWAP_WINDOW_DAYS)
+    window_start = max(now, timezone.make_aware(datetime.combine(date_from, datetime.min.time())))
+    window_end = timezone.make_aware(datetime.combine(date_to + timedelta(days=1), datetime.min.time()))
+    if window_start >= window_end:
+        return []
+    rest = min_rest()
+
+    role_id = current_role_by_user([user.id]).get(user.id)
+    candidates = (
+        Shift.objects.filter(start_at__gte=window_start, start_at__lt=window_end)
+        .exclude(employee=user)
+        .exclude(status="cancelled")
+        .annotate(owner_role=current_role_subquery())
+        .select_related("employee")
+        .order_by("start_at", "id")
+    )
+    candidates = candidates.filter(owner_role=role_id) if role_id else candidates.filter(owner_role__isnull=True)
+    candidates = list(candidates)
+    if not candidates:
+        return []
+
+    exclude = [give_up.id] if give_up else []
+    busy = load_intervals(
+        [user.id],
+        min(candidate.start_at for candidate in candidates) - rest,
+        max(candidate.end_at for candidate in candidates) + rest,
+        exclude,
+    )
+    requester = BusyIndex(busy.get(user.id, []), rest)
+
+    owners = {}
+    if give_up:
+        # What each owner already has around the given-up shift, so we can tell whether they could take it.
+        owner_ids = {candidate.employee_id for candidate in candidates}
+        owners = load_intervals(owner_ids, give_up.start_at - rest, give_up.end_at + rest)
+
+    matches = []
+    for candidate in candidates:
+        if not requester.is_free(candidate.start_at, candidate.end_at):
+            continue
+        if give_up:
+            # The owner gives their candidate shift away, so it does not block them.
+            owner_busy = [interval for interval in owners.get(candidate.employee_id, [])
+                          if interval.kind == LEAVE or interval.ref != candidate.id]
+            if not BusyIndex(owner_busy, rest).is_free(give_up.start_at, give_up.end_at):
+                continue
+            reference, location = give_up.start_at, give_up.location
+        else:
+            reference, location = now, None
+        matches.append(Candidate(
+            shift=candidate,
+            same_location=location is not None and candidate.location == location,
+            hours_apart=round(abs((candidate.start_at - reference).total_seconds()) / 3600, 2),
+        ))
+
+    matches.sort(key=lambda match: (not match.same_location, match.hours_apart, match.shift.id))
+    return matches[:limit]
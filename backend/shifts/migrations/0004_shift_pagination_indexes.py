@@ -0,0 +1,21 @@
+# Generated by Django 4.2.19 on 2026-10-18 18:37
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('shifts', '0003_alter_shift_status'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='shift',
+            index=models.Index(fields=['date', 'start_time', 'id'], name='shift_date_start_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='shift',
+            index=models.Index(fields=['employee', 'date', 'start_time', 'id'], name='shift_emp_date_start_id_idx'),
+        ),
+    ]
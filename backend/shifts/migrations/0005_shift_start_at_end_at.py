@@ -0,0 +1,35 @@
+# Generated by Django 4.2.19 on 2026-10-18 18:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('shifts', '0004_shift_pagination_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='shift',
+            name='end_at',
+            field=models.DateTimeField(blank=True, db_index=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='shift',
+            name='start_at',
+            field=models.DateTimeField(blank=True, db_index=True, editable=False, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='shift',
+            index=models.Index(fields=['employee', 'start_at'], name='shift_employee_start_at_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='shift',
+            index=models.Index(fields=['location', 'start_at'], name='shift_location_start_at_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='shift',
+            index=models.Index(fields=['status', 'date'], name='shift_status_date_idx'),
+        ),
+    ]
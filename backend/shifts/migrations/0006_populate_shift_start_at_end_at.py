@@ -0,0 +1,32 @@
+from datetime import datetime, timedelta
+
+from django.db import migrations
+from django.utils import timezone
+
+BATCH_SIZE = 1000
+
+
+def populate_span(apps, schema_editor):
+    Shift = apps.get_model('shifts', 'Shift')
+    pending = Shift.objects.filter(start_at__isnull=True).only('id', 'date', 'start_time', 'end_time').order_by('id')
+    while True:
+        batch = list(pending[:BATCH_SIZE])
+        if not batch:
+            break
+        for shift in batch:
+            shift.start_at = timezone.make_aware(datetime.combine(shift.date, shift.start_time))
+            shift.end_at = timezone.make_aware(datetime.combine(shift.date, shift.end_time))
+            if shift.end_at <= shift.start_at:
+                shift.end_at += timedelta(days=1)
+        Shift.objects.bulk_update(batch, ['start_at', 'end_at'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('shifts', '0005_shift_start_at_end_at'),
+    ]
+
+    operations = [
+        migrations.RunPython(populate_span, migrations.RunPython.noop),
+    ]
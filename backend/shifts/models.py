@@ -1,9 +1,101 @@
 # shifts/models.py
+import secrets
+from datetime import datetime, timedelta
+
 from django.db import models
 from django.contrib.auth import get_user_model
+from django.utils import timezone
 
 User = get_user_model()
 
+
+def shift_span(shift_date, start_time, end_time):
+    """
+    Returns the aware (start_at, end_at) datetimes for a shift.
+    An end time at or before the start time means the shift runs overnight
+    and ends on the following day.
+    """
+    start_at = timezone.make_aware(datetime.combine(shift_date, start_time))
+    end_at = timezone.make_aware(datetime.combine(shift_date, end_time))
+    if end_at <= start_at:
+        end_at += timedelta(days=1)
+    return start_at, end_at
+
+
+class ShiftQuerySet(models.QuerySet):
+    def overlapping(self, start, end):
+        """Shifts that are in progress at any point in [start, end)."""
+        return self.filter(start_at__lt=end, end_at__gt=start)
+
+
+class ShiftTemplate(models.Model):
+    """
+    A recurring weekly shift pattern, assigned either to one employee or to
+    every employee currently holding a role. Concrete Shift rows are only
+    materialized for a rolling horizon (see shifts/recurrence.py).
+    """
+    WEEKDAY_CHOICES = (
+        (0, 'Monday'),
+        (1, 'Tuesday'),
+        (2, 'Wednesday'),
+        (3, 'Thursday'),
+        (4, 'Friday'),
+        (5, 'Saturday'),
+        (6, 'Sunday'),
+    )
+
+    employee = models.ForeignKey(User, on_delete=models.CASCADE, null=True, blank=True, related_name='shift_templates')
+    role = models.ForeignKey('roles.Role', on_delete=models.CASCADE, null=True, blank=True, related_name='shift_templates')
+    weekday = models.PositiveSmallIntegerField(choices=WEEKDAY_CHOICES)
+    start_time = models.TimeField()
+    end_time = models.TimeField()
+    location = models.CharField(max_length=100)
+    # Recurrence rule: every `interval_weeks` weeks on `weekday`, from `starts_on` until `ends_on` (inclusive).
+    interval_weeks = models.PositiveSmallIntegerField(default=1)
+    starts_on = models.DateField()
+    ends_on = models.DateField(null=True, blank=True)
+    is_active = models.BooleanField(default=True)
+    # Last date up to which Shift rows have been generated.
+    materialized_until = models.DateField(null=True, blank=True, editable=False)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    # Fields that change which shifts the template produces.
+    SCHEDULE_FIELDS = (
+        'employee', 'role', 'weekday', 'start_time', 'end_time', 'location',
+        'interval_weeks', 'starts_on', 'ends_on', 'is_active',
+    )
+
+    class Meta:
+        constraints = [
+            models.CheckConstraint(
+                check=(
+                    models.Q(employee__isnull=False, role__isnull=True)
+                    | models.Q(employee__isnull=True, role__isnull=False)
+                ),
+                name='shift_template_employee_xor_role',
+            ),
+        ]
+
+    def occurrences(self, start, end):
+        """Yields every date in [start, end] on which this template recurs."""
+        start = max(start, self.starts_on)
+        if self.ends_on:
+            end = min(end, self.ends_on)
+        step = 7 * max(self.interval_weeks, 1)
+        first = self.starts_on + timedelta(days=(self.weekday - self.starts_on.weekday()) % 7)
+        if start > first:
+            # Jump straight to the first occurrence on or after `start`.
+            first += timedelta(days=-(-(start - first).days // step) * step)
+        day = first
+        while day <= end:
+            yield day
+            day += timedelta(days=step)
+
+    def __str__(self):
+        assignee = self.employee or self.role
+        return f"{assignee} - {self.get_weekday_display()} {self.start_time} to {self.end_time} @ {self.location}"
+
+
 class Shift(models.Model):
     STATUS_CHOICES = (
         ('pending', 'Pending'),
@@ -18,21 +110,78 @@ class Shift(models.Model):
     employee = models.ForeignKey(User, on_delete=models.CASCADE, related_name='shifts')
     location = models.CharField(max_length=100)
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
+    # Set when the shift was generated from a recurring template.
+    template = models.ForeignKey(ShiftTemplate, on_delete=models.SET_NULL, null=True, blank=True, related_name='shifts')
+
+    # Derived from date/start_time/end_time on save() so that range and overlap
+    # queries can use an index. end_at is on the next day for overnight shifts.
+    start_at = models.DateTimeField(null=True, blank=True, editable=False, db_index=True)
+    end_at = models.DateTimeField(null=True, blank=True, editable=False, db_index=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    objects = ShiftQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            # Keyset pagination over all shifts and over one employee's shifts.
+            models.Index(fields=['date', 'start_time', 'id'], name='shift_date_start_id_idx'),
+            models.Index(fields=['employee', 'date', 'start_time', 'id'], name='shift_emp_date_start_id_idx'),
+            # Per-employee and per-location time range lookups.
+            models.Index(fields=['employee', 'start_at'], name='shift_employee_start_at_idx'),
+            models.Index(fields=['location', 'start_at'], name='shift_location_start_at_idx'),
+            models.Index(fields=['status', 'date'], name='shift_status_date_idx'),
+        ]
+
+    def sync_span(self):
+        """
+        Recomputes start_at/end_at from date/start_time/end_time.
+        Call this before bulk_create()/bulk_update(), which bypass save().
+        """
+        self.start_at, self.end_at = shift_span(self.date, self.start_time, self.end_time)
+
+    def save(self, *args, **kwargs):
+        self.sync_span()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None:
+            extra = {'updated_at'}
+            if {'date', 'start_time', 'end_time'} & set(update_fields):
+                extra |= {'start_at', 'end_at'}
+            kwargs['update_fields'] = set(update_fields) | extra
+        super().save(*args, **kwargs)
 
     def __str__(self):
         return f"{self.employee} - {self.date} ({self.start_time} to {self.end_time})"
-from rest_framework import generics, permissions
-from shifts.models import Shift
-from shifts.serializers import ShiftSerializer
 
-class AvailableShiftsForSwapView(generics.ListAPIView):
+
+def generate_calendar_token():
+    return secrets.token_urlsafe(32)
+
+
+class CalendarToken(models.Model):
     """
-    Returns shifts that are not assigned to the current user
-    and can be requested for swap.
+    Secret that lets calendar apps fetch an employee's shift feed without
+    a JWT. Rotating the token invalidates previously shared feed URLs.
     """
-    serializer_class = ShiftSerializer
-    permission_classes = [permissions.IsAuthenticated]
+    user = models.OneToOneField(User, on_delete=models.CASCADE, related_name='calendar_token')
+    token = models.CharField(max_length=64, unique=True, default=generate_calendar_token)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"Calendar token for {self.user}"
+
 
-    def get_queryset(self):
-        user = self.request.user
-        return Shift.objects.exclude(user=user).filter(date__gte=date.today())
+class ShiftImport(models.Model):
+    """
+    Record of one CSV shift import. Rejected rows are kept in a CSV error
+    report that the admin can download and correct.
+    """
+    uploaded_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='shift_imports')
+    file_name = models.CharField(max_length=255)
+    total_rows = models.PositiveIntegerField(default=0)
+    created_count = models.PositiveIntegerField(default=0)
+    rejected_count = models.PositiveIntegerField(default=0)
+    error_report = models.FileField(upload_to='shift_imports/', blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.file_name} ({self.created_count} created, {self.rejected_count} rejected)"
@@ -0,0 +1,124 @@
+# shifts/pagination.py
+import base64
+import json
+from collections import OrderedDict
+from datetime import date, time
+
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+class ShiftCursorPagination(BasePagination):
+    """
+    Keyset (cursor) pagination over shifts ordered by (date, start_time, id).
+
+    Each page is fetched with a "seek" filter on the last row of the previous
+    page instead of an OFFSET, so the cost of a page does not depend on how
+    far into the table it is. Backed by the (date, start_time, id) and
+    (employee, date, start_time, id) indexes on Shift.
+
+    Subclasses paginating other orderings override ordering, seek(),
+    parse_cursor() and cursor_values().
+
+    Pagination is opt-in: it kicks in when the client sends `cursor` or
+    `page_size`. Without either, the full (filtered, ordered) list is returned
+    as before so existing clients keep working.
+    """
+    ordering = ('date', 'start_time', 'id')
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'page_size'
+    page_size = 50
+    max_page_size = 500
+    invalid_cursor_message = 'Invalid cursor'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        params = request.query_params
+        if self.cursor_query_param not in params and self.page_size_query_param not in params:
+            return None
+
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        self.page_size = self.get_page_size(request)
+
+        # Fetch one extra row to know whether there is a next page.
+        results = self.fetch(queryset, self.decode_cursor(request), self.page_size + 1)
+        self.has_next = len(results) > self.page_size
+        self.page = results[:self.page_size]
+        return self.page
+
+    def fetch(self, queryset, cursor, limit):
+        """The first `limit` rows of `queryset` after `cursor` (None: from the start)."""
+        queryset = queryset.order_by(*self.ordering)
+        if cursor is not None:
+            queryset = self.seek(queryset, cursor)
+        return list(queryset[:limit])
+
+    def seek(self, queryset, cursor):
+        """
+        Rows after `cursor`. The leading date bound is what the index seeks
+        on; the OR only sorts out the rows of the cursor's own date.
+        """
+        last_date, last_start, last_id = cursor
+        return queryset.filter(date__gte=last_date).filter(
+            Q(date__gt=last_date)
+            | Q(date=last_date, start_time__gt=last_start)
+            | Q(date=last_date, start_time=last_start, id__gt=last_id)
+        )
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        if size <= 0:
+            return self.page_size
+        return min(size, self.max_page_size)
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            raw = json.loads(base64.urlsafe_b64decode(encoded.encode('ascii')).decode('ascii'))
+            if not isinstance(raw, list):
+                raise ValueError(raw)
+            return self.parse_cursor(raw)
+        except (TypeError, ValueError, IndexError, UnicodeError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def parse_cursor(self, raw):
+        """The decoded JSON list of a cursor -> the values seek() takes. Raises ValueError when malformed."""
+        if len(raw) != 3:
+            raise ValueError(raw)
+        return date.fromisoformat(raw[0]), time.fromisoformat(raw[1]), int(raw[2])
+
+    def cursor_values(self, shift):
+        return [shift.date.isoformat(), shift.start_time.isoformat(), shift.id]
+
+    def encode_cursor(self, row):
+        raw = json.dumps(self.cursor_values(row))
+        return base64.urlsafe_b64encode(raw.encode('ascii')).decode('ascii')
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        url = replace_query_param(self.base_url, self.cursor_query_param, self.encode_cursor(self.page[-1]))
+        return replace_query_param(url, self.page_size_query_param, self.page_size)
+
+    def get_paginated_response(self, data):
+        return Response(OrderedDict([
+            ('next', self.get_next_link()),
+            ('results', data),
+        ]))
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
@@ -0,0 +1,230 @@
+# shifts/recurrence.py
+"""
+Materializes recurring ShiftTemplates into concrete Shift rows.
+
+Only a rolling horizon (SHIFT_TEMPLATE_HORIZON_WEEKS) is ever generated.
+Each template remembers how far it has been materialized, so running the
+materializer again only inserts the newly uncovered days. Editing a
+template changes only the future instances nobody has touched.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from notifications.models import Notification
+from roles.utils import current_role_by_user
+from .bulk import drop_conflicting, save_shifts
+from .conflicts import find_conflicts
+from .models import Shift, ShiftTemplate
+from .signals import build_shift_notification
+
+
+def horizon_end(today):
+    weeks = getattr(settings, "SHIFT_TEMPLATE_HORIZON_WEEKS", 4)
+    return today + timedelta(weeks=weeks)
+
+
+def current_role_members(role_ids):
+    """Returns {role_id: [user_id, ...]} for the users whose current role is in `role_ids`."""
+    members = {role_id: [] for role_id in role_ids}
+    for user_id, role_id in current_role_by_user().items():
+        if role_id in members:
+            members[role_id].append(user_id)
+    return members
+
+
+def materialize(templates=None, today=None):
+    """
+    Extends every active template (or only the given ones) up to the
+    horizon. Occurrences that would conflict with existing shifts or leave
+    are skipped.
+
+    Returns {"created": <shifts inserted>, "skipped": <conflicting occurrences>}.
+    """
+    today = today or timezone.localdate()
+    until = horizon_end(today)
+
+    if templates is None:
+        templates = ShiftTemplate.objects.filter(is_active=True).filter(
+            Q(materialized_until__isnull=True) | Q(materialized_until__lt=until)
+        )
+    templates = [template for template in templates if template.is_active]
+    members = current_role_members({template.role_id for template in templates if template.role_id})
+
+    shifts = []
+    for template in templates:
+        start = today
+        if template.materialized_until and template.materialized_until >= today:
+            start = template.materialized_until + timedelta(days=1)
+        employee_ids = [template.employee_id] if template.employee_id else members.get(template.role_id, [])
+        for day in template.occurrences(start, until):
+            for employee_id in employee_ids:
+                shifts.append(Shift(
+                    template=template,
+                    employee_id=employee_id,
+                    date=day,
+                    start_time=template.start_time,
+                    end_time=template.end_time,
+                    location=template.location,
+                ))
+        template.materialized_until = until
+
+    accepted, rejected = drop_conflicting(list(enumerate(shifts)))
+    with transaction.atomic():
+        save_shifts([shift for _, shift in accepted])
+        ShiftTemplate.objects.bulk_update(templates, ["materialized_until"])
+
+    return {"created": len(accepted), "skipped": len(rejected)}
+
+
+def referenced_shift_ids(shift_ids):
+    """
+    The ids among `shift_ids` of the shifts that other rows point at:
+    attendance, swap and cover requests, and so on. Runs one query per
+    model referencing Shift.
+    """
+    found = set()
+    for relation in Shift._meta.related_objects:
+        if relation.many_to_many:
+            continue
+        found.update(
+            relation.related_model._base_manager.filter(**{f"{relation.field.name}__in": shift_ids})
+            .values_list(relation.field.attname, flat=True)
+        )
+    return found
+
+
+def untouched(shifts, template):
+    """
+    Returns the ids of the `shifts` that are exactly as `template` (with
+    its schedule as it was when they were generated) left them: still
+    pending, with its time, location and employee, and not referenced by
+    any attendance or request. Only these are changed or deleted on an edit.
+    """
+    referenced = referenced_shift_ids([shift.id for shift in shifts])
+    schedule = (template.start_time, template.end_time, template.location)
+    return {
+        shift.id for shift in shifts
+        if shift.id not in referenced
+        and shift.status == 'pending'
+        and (shift.start_time, shift.end_time, shift.location) == schedule
+        and (template.employee_id is None or shift.employee_id == template.employee_id)
+    }
+
+
+def clear_future_shifts(template, today=None):
+    """
+    Deletes the template's untouched instances after today. Shifts that
+    have already started (or happened), and those that were edited or are
+    referenced, are left untouched.
+    """
+    today = today or timezone.localdate()
+    future = list(template.shifts.filter(date__gt=today))
+    Shift.objects.filter(id__in=untouched(future, template)).delete()
+
+
+def regenerate(template, previous=None, today=None):
+    """
+    Brings the template's future instances (after today) in line with an
+    edit. `previous` is the template as it was before the edit (default:
+    the template itself).
+
+    The old instances are matched to the new occurrences by date (and
+    employee, for role templates):
+      - untouched instances (see untouched()) on a date that is still
+        scheduled get the new time, location and employee;
+      - untouched instances on a date that dropped out are deleted;
+      - only the newly scheduled dates get new instances.
+    Edited or referenced instances are kept as they are and keep their
+    date. Updated or new instances that would conflict with other shifts
+    or leave are dropped, like materialize() does.
+
+    Returns {"created", "updated", "deleted", "skipped"} counts.
+    """
+    today = today or timezone.localdate()
+    until = horizon_end(today)
+    previous = previous or template
+
+    def slot(day, employee_id):
+        return (day, None) if template.employee_id else (day, employee_id)
+
+    with transaction.atomic():
+        wanted = {}
+        if template.is_active:
+            if template.employee_id:
+                employee_ids = [template.employee_id]
+            else:
+                employee_ids = current_role_members([template.role_id])[template.role_id]
+            for day in template.occurrences(today + timedelta(days=1), until):
+                for employee_id in employee_ids:
+                    wanted[slot(day, employee_id)] = employee_id
+
+        future = list(template.shifts.filter(date__gt=today))
+        editable = untouched(future, previous)
+        stale, updated, reassigned = [], [], set()
+        # Kept instances claim their date first.
+        for shift in sorted(future, key=lambda shift: shift.id in editable):
+            employee_id = wanted.pop(slot(shift.date, shift.employee_id), None)
+            if shift.id not in editable:
+                continue
+            if employee_id is None:
+                stale.append(shift.id)
+                continue
+            before = (shift.employee_id, shift.start_time, shift.end_time, shift.location)
+            shift.employee_id = employee_id
+            shift.start_time, shift.end_time = template.start_time, template.end_time
+            shift.location = template.location
+            if (shift.employee_id, shift.start_time, shift.end_time, shift.location) != before:
+                updated.append(shift)
+                if before[0] != employee_id:
+                    reassigned.add(shift.id)
+
+        created = [
+            Shift(
+                template=template,
+                employee_id=employee_id,
+                date=day,
+                start_time=template.start_time,
+                end_time=template.end_time,
+                location=template.location,
+            )
+            for (day, _), employee_id in wanted.items()
+        ]
+
+        Shift.objects.filter(id__in=stale).delete()
+        candidates = updated + created
+        for shift in candidates:
+            shift.sync_span()
+        conflicts = find_conflicts(
+            [(index, shift.employee_id, shift.start_at, shift.end_at) for index, shift in enumerate(candidates)],
+            exclude_shift_ids=[shift.id for shift in updated],
+        )
+        accepted = [shift for index, shift in enumerate(updated) if index not in conflicts]
+        dropped = [shift.id for index, shift in enumerate(updated) if index in conflicts]
+        Shift.objects.filter(id__in=dropped).delete()
+        now = timezone.now()
+        for shift in accepted:
+            shift.updated_at = now
+        Shift.objects.bulk_update(
+            accepted, ["employee", "start_time", "end_time", "location", "start_at", "end_at", "updated_at"],
+        )
+        # Reassigned instances are new to their employee.
+        Notification.objects.bulk_create([
+            build_shift_notification(shift) for shift in accepted if shift.id in reassigned
+        ])
+        inserted = save_shifts([
+            shift for index, shift in enumerate(created, len(updated)) if index not in conflicts
+        ])
+
+        template.materialized_until = until
+        template.save(update_fields=["materialized_until"])
+
+    return {
+        "created": len(inserted),
+        "updated": len(accepted),
+        "deleted": len(stale) + len(dropped),
+        "skipped": len(created) - len(inserted),
+    }
@@ -0,0 +1,233 @@
+# shifts/scheduler.py
+"""
+Automatic schedule generation.
+
+Staffing demand (location, time block, optional role, headcount) is
+turned into a proposed roster that respects approved leave, role
+qualifications, the weekly hour cap (SCHEDULE_MAX_WEEKLY_HOURS) and the
+minimum rest gap (SHIFT_MIN_REST_HOURS), while minimising labour cost at
+each employee's Role.pay_per_hour.
+
+Demand seats are processed in rounds of equal start time. For each round
+the feasibility mask and cost matrix (employees x seats) are built with
+NumPy in one shot and solved with the Hungarian algorithm
+(scipy.optimize.linear_sum_assignment). The round's assignments are then
+folded into the per-employee state before the next round.
+"""
+from collections import namedtuple
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+import numpy as np
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.utils import timezone
+from rest_framework import serializers
+from scipy.optimize import linear_sum_assignment
+
+from employee_leaves.models import LeaveRequest
+from roles.models import Role
+from roles.utils import current_role_by_user
+from .conflicts import leave_span
+from .models import Shift, shift_span
+
+User = get_user_model()
+
+# Cost given to infeasible (employee, seat) pairs.
+INFEASIBLE = 1e12
+# Tie-breaker added per hour already worked in the week, so equally cheap work is spread out.
+FAIRNESS_WEIGHT = 1e-3
+NO_ROLE = -1
+
+Seats = namedtuple("Seats", ["start", "end", "role", "week"])
+Busy = namedtuple("Busy", ["employee", "start", "end", "pad"])
+
+
+class DemandSerializer(serializers.Serializer):
+    """One block of staffing demand."""
+    date = serializers.DateField()
+    start_time = serializers.TimeField()
+    end_time = serializers.TimeField()
+    location = serializers.CharField(max_length=100)
+    role = serializers.PrimaryKeyRelatedField(queryset=Role.objects.all(), required=False, allow_null=True)
+    headcount = serializers.IntegerField(min_value=1, default=1)
+
+
+def solve(seats, emp_role, emp_rate, busy, week_hours, max_week_seconds, rest_seconds):
+    """
+    Pure NumPy/SciPy core of the generator.
+
+    seats       Seats of int64 arrays, one entry per seat: epoch start/end
+                seconds, required role id (NO_ROLE for any) and week index.
+    emp_role    int64 array (n_emp,) of each employee's role id (NO_ROLE if none).
+    emp_rate    float array (n_emp,) hourly rate.
+    busy        Busy of arrays: employee index, epoch start/end and padding
+                (the rest gap for shifts, 0 for leave) of existing commitments.
+    week_hours  float array (n_emp, n_weeks) of seconds already scheduled.
+
+    Returns an int64 array (n_seats,) with the employee index chosen for
+    each seat, or -1 when no employee can take it.
+    """
+    n_emp = len(emp_role)
+    assigned = np.full(len(seats.start), -1, dtype=np.int64)
+    week_hours = week_hours.astype(float).copy()
+    busy_emp, busy_start, busy_end, busy_pad = (np.asarray(column) for column in busy)
+
+    order = np.lexsort((seats.end, seats.start))
+    round_starts = np.flatnonzero(np.r_[True, np.diff(seats.start[order]) != 0])
+    round_ends = np.r_[round_starts[1:], len(order)]
+
+    for first, last in zip(round_starts, round_ends):
+        idx = order[first:last]
+        start, end = seats.start[idx], seats.end[idx]
+        duration = (end - start).astype(float)
+
+        # Role qualification and weekly cap.
+        feasible = (seats.role[idx][None, :] == NO_ROLE) | (emp_role[:, None] == seats.role[idx][None, :])
+        feasible &= week_hours[:, seats.week[idx]] + duration[None, :] <= max_week_seconds
+
+        # Overlap / rest gap against everything already on the employees' calendars.
+        near = (busy_start - busy_pad < end.max()) & (busy_end + busy_pad > start.min())
+        if near.any():
+            b_emp, b_start, b_end, b_pad = busy_emp[near], busy_start[near], busy_end[near], busy_pad[near]
+            clash = ((b_start - b_pad)[:, None] < end[None, :]) & ((b_end + b_pad)[:, None] > start[None, :])
+            blocked = np.zeros((n_emp, len(idx)), dtype=bool)
+            np.logical_or.at(blocked, b_emp, clash)
+            feasible &= ~blocked
+
+        candidates = np.flatnonzero(feasible.any(axis=1))
+        if not len(candidates):
+            continue
+
+        worked = week_hours[candidates][:, seats.week[idx]] / 3600
+        cost = emp_rate[candidates, None] * (duration[None, :] / 3600) + FAIRNESS_WEIGHT * worked
+        cost = np.where(feasible[candidates], cost, INFEASIBLE)
+
+        rows, cols = linear_sum_assignment(cost)
+        keep = cost[rows, cols] < INFEASIBLE
+        chosen, seat_cols = candidates[rows[keep]], cols[keep]
+        if not len(chosen):
+            continue
+
+        assigned[idx[seat_cols]] = chosen
+        np.add.at(week_hours, (chosen, seats.week[idx[seat_cols]]), duration[seat_cols])
+        busy_emp = np.r_[busy_emp, chosen]
+        busy_start = np.r_[busy_start, start[seat_cols]]
+        busy_end = np.r_[busy_end, end[seat_cols]]
+        busy_pad = np.r_[busy_pad, np.full(len(chosen), rest_seconds)]
+
+    return assigned
+
+
+def _epoch(value):
+    return int(value.timestamp())
+
+
+def generate_schedule(demand, employee_ids=None):
+    """
+    Builds a proposed roster for validated demand rows (DemandSerializer
+    output). Employees default to every active non-admin user.
+
+    Returns {"assignments": [...], "unfilled": [...], "total_cost": Decimal}
+    where each assignment carries an unsaved Shift under "shift".
+    """
+    rest_seconds = int(getattr(settings, "SHIFT_MIN_REST_HOURS", 0) * 3600)
+    max_week_seconds = float(getattr(settings, "SCHEDULE_MAX_WEEKLY_HOURS", 40)) * 3600
+    default_rate = Decimal(str(getattr(settings, "SCHEDULE_DEFAULT_HOURLY_RATE", "0")))
+
+    # Expand headcount into individual seats.
+    rows = []
+    for row in demand:
+        start_at, end_at = shift_span(row["date"], row["start_time"], row["end_time"])
+        rows.extend([(row, start_at, end_at)] * row["headcount"])
+    if not rows:
+        return {"assignments": [], "unfilled": [], "total_cost": Decimal("0.00")}
+
+    # Whole ISO weeks around the demand, so the weekly cap sees every shift of those weeks.
+    first_day = min(start_at for _, start_at, _ in rows).date()
+    last_day = max(end_at for _, _, end_at in rows).date()
+    window_start = timezone.make_aware(datetime.combine(first_day - timedelta(days=first_day.weekday()), datetime.min.time()))
+    window_end = timezone.make_aware(datetime.combine(last_day + timedelta(days=7 - last_day.weekday()), datetime.min.time()))
+    weeks = {}
+
+    def week_of(moment):
+        return weeks.setdefault(timezone.localtime(moment).isocalendar()[:2], len(weeks))
+
+    employees = User.objects.filter(is_active=True, is_staff=False)
+    if employee_ids is not None:
+        employees = employees.filter(id__in=employee_ids)
+    employees = list(employees.order_by("id").values_list("id", "email"))
+    position = {user_id: i for i, (user_id, _) in enumerate(employees)}
+
+    roles = current_role_by_user(position.keys())
+    rates = dict(Role.objects.values_list("id", "pay_per_hour"))
+    emp_role = np.array([roles.get(user_id, NO_ROLE) for user_id, _ in employees], dtype=np.int64)
+    emp_rate_decimal = [rates[roles[user_id]] if user_id in roles else default_rate for user_id, _ in employees]
+    emp_rate = np.array([float(rate) for rate in emp_rate_decimal], dtype=float)
+
+    seats = Seats(
+        start=np.array([_epoch(start_at) for _, start_at, _ in rows], dtype=np.int64),
+        end=np.array([_epoch(end_at) for _, _, end_at in rows], dtype=np.int64),
+        role=np.array([row["role"].id if row.get("role") else NO_ROLE for row, _, _ in rows], dtype=np.int64),
+        week=np.array([week_of(start_at) for _, start_at, _ in rows], dtype=np.int64),
+    )
+
+    busy = ([], [], [], [])
+    existing = (
+        Shift.objects.overlapping(window_start - timedelta(seconds=rest_seconds), window_end)
+        .filter(employee_id__in=position.keys())
+        .exclude(status="cancelled")
+        .values_list("employee_id", "start_at", "end_at")
+    )
+    existing_hours = []
+    for employee_id, start_at, end_at in existing:
+        busy[0].append(position[employee_id])
+        busy[1].append(_epoch(start_at))
+        busy[2].append(_epoch(end_at))
+        busy[3].append(rest_seconds)
+        if window_start <= start_at < window_end:
+            existing_hours.append((position[employee_id], week_of(start_at), (end_at - start_at).total_seconds()))
+
+    leaves = LeaveRequest.objects.filter(
+        employee_id__in=position.keys(), status="approved",
+        shift_date__gte=first_day - timedelta(days=1), shift_date__lte=last_day,
+    ).values_list("employee_id", "shift_date", "shift_time")
+    for employee_id, shift_date, shift_time in leaves:
+        start_at, end_at = leave_span(shift_date, shift_time)
+        busy[0].append(position[employee_id])
+        busy[1].append(_epoch(start_at))
+        busy[2].append(_epoch(end_at))
+        busy[3].append(0)
+
+    week_hours = np.zeros((len(employees), len(weeks)), dtype=float)
+    for employee_index, week, seconds in existing_hours:
+        week_hours[employee_index, week] += seconds
+
+    assigned = solve(
+        seats, emp_role, emp_rate,
+        Busy(*(np.array(column, dtype=np.int64) for column in busy)),
+        week_hours, max_week_seconds, rest_seconds,
+    ) if employees else np.full(len(rows), -1)
+
+    assignments, unfilled = [], []
+    total = Decimal("0.00")
+    for seat, (row, start_at, end_at) in enumerate(rows):
+        block = {
+            "date": row["date"], "start_time": row["start_time"], "end_time": row["end_time"],
+            "location": row["location"], "role": row["role"].id if row.get("role") else None,
+        }
+        employee_index = int(assigned[seat])
+        if employee_index < 0:
+            unfilled.append(block)
+            continue
+        user_id, email = employees[employee_index]
+        hours = Decimal(str((end_at - start_at).total_seconds() / 3600))
+        cost = (emp_rate_decimal[employee_index] * hours).quantize(Decimal("0.01"))
+        total += cost
+        assignments.append(dict(
+            block, employee=user_id, employee_email=email, cost=cost,
+            shift=Shift(employee_id=user_id, date=row["date"], start_time=row["start_time"],
+                        end_time=row["end_time"], location=row["location"]),
+        ))
+
+    return {"assignments": assignments, "unfilled": unfilled, "total_cost": total}
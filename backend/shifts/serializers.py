@@ -1,6 +1,7 @@
 # shifts/serializers.py
 from rest_framework import serializers
-from .models import Shift
+from .models import Shift, ShiftTemplate, shift_span
+from .conflicts import find_conflicts
 
 class ShiftSerializer(serializers.ModelSerializer):
     employee_email = serializers.ReadOnlyField(source='employee.email')
@@ -20,4 +21,78 @@ class ShiftSerializer(serializers.ModelSerializer):
             'employee_id_code',
             'location',
             'status',
+            'start_at',
+            'end_at',
+            'template',
         ]
+        read_only_fields = ['start_at', 'end_at', 'template']
+
+    def validate(self, attrs):
+        """
+        Reject shifts that overlap the employee's other shifts, leave them
+        too little rest, or fall inside an approved leave request.
+        Only runs when the timing or the employee actually changes, or
+        when a cancelled shift is reinstated.
+        """
+        instance = self.instance
+        timing_fields = ('date', 'start_time', 'end_time', 'employee')
+        reinstated = (
+            instance is not None and instance.status == 'cancelled' and attrs.get('status', 'cancelled') != 'cancelled'
+        )
+        if instance is not None and not reinstated and all(
+            field not in attrs or attrs[field] == getattr(instance, field) for field in timing_fields
+        ):
+            return attrs
+
+        def current(field):
+            return attrs[field] if field in attrs else getattr(instance, field, None)
+
+        if current('status') == 'cancelled':
+            return attrs
+
+        start_at, end_at = shift_span(current('date'), current('start_time'), current('end_time'))
+        conflicts = find_conflicts(
+            [(0, current('employee').id, start_at, end_at)],
+            exclude_shift_ids=[instance.id] if instance is not None else (),
+        )
+        if conflicts:
+            raise serializers.ValidationError({"conflicts": [conflict["message"] for conflict in conflicts[0]]})
+        return attrs
+
+
+class ShiftTemplateSerializer(serializers.ModelSerializer):
+    employee_email = serializers.ReadOnlyField(source='employee.email')
+    role_name = serializers.ReadOnlyField(source='role.name')
+
+    class Meta:
+        model = ShiftTemplate
+        fields = [
+            'id',
+            'employee',
+            'employee_email',
+            'role',
+            'role_name',
+            'weekday',
+            'start_time',
+            'end_time',
+            'location',
+            'interval_weeks',
+            'starts_on',
+            'ends_on',
+            'is_active',
+            'materialized_until',
+            'created_at',
+        ]
+        read_only_fields = ['materialized_until', 'created_at']
+
+    def validate(self, attrs):
+        def current(field):
+            return attrs[field] if field in attrs else getattr(self.instance, field, None)
+
+        if (current('employee') is None) == (current('role') is None):
+            raise serializers.ValidationError("Set exactly one of 'employee' or 'role'.")
+        if current('interval_weeks') is not None and current('interval_weeks') < 1:
+            raise serializers.ValidationError({"interval_weeks": "Must be at least 1."})
+        if current('ends_on') and current('starts_on') and current('ends_on') < current('starts_on'):
+            raise serializers.ValidationError({"ends_on": "Must be on or after starts_on."})
+        return attrs
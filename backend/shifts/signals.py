@@ -5,12 +5,21 @@ from django.conf import settings
 from .models import Shift
 from notifications.models import Notification
 
+
+def build_shift_notification(shift):
+    """
+    Returns an unsaved Notification telling the employee about a new shift.
+    Shared by the post_save receiver and the bulk creation path.
+    """
+    return Notification(
+        recipient_id=shift.employee_id,
+        notification_type='shift',
+        message=f"A new shift has been created for you on {shift.date}."
+    )
+
+
 @receiver(post_save, sender=Shift)
 def shift_created_notification(sender, instance, created, **kwargs):
     if created:
         # Create notification for the employee and/or admin
-        Notification.objects.create(
-            recipient=instance.employee,
-            notification_type='shift',
-            message=f"A new shift has been created for you on {instance.date}."
-        )
+        build_shift_notification(instance).save()
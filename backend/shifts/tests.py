@@ -1,3 +1,786 @@
-from django.test import TestCase
+import shutil
+import tempfile
+from copy import copy
+from datetime import date, datetime, time, timedelta
+from importlib import import_module
+from unittest import skipUnless
 
-# Create your tests here.
+from django.apps import apps as django_apps
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from employee_leaves.models import LeaveRequest
+from notifications.models import Notification
+from roles.models import Role, UserRoleAssignment
+from swaps.models import SwapShiftRequest
+from shiftwise_backend.testing import QueryBudgetMixin, api_client, make_admin, make_users, query_plan
+from .bulk import MAX_BULK_ROWS
+from .models import Shift, ShiftImport, ShiftTemplate
+from .recurrence import materialize, regenerate
+
+
+def make_shifts(employees, count, location="Main"):
+    """Bulk-creates `count` shifts spread over the given employees."""
+    shifts = [
+        Shift(
+            employee=employees[i % len(employees)],
+            date=date(2025, 1, 6) + timedelta(days=i % 28),
+            start_time=time(9),
+            end_time=time(17),
+            location=location,
+        )
+        for i in range(count)
+    ]
+    for shift in shifts:
+        shift.sync_span()
+    return Shift.objects.bulk_create(shifts)
+
+
+class ShiftListQueryBudgetTests(QueryBudgetMixin, TestCase):
+    def setUp(self):
+        self.admin = make_admin()
+        self.employee = make_users(1, prefix="staff")[0]
+
+    def test_admin_shift_list(self):
+        employees = make_users(20)
+        self.assertQueryBudget(
+            api_client(self.admin), "/api/shifts/", 1,
+            lambda rows: make_shifts(employees, rows),
+        )
+
+    def test_admin_manage_shifts(self):
+        employees = make_users(20)
+        self.assertQueryBudget(
+            api_client(self.admin), "/api/shifts/admin-shifts/", 1,
+            lambda rows: make_shifts(employees, rows),
+        )
+
+    def test_my_shifts(self):
+        self.assertQueryBudget(
+            api_client(self.employee), "/api/shifts/my-shifts/", 1,
+            lambda rows: make_shifts([self.employee], rows),
+        )
+
+
+
+class ShiftSpanTests(TestCase):
+    def setUp(self):
+        self.employee = make_users(1)[0]
+
+    def make_shift(self, start, end, day=date(2025, 1, 6)):
+        return Shift.objects.create(employee=self.employee, date=day, start_time=start, end_time=end, location="Main")
+
+    def at(self, day, hour, minute=0):
+        return timezone.make_aware(datetime(2025, 1, day, hour, minute))
+
+    def test_save_derives_the_span_and_rolls_overnight_shifts(self):
+        day = self.make_shift(time(9), time(17))
+        overnight = self.make_shift(time(22), time(6))
+        full_day = self.make_shift(time(8), time(8), day=date(2025, 1, 8))
+
+        self.assertEqual((day.start_at, day.end_at), (self.at(6, 9), self.at(6, 17)))
+        self.assertEqual((overnight.start_at, overnight.end_at), (self.at(6, 22), self.at(7, 6)))
+        self.assertEqual((full_day.start_at, full_day.end_at), (self.at(8, 8), self.at(9, 8)))
+
+    def test_update_fields_keep_the_span_in_sync(self):
+        shift = self.make_shift(time(9), time(17))
+        shift.date, shift.end_time = date(2025, 1, 10), time(8)
+        shift.save(update_fields=["date", "end_time"])
+        self.assertEqual(
+            Shift.objects.values_list("start_at", "end_at").get(pk=shift.pk), (self.at(10, 9), self.at(11, 8))
+        )
+
+        # Fields unrelated to timing leave the span alone but still bump updated_at.
+        before = Shift.objects.get(pk=shift.pk).updated_at
+        shift.status = "confirmed"
+        shift.save(update_fields=["status"])
+        saved = Shift.objects.get(pk=shift.pk)
+        self.assertEqual((saved.status, saved.start_at), ("confirmed", self.at(10, 9)))
+        self.assertGreater(saved.updated_at, before)
+
+    def test_overlapping_treats_the_span_as_half_open(self):
+        day = self.make_shift(time(9), time(17))
+        overnight = self.make_shift(time(22), time(6))
+
+        def found(start, end):
+            return set(Shift.objects.overlapping(start, end).values_list("id", flat=True))
+
+        self.assertEqual(found(self.at(6, 17), self.at(6, 22)), set())
+        self.assertEqual(found(self.at(6, 8), self.at(6, 9)), set())
+        self.assertEqual(found(self.at(6, 16, 59), self.at(6, 22, 1)), {day.id, overnight.id})
+        self.assertEqual(found(self.at(7, 5), self.at(7, 7)), {overnight.id})
+
+    def test_backfill_migration_populates_missing_spans(self):
+        populate = import_module("shifts.migrations.0006_populate_shift_start_at_end_at").populate_span
+        self.make_shift(time(9), time(17))
+        self.make_shift(time(22), time(6), day=date(2025, 1, 7))
+        Shift.objects.update(start_at=None, end_at=None)
+
+        populate(django_apps, None)
+
+        self.assertEqual(
+            list(Shift.objects.order_by("pk").values_list("start_at", "end_at")),
+            [(self.at(6, 9), self.at(6, 17)), (self.at(7, 22), self.at(8, 6))],
+        )
+
+
+class ShiftPaginationTests(TestCase):
+    def setUp(self):
+        self.client = api_client(make_admin())
+        self.employees = make_users(3)
+
+    def pages(self, url, **params):
+        """Follows the next links from `url`; returns the pages' shift ids."""
+        pages = []
+        response = self.client.get(url, params)
+        while True:
+            self.assertEqual(response.status_code, 200)
+            pages.append([shift["id"] for shift in response.data["results"]])
+            if response.data["next"] is None:
+                return pages
+            response = self.client.get(response.data["next"])
+
+    def test_keyset_pages_follow_date_start_time_and_id(self):
+        # Ties on (date, start_time) across employees, inserted out of order.
+        shifts = make_shifts(self.employees, 9)[::-1]
+        for shift in shifts[:4]:
+            shift.start_time = time(7)
+            shift.save()
+        expected = list(Shift.objects.order_by("date", "start_time", "id").values_list("id", flat=True))
+
+        pages = self.pages("/api/shifts/", page_size=2)
+
+        self.assertEqual([len(page) for page in pages], [2, 2, 2, 2, 1])
+        self.assertEqual([shift_id for page in pages for shift_id in page], expected)
+        # Without cursor or page_size the full list is returned, unpaginated.
+        self.assertEqual([shift["id"] for shift in self.client.get("/api/shifts/").data], expected)
+
+    def test_filters_combine_with_pagination(self):
+        make_shifts(self.employees, 10)
+        make_shifts(self.employees, 10, location="North")
+        Shift.objects.filter(location="North", date=date(2025, 1, 7)).update(status="cancelled")
+
+        def ids(**params):
+            return [shift_id for page in self.pages("/api/shifts/", page_size=3, **params) for shift_id in page]
+
+        self.assertEqual(
+            set(ids(date_from="2025-01-08", date_to="2025-01-10")),
+            set(Shift.objects.filter(date__range=(date(2025, 1, 8), date(2025, 1, 10))).values_list("id", flat=True)),
+        )
+        self.assertEqual(
+            set(ids(location="North")), set(Shift.objects.filter(location="North").values_list("id", flat=True))
+        )
+        self.assertEqual(
+            set(ids(location="North", status="cancelled")),
+            set(Shift.objects.filter(status="cancelled").values_list("id", flat=True)),
+        )
+        self.assertEqual(self.client.get("/api/shifts/", {"date_from": "08/01/2025"}).status_code, 400)
+
+    @skipUnless(connection.vendor == "sqlite", "reads SQLite query plans")
+    def test_deep_pages_seek_on_the_index(self):
+        make_shifts(self.employees, 30)
+        for client, url, index in (
+            (self.client, "/api/shifts/", "shift_date_start_id_idx (date>?)"),
+            (
+                api_client(self.employees[0]), "/api/shifts/my-shifts/",
+                "shift_emp_date_start_id_idx (employee_id=? AND date>?)",
+            ),
+        ):
+            deep = client.get(url, {"page_size": 2}).data["next"]
+            self.assertIn(f"SEARCH shifts_shift USING INDEX {index}", query_plan(client, deep, "shifts_shift"))
+
+    def test_invalid_cursors_are_not_found(self):
+        make_shifts(self.employees, 3)
+        for cursor in ("e30=", "W10=", "bm90IGpzb24=", "WyIyMDI1LTAxLTA2IiwiMDk6MDAiXQ==", "%%%"):
+            with self.subTest(cursor=cursor):
+                self.assertEqual(self.client.get("/api/shifts/", {"cursor": cursor}).status_code, 404)
+
+
+class ShiftConflictTests(TestCase):
+    def setUp(self):
+        self.admin = make_admin()
+        self.employee = make_users(1, prefix="staff")[0]
+        self.client = api_client(self.admin)
+        self.existing = Shift.objects.create(
+            employee=self.employee, date=date(2025, 1, 6), start_time=time(9), end_time=time(17), location="Main",
+        )
+
+    def post_shift(self, **overrides):
+        data = {
+            "employee": self.employee.id, "date": "2025-01-06", "start_time": "09:00",
+            "end_time": "17:00", "location": "Main",
+        }
+        data.update(overrides)
+        return self.client.post("/api/shifts/", data, format="json")
+
+    def test_overlapping_shift_is_rejected(self):
+        response = self.post_shift(start_time="15:00", end_time="20:00")
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()["conflicts"], ["Overlaps another shift from 2025-01-06 09:00 to 2025-01-06 17:00."])
+
+    def test_short_rest_gap_is_rejected(self):
+        response = self.post_shift(start_time="20:00", end_time="23:00")
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("hours of rest", response.json()["conflicts"][0])
+
+    def test_overnight_shift_conflicts_with_next_morning(self):
+        response = self.post_shift(date="2025-01-05", start_time="22:00", end_time="10:00")
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("Overlaps another shift", response.json()["conflicts"][0])
+
+    def test_shift_during_approved_leave_is_rejected(self):
+        LeaveRequest.objects.create(
+            employee=self.employee, shift_date=date(2025, 1, 8), shift_time="morning",
+            location="Main", reason="Appointment", status="approved",
+        )
+        response = self.post_shift(date="2025-01-08", start_time="08:00", end_time="11:00")
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()["conflicts"], ["Overlaps approved leave from 2025-01-08 06:00 to 2025-01-08 12:00."])
+
+    def test_non_conflicting_shift_is_created(self):
+        self.assertEqual(self.post_shift(date="2025-01-07").status_code, 201)
+
+    def test_update_does_not_conflict_with_itself(self):
+        response = self.client.patch(
+            f"/api/shifts/{self.existing.id}/", {"end_time": "18:00"}, format="json",
+        )
+        self.assertEqual(response.status_code, 200)
+
+    def test_reinstating_a_cancelled_shift_is_checked_for_conflicts(self):
+        cancelled = Shift.objects.create(
+            employee=self.employee, date=date(2025, 1, 6), start_time=time(12), end_time=time(20), location="Main",
+            status="cancelled",
+        )
+        response = self.client.patch(f"/api/shifts/{cancelled.id}/", {"status": "confirmed"}, format="json")
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("Overlaps another shift", response.json()["conflicts"][0])
+        cancelled.refresh_from_db()
+        self.assertEqual(cancelled.status, "cancelled")
+
+        # Once the conflicting shift is gone it can be reinstated.
+        self.existing.delete()
+        response = self.client.patch(f"/api/shifts/{cancelled.id}/", {"status": "pending"}, format="json")
+        self.assertEqual(response.status_code, 200)
+
+    def test_bulk_rejects_later_conflicting_row_only(self):
+        row = {"email": self.employee.email, "date": "2025-01-10", "start_time": "09:00", "end_time": "17:00",
+               "location": "Main"}
+        response = self.client.post("/api/shifts/bulk-create/", {"shifts": [
+            row, dict(row, start_time="12:00", end_time="20:00"), dict(row, date="2025-01-06"),
+        ]}, format="json")
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(len(response.json()["created"]), 1)
+        self.assertEqual([error["row"] for error in response.json()["errors"]], [1, 2])
+        self.assertEqual(response.json()["errors"][0]["errors"]["conflicts"][0]["row"], 0)
+        self.assertEqual(response.json()["errors"][1]["errors"]["conflicts"][0]["shift"], self.existing.id)
+
+
+class BulkCreateShiftTests(TestCase):
+    def setUp(self):
+        self.client = api_client(make_admin())
+
+    def rows(self, employees, **overrides):
+        return [
+            dict({"email": employee.email, "date": "2025-02-03", "start_time": "09:00", "end_time": "17:00",
+                  "location": "Main"}, **overrides)
+            for employee in employees
+        ]
+
+    def post(self, rows):
+        return self.client.post("/api/shifts/bulk-create/", {"shifts": rows}, format="json")
+
+    def test_creates_the_valid_rows_and_reports_the_others(self):
+        first, second = self.rows(make_users(2))
+        rows = [first, dict(first, email="nobody@example.com"), dict(first, date="not a date"), second]
+
+        # Employees, existing shifts, approved leave, then one INSERT each for the shifts and
+        # their notifications inside a savepoint.
+        with self.assertNumQueries(7):
+            response = self.post(rows)
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(len(response.json()["created"]), 2)
+        errors = response.json()["errors"]
+        self.assertEqual([error["row"] for error in errors], [1, 2])
+        self.assertEqual(errors[0]["errors"], {"email": ["User not found. Please sign up first."]})
+        self.assertIn("date", errors[1]["errors"])
+        self.assertEqual(Shift.objects.count(), 2)
+        self.assertEqual(Notification.objects.filter(notification_type="shift").count(), 2)
+
+    def test_query_count_does_not_grow_with_rows(self):
+        counts = []
+        for size in (5, 50):
+            with CaptureQueriesContext(connection) as queries:
+                response = self.post(self.rows(make_users(size)))
+            self.assertEqual(len(response.json()["created"]), size)
+            counts.append(len(queries))
+        self.assertEqual(counts[0], counts[1])
+
+    def test_rejects_batches_over_the_row_limit(self):
+        response = self.post([{}] * (MAX_BULK_ROWS + 1))
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(self.post([]).status_code, 400)
+        self.assertFalse(Shift.objects.exists())
+
+
+class ShiftTemplateTests(TestCase):
+    def setUp(self):
+        self.admin = make_admin()
+        self.employee = make_users(1, prefix="staff")[0]
+        self.client = api_client(self.admin)
+        self.today = date(2025, 1, 6)  # a Monday
+
+    def make_template(self, **fields):
+        values = dict(employee=self.employee, weekday=2, start_time=time(9), end_time=time(17),
+                      location="Main", starts_on=date(2025, 1, 1))
+        values.update(fields)
+        return ShiftTemplate.objects.create(**values)
+
+    def test_materializes_only_the_horizon_then_extends_incrementally(self):
+        template = self.make_template()
+        self.assertEqual(materialize(today=self.today), {"created": 4, "skipped": 0})
+        self.assertEqual(
+            list(template.shifts.order_by("date").values_list("date", flat=True)),
+            [date(2025, 1, 8), date(2025, 1, 15), date(2025, 1, 22), date(2025, 1, 29)],
+        )
+        # Nothing new on the same day; one more week a week later.
+        self.assertEqual(materialize(today=self.today)["created"], 0)
+        self.assertEqual(materialize(today=self.today + timedelta(days=7))["created"], 1)
+
+    def test_biweekly_role_template(self):
+        role = Role.objects.create(name="Cook", pay_per_hour=20)
+        cooks = make_users(2, prefix="cook")
+        for cook in cooks:
+            UserRoleAssignment.objects.create(user=cook, role=role)
+        template = self.make_template(employee=None, role=role, interval_weeks=2)
+        self.assertEqual(materialize(today=self.today)["created"], 4)
+        self.assertEqual(set(template.shifts.values_list("employee_id", flat=True)), {cook.id for cook in cooks})
+
+    def test_editing_regenerates_only_future_instances(self):
+        template = self.make_template(weekday=0)
+        materialize(today=self.today)
+        today_shift = template.shifts.get(date=self.today)
+
+        previous = copy(template)
+        template.start_time = time(10)
+        template.save()
+        regenerate(template, previous, today=self.today)
+
+        self.assertTrue(Shift.objects.filter(pk=today_shift.pk, start_time=time(9)).exists())
+        future = template.shifts.filter(date__gt=self.today)
+        self.assertEqual(future.count(), 4)
+        self.assertEqual(set(future.values_list("start_time", flat=True)), {time(10)})
+
+    def test_edit_keeps_edited_and_referenced_instances(self):
+        template = self.make_template(weekday=0)
+        materialize(today=self.today)
+        edited, swapped, plain, confirmed = template.shifts.filter(date__gt=self.today).order_by("date")
+        Shift.objects.filter(pk=edited.pk).update(end_time=time(18))
+        Shift.objects.filter(pk=confirmed.pk).update(status="confirmed")
+        other = Shift.objects.create(
+            employee=make_users(1, prefix="other")[0], date=swapped.date, start_time=time(18), end_time=time(22),
+            location="Main",
+        )
+        swap = SwapShiftRequest.objects.create(requested_by=self.employee, give_up_shift=swapped, desired_shift=other)
+
+        # An unrelated edit only moves the untouched instance.
+        previous = copy(template)
+        template.location = "Annex"
+        template.save()
+        result = regenerate(template, previous, today=self.today)
+
+        self.assertEqual(result, {"created": 0, "updated": 1, "deleted": 0, "skipped": 0})
+        self.assertTrue(SwapShiftRequest.objects.filter(pk=swap.pk).exists())
+        future = template.shifts.filter(date__gt=self.today).order_by("date")
+        self.assertEqual(
+            list(future.values_list("id", "end_time", "location")),
+            [(edited.id, time(18), "Main"), (swapped.id, time(17), "Main"), (plain.id, time(17), "Annex"),
+             (confirmed.id, time(17), "Main")],
+        )
+
+    def test_edit_only_replaces_the_dates_that_changed(self):
+        template = self.make_template(weekday=0)
+        materialize(today=self.today)
+        first, second, third, fourth = template.shifts.filter(date__gt=self.today).order_by("date")
+        Shift.objects.filter(pk=first.pk).update(location="Annex")
+
+        # Every other week: the 13th (edited, kept) and the 27th (deleted) drop out.
+        previous = copy(template)
+        template.interval_weeks = 2
+        template.save()
+        regenerate(template, previous, today=self.today)
+        self.assertEqual(
+            list(template.shifts.filter(date__gt=self.today).order_by("date").values_list("id", flat=True)),
+            [first.id, second.id, fourth.id],
+        )
+
+        # Moving to Tuesdays replaces the untouched instances with new ones.
+        previous = copy(template)
+        template.weekday = 1
+        template.save()
+        self.assertEqual(
+            regenerate(template, previous, today=self.today), {"created": 2, "updated": 0, "deleted": 2, "skipped": 0},
+        )
+        future = template.shifts.filter(date__gt=self.today).order_by("date")
+        self.assertEqual(
+            list(future.values_list("date", flat=True)),
+            [date(2025, 1, 7), date(2025, 1, 13), date(2025, 1, 21)],
+        )
+        self.assertEqual(future[1].id, first.id)
+        self.assertNotIn(second.id, future.values_list("id", flat=True))
+
+    def test_reassigning_moves_untouched_instances_to_the_new_employee(self):
+        template = self.make_template(weekday=0)
+        materialize(today=self.today)
+        newcomer = make_users(1, prefix="new")[0]
+
+        previous = copy(template)
+        template.employee = newcomer
+        template.save()
+        self.assertEqual(regenerate(template, previous, today=self.today)["updated"], 4)
+
+        self.assertEqual(template.shifts.filter(date__gt=self.today, employee=newcomer).count(), 4)
+        self.assertEqual(Notification.objects.filter(recipient=newcomer).count(), 4)
+
+    def test_template_api_requires_employee_or_role(self):
+        response = self.client.post("/api/shifts/templates/", {
+            "weekday": 1, "start_time": "09:00", "end_time": "17:00", "location": "Main", "starts_on": "2025-01-01",
+        }, format="json")
+        self.assertEqual(response.status_code, 400)
+
+
+class ScheduleGeneratorTests(TestCase):
+    def setUp(self):
+        self.admin = make_admin()
+        self.client = api_client(self.admin)
+        self.cheap, self.pricey, self.cook = make_users(3, prefix="staff")
+        cashier = Role.objects.create(name="Cashier", pay_per_hour=15)
+        senior = Role.objects.create(name="Senior Cashier", pay_per_hour=30)
+        self.kitchen = Role.objects.create(name="Cook", pay_per_hour=20)
+        UserRoleAssignment.objects.create(user=self.cheap, role=cashier)
+        UserRoleAssignment.objects.create(user=self.pricey, role=senior)
+        UserRoleAssignment.objects.create(user=self.cook, role=self.kitchen)
+
+    def generate(self, demand, **extra):
+        return self.client.post("/api/shifts/generate/", dict(demand=demand, **extra), format="json")
+
+    def test_assigns_cheapest_qualified_employees(self):
+        response = self.generate([
+            {"date": "2025-01-06", "start_time": "09:00", "end_time": "17:00", "location": "Main", "headcount": 2},
+            {"date": "2025-01-06", "start_time": "09:00", "end_time": "17:00", "location": "Kitchen",
+             "role": self.kitchen.id},
+        ])
+        self.assertEqual(response.status_code, 200)
+        by_location = {}
+        for assignment in response.data["assignments"]:
+            by_location.setdefault(assignment["location"], set()).add(assignment["employee"])
+        self.assertEqual(by_location, {"Main": {self.cheap.id, self.pricey.id}, "Kitchen": {self.cook.id}})
+        self.assertEqual(response.data["total_cost"], 8 * (15 + 30 + 20))
+
+    def test_respects_leave_and_rest_then_commits(self):
+        LeaveRequest.objects.create(
+            employee=self.cheap, shift_date=date(2025, 1, 6), shift_time="morning",
+            location="Main", reason="Appointment", status="approved",
+        )
+        response = self.generate([
+            {"date": "2025-01-06", "start_time": "08:00", "end_time": "12:00", "location": "Main"},
+            {"date": "2025-01-06", "start_time": "14:00", "end_time": "18:00", "location": "Main", "headcount": 3},
+        ], commit=True)
+        self.assertEqual(response.status_code, 201)
+        morning = [a for a in response.data["assignments"] if a["start_time"] == time(8)]
+        self.assertEqual(morning[0]["employee"], self.cook.id)
+        # The cook needs 8 hours of rest after the morning block, so one afternoon seat stays open.
+        self.assertEqual(len(response.data["unfilled"]), 1)
+        self.assertEqual(response.data["created"], 3)
+        self.assertEqual(Shift.objects.count(), 3)
+
+    def test_rejects_malformed_employee_ids(self):
+        demand = [{"date": "2025-01-06", "start_time": "09:00", "end_time": "17:00", "location": "Main"}]
+        for employees in (["abc"], "abc", 5, [None]):
+            response = self.generate(demand, employees=employees)
+            self.assertEqual(response.status_code, 400)
+            self.assertIn("employees", response.data)
+        response = self.generate(demand, employees=[str(self.cook.id)])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["assignments"][0]["employee"], self.cook.id)
+
+
+class CalendarFeedTests(TestCase):
+    def setUp(self):
+        self.employee = make_users(1, prefix="staff")[0]
+        self.shift = Shift.objects.create(
+            employee=self.employee, date=timezone.localdate() + timedelta(days=1),
+            start_time=time(22), end_time=time(6), location="Main, Front desk",
+        )
+        api = api_client(self.employee)
+        self.url = api.get("/api/shifts/calendar/token/").data["url"]
+
+    def test_feed_contains_shift_events(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Content-Type"], "text/calendar; charset=utf-8")
+        body = b"".join(response.streaming_content).decode()
+        self.assertIn(f"UID:shift-{self.shift.id}@testserver\r\n", body)
+        self.assertIn(f"DTEND:{self.shift.end_at:%Y%m%dT%H%M%SZ}\r\n", body)
+        self.assertIn("LOCATION:Main\\, Front desk\r\n", body)
+
+    def test_unchanged_feed_returns_304_without_reading_shifts(self):
+        etag = self.client.get(self.url)["ETag"]
+        with self.assertNumQueries(2):
+            response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+        self.shift.location = "Warehouse"
+        self.shift.save()
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_rotated_token_invalidates_old_url(self):
+        api = api_client(self.employee)
+        new_url = api.post("/api/shifts/calendar/token/").data["url"]
+        self.assertEqual(self.client.get(self.url).status_code, 404)
+        self.assertEqual(self.client.get(new_url).status_code, 200)
+
+
+class ShiftImportTests(TestCase):
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root)
+        settings_override = override_settings(MEDIA_ROOT=self.media_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        self.admin = make_admin()
+        self.alice, self.bob = make_users(2)
+        self.api = api_client(self.admin)
+
+    def upload(self, lines, **data):
+        content = "\n".join(lines).encode()
+        upload = SimpleUploadedFile("shifts.csv", content, content_type="text/csv")
+        return self.api.post("/api/shifts/import/", {"file": upload, **data}, format="multipart")
+
+    def test_imports_valid_rows_and_reports_rejected_ones(self):
+        response = self.upload([
+            "email,id_code,date,start_time,end_time,location",
+            f"{self.alice.email},,2025-03-03,09:00,17:00,Main",
+            f",{self.bob.id_code},2025-03-03,09:00,17:00,Main",
+            "nobody@example.com,,2025-03-03,09:00,17:00,Main",
+            f"{self.bob.email},,not-a-date,09:00,17:00,Main",
+            # Overlaps Alice's first row, which was inserted by an earlier batch.
+            f"{self.alice.email},,2025-03-03,12:00,20:00,Main",
+        ], batch_size=2)
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual((response.data["rows"], response.data["created"], response.data["rejected"]), (5, 2, 3))
+        self.assertEqual(Shift.objects.count(), 2)
+        self.assertEqual(set(Shift.objects.values_list("employee_id", flat=True)), {self.alice.id, self.bob.id})
+
+        shift_import = ShiftImport.objects.get(pk=response.data["id"])
+        self.assertEqual(shift_import.rejected_count, 3)
+
+        report = self.api.get(response.data["error_report"])
+        self.assertEqual(report.status_code, 200)
+        lines = b"".join(report.streaming_content).decode().splitlines()
+        self.assertEqual(lines[0], "line,email,id_code,date,start_time,end_time,location,errors")
+        self.assertEqual([line.split(",")[0] for line in lines[1:]], ["4", "5", "6"])
+        self.assertIn("overlap", lines[3])
+
+    def test_rejects_file_without_required_columns(self):
+        response = self.upload(["email,date,location", f"{self.alice.email},2025-03-03,Main"])
+
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("start_time", response.data["error"])
+        self.assertFalse(ShiftImport.objects.exists())
+
+    def test_undecodable_header_is_rejected(self):
+        upload = SimpleUploadedFile("shifts.csv", b"\xffemail,date\n", content_type="text/csv")
+        response = self.api.post("/api/shifts/import/", {"file": upload}, format="multipart")
+
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("could not be decoded", response.data["error"])
+        self.assertFalse(ShiftImport.objects.exists())
+
+    def test_decode_error_mid_file_records_the_partial_import(self):
+        lines = ["email,date,start_time,end_time,location"] + [
+            f"{(self.alice, self.bob)[i % 2].email},{date(2025, 3, 1) + timedelta(days=i // 2)},09:00,17:00,Main"
+            for i in range(300)
+        ]
+        # The bytes are decoded in 8 KiB blocks: the first batch is imported
+        # before the block holding the bad byte is read.
+        content = "\n".join(lines).encode() + b"\n" + f"{self.bob.email},2025-09-01,09:00,17:00,".encode() + b"\xff\n"
+        upload = SimpleUploadedFile("shifts.csv", content, content_type="text/csv")
+        response = self.api.post("/api/shifts/import/", {"file": upload, "batch_size": 100}, format="multipart")
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual((response.data["rows"], response.data["created"]), (100, 100))
+        self.assertIn("stopped at line 102", response.data["error"])
+        self.assertEqual(Shift.objects.count(), 100)
+        shift_import = ShiftImport.objects.get(pk=response.data["id"])
+        self.assertEqual((shift_import.total_rows, shift_import.created_count), (100, 100))
+
+    def test_queries_grow_with_batches_not_rows(self):
+        lines = ["email,date,start_time,end_time,location"] + [
+            f"{(self.alice, self.bob)[i % 2].email},{date(2025, 3, 1) + timedelta(days=i // 2)},09:00,17:00,Main"
+            for i in range(200)
+        ]
+        # The employee directory, then per batch: conflict lookups (2) and the
+        # insert transaction (5 on SQLite), then the import record.
+        with self.assertNumQueries(1 + 2 * 7 + 1):
+            response = self.upload(lines, batch_size=100)
+
+        self.assertEqual(response.data["created"], 200)
+        self.assertFalse(response.data["error_report"])
+
+
+class ShiftExportTests(TestCase):
+    def setUp(self):
+        self.admin = make_admin()
+        self.employees = make_users(3)
+        self.api = api_client(self.admin)
+
+    def test_streams_filtered_shifts_in_one_query(self):
+        make_shifts(self.employees, 28)
+
+        with self.assertNumQueries(1):
+            response = self.api.get("/api/shifts/export/", {"date_from": "2025-01-10", "date_to": "2025-01-12"})
+            lines = b"".join(response.streaming_content).decode().splitlines()
+
+        self.assertEqual(response["Content-Type"], "text/csv")
+        self.assertIn('filename="shifts.csv"', response["Content-Disposition"])
+        self.assertEqual(lines[0], "id,date,start_time,end_time,employee_email,employee_id_code,location,status,template")
+        self.assertEqual([line.split(",")[1] for line in lines[1:]], ["2025-01-10", "2025-01-11", "2025-01-12"])
+        self.assertIn(self.employees[1].email, lines[1])
+
+    def test_rejects_bad_dates_and_non_admins(self):
+        self.assertEqual(self.api.get("/api/shifts/export/", {"date_from": "10/01/2025"}).status_code, 400)
+        employee = api_client(self.employees[0])
+        self.assertEqual(employee.get("/api/shifts/export/").status_code, 403)
+
+
+class LocationCoverageTests(TestCase):
+    def setUp(self):
+        self.admin = make_admin()
+        self.employees = make_users(4)
+        self.api = api_client(self.admin)
+        self.day = date(2025, 3, 3)
+
+    def add_shift(self, employee, start, end, location="Main", **extra):
+        return Shift.objects.create(
+            employee=employee, date=self.day, start_time=start, end_time=end, location=location, **extra
+        )
+
+    def coverage(self, **params):
+        params = {"date_from": self.day, "date_to": self.day, **params}
+        response = self.api.get("/api/shifts/coverage/", params)
+        self.assertEqual(response.status_code, 200, response.data)
+        return response.data
+
+    def test_counts_staff_per_bucket(self):
+        self.add_shift(self.employees[0], time(9), time(17))
+        self.add_shift(self.employees[1], time(12), time(13, 10))
+        self.add_shift(self.employees[2], time(10), time(11), location="Annex")
+        self.add_shift(self.employees[3], time(9), time(17), status="cancelled")
+
+        data = self.coverage()
+
+        self.assertEqual(data["locations"], ["Annex", "Main"])
+        self.assertEqual(data["bucket_minutes"], 15)
+        annex, main = data["headcount"]
+        self.assertEqual(len(main), 96)
+        bucket = lambda hour, minute=0: hour * 4 + minute // 15
+        self.assertEqual((main[bucket(8, 45)], main[bucket(9)], main[bucket(16, 45)], main[bucket(17)]), (0, 1, 1, 0))
+        # 13:00-13:15 is only partly covered by the second shift, so it does not count.
+        self.assertEqual((main[bucket(12)], main[bucket(12, 45)], main[bucket(13)]), (2, 2, 1))
+        self.assertEqual(sum(annex), 4)
+
+    def test_overnight_shift_is_clipped_to_the_range(self):
+        self.add_shift(self.employees[0], time(22), time(6))
+
+        main = self.coverage()["headcount"][0]
+
+        self.assertEqual(sum(main), 8)
+        self.assertEqual(main[-1], 1)
+
+    def test_reports_gaps_within_opening_hours(self):
+        self.add_shift(self.employees[0], time(9), time(17))
+        self.add_shift(self.employees[1], time(9), time(12))
+        self.add_shift(self.employees[2], time(14), time(17))
+
+        data = self.coverage(target=2, open="09:00", close="17:00", location=["Main", "Annex"])
+
+        gaps = [(gap["location"], gap["start"].strftime("%H:%M"), gap["end"].strftime("%H:%M"), gap["shortfall"])
+                for gap in data["gaps"]]
+        self.assertEqual(gaps, [("Annex", "09:00", "17:00", 2), ("Main", "12:00", "14:00", 1)])
+
+    def test_rejects_invalid_ranges(self):
+        response = self.api.get("/api/shifts/coverage/", {"date_from": "2025-03-03", "date_to": "2025-06-03"})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("date_to", response.data)
+
+
+class SwapCandidateTests(TestCase):
+    def setUp(self):
+        self.requester, self.peer, self.other_peer, self.outsider = make_users(4)
+        cashier = Role.objects.create(name="Cashier", pay_per_hour=15)
+        cook = Role.objects.create(name="Cook", pay_per_hour=20)
+        UserRoleAssignment.objects.create(user=self.requester, role=cashier)
+        UserRoleAssignment.objects.create(user=self.peer, role=cashier)
+        UserRoleAssignment.objects.create(user=self.other_peer, role=cashier)
+        UserRoleAssignment.objects.create(user=self.outsider, role=cook)
+
+        self.day = timezone.localdate() + timedelta(days=1)
+        self.own = self.add_shift(self.requester, 0, time(9), time(17))
+        self.api = api_client(self.requester)
+
+    def add_shift(self, employee, days, start, end, location="Main"):
+        return Shift.objects.create(
+            employee=employee, date=self.day + timedelta(days=days),
+            start_time=start, end_time=end, location=location,
+        )
+
+    def candidates(self, **params):
+        response = self.api.get("/api/shifts/available-for-swap/", params)
+        self.assertEqual(response.status_code, 200, response.data)
+        return [item["id"] for item in response.data]
+
+    def test_only_returns_shifts_the_requester_can_take(self):
+        overlapping = self.add_shift(self.peer, 0, time(10), time(14))
+        too_little_rest = self.add_shift(self.peer, 0, time(20), time(23))
+        free = self.add_shift(self.peer, 1, time(9), time(17), location="Annex")
+        self.add_shift(self.outsider, 2, time(9), time(17))
+        on_leave = self.add_shift(self.peer, 3, time(7), time(11))
+        LeaveRequest.objects.create(
+            employee=self.requester, shift_date=on_leave.date, shift_time="morning",
+            location="Main", reason="Appointment", status="approved",
+        )
+
+        found = self.candidates()
+
+        self.assertEqual(found, [free.id])
+        self.assertNotIn(overlapping.id, found)
+        self.assertNotIn(too_little_rest.id, found)
+
+    def test_given_up_shift_frees_its_slot_and_ranks_by_location(self):
+        same_slot = self.add_shift(self.peer, 0, time(10), time(14))
+        elsewhere = self.add_shift(self.other_peer, 1, time(9), time(17), location="Annex")
+        later_same_location = self.add_shift(self.other_peer, 4, time(9), time(17))
+
+        response = self.api.get("/api/shifts/available-for-swap/", {"give_up": self.own.id})
+
+        self.assertEqual([item["id"] for item in response.data], [same_slot.id, later_same_location.id, elsewhere.id])
+        self.assertTrue(response.data[0]["same_location"])
+        self.assertEqual(response.data[0]["hours_apart"], 1.0)
+
+    def test_owner_must_be_able_to_take_the_given_up_shift(self):
+        self.add_shift(self.peer, 1, time(9), time(17))
+        # The peer works right after the given-up shift, so they can only swap that evening shift away.
+        evening = self.add_shift(self.peer, 0, time(18), time(22))
+
+        self.assertEqual(self.candidates(give_up=self.own.id), [evening.id])
+
+    def test_rejects_shift_of_someone_else(self):
+        other = self.add_shift(self.peer, 1, time(9), time(17))
+        response = self.api.get("/api/shifts/available-for-swap/", {"give_up": other.id})
+        self.assertEqual(response.status_code, 400)
@@ -4,9 +4,23 @@ from .admin_views import (
     ShiftDetailView,
     AdminManageShiftsView,
     create_shift_with_user,
+    bulk_create_shifts,
+    import_shifts_csv,
+    shift_import_errors,
+    export_shifts_csv,
+    ShiftTemplateListCreateView,
+    ShiftTemplateDetailView,
+    materialize_shift_templates,
+    generate_schedule_view,
+    location_coverage_view,
+)
+from .employee_views import (
+    MyShiftsView,
+    EmployeeShiftDetailView,
+    AvailableShiftsForSwapView,
+    calendar_feed_token,
+    shift_calendar_feed,
 )
-from .employee_views import MyShiftsView, EmployeeShiftDetailView
-from .employee_views import AvailableShiftsForSwapView
 
 urlpatterns = [
     # ----- Admin Endpoints -----
@@ -14,12 +28,20 @@ urlpatterns = [
     path("<int:pk>/", ShiftDetailView.as_view(), name="shift_detail"),
     path("admin-shifts/", AdminManageShiftsView.as_view(), name="admin_manage_shifts"),
     path("create_shift_with_user/", create_shift_with_user, name="create_shift_with_user"),
+    path("bulk-create/", bulk_create_shifts, name="bulk_create_shifts"),
+    path("import/", import_shifts_csv, name="import_shifts_csv"),
+    path("import/<int:pk>/errors/", shift_import_errors, name="shift_import_errors"),
+    path("export/", export_shifts_csv, name="export_shifts_csv"),
+    path("templates/", ShiftTemplateListCreateView.as_view(), name="shift_template_list_create"),
+    path("templates/<int:pk>/", ShiftTemplateDetailView.as_view(), name="shift_template_detail"),
+    path("templates/materialize/", materialize_shift_templates, name="materialize_shift_templates"),
+    path("generate/", generate_schedule_view, name="generate_schedule"),
+    path("coverage/", location_coverage_view, name="location_coverage"),
 
     # ----- Employee Endpoints -----
     path("my-shifts/", MyShiftsView.as_view(), name="my_shifts"),
     path("my-shifts/<int:pk>/", EmployeeShiftDetailView.as_view(), name="employee_shift_detail"),
-
-
-path("available-for-swap/", AvailableShiftsForSwapView.as_view(), name="shifts_available_for_swap"),
-
+    path("calendar/token/", calendar_feed_token, name="calendar_feed_token"),
+    path("calendar/<str:token>.ics", shift_calendar_feed, name="shift_calendar_feed"),
+    path("available-for-swap/", AvailableShiftsForSwapView.as_view(), name="shifts_available_for_swap"),
 ]
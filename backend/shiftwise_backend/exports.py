@@ -0,0 +1,80 @@
+# shiftwise_backend/exports.py
+"""
+Shared helpers for the streaming CSV export endpoints.
+
+Exports read their queryset with values_list() and iterator(), so rows are
+fetched in chunks of EXPORT_CHUNK_SIZE (a server-side cursor on Postgres)
+and written out as they arrive. No model instances are built and the file
+is never held in memory, so peak memory does not depend on the row count.
+"""
+import csv
+from datetime import date, datetime, time, timedelta
+
+from django.conf import settings
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+from rest_framework.exceptions import ValidationError
+
+
+class Echo:
+    """File-like object whose write() returns the line instead of storing it."""
+
+    def write(self, value):
+        return value
+
+
+def chunk_size():
+    return getattr(settings, "EXPORT_CHUNK_SIZE", 2000)
+
+
+def csv_lines(queryset, columns):
+    """
+    Yields the CSV for `queryset`, a header line first and then the rows in
+    blocks of chunk_size(). `columns` is a sequence of (header, field) pairs
+    where field is any values_list() lookup, e.g. "employee__email".
+    """
+    size = chunk_size()
+    writer = csv.writer(Echo())
+    yield writer.writerow([header for header, _ in columns])
+
+    block = []
+    for row in queryset.values_list(*(field for _, field in columns)).iterator(chunk_size=size):
+        block.append(writer.writerow(row))
+        if len(block) == size:
+            yield "".join(block)
+            block = []
+    if block:
+        yield "".join(block)
+
+
+def csv_response(queryset, columns, filename):
+    response = StreamingHttpResponse(csv_lines(queryset, columns), content_type="text/csv")
+    response["Content-Disposition"] = f'attachment; filename="{filename}"'
+    return response
+
+
+def parse_date_range(params):
+    """
+    Reads the optional ?date_from and ?date_to (YYYY-MM-DD, inclusive) query
+    parameters. Returns (date_from, date_to); either may be None.
+    """
+    bounds = []
+    for name in ("date_from", "date_to"):
+        value = params.get(name)
+        try:
+            bounds.append(date.fromisoformat(value) if value else None)
+        except ValueError:
+            raise ValidationError({name: "Date format must be YYYY-MM-DD."})
+    if bounds[0] and bounds[1] and bounds[0] > bounds[1]:
+        raise ValidationError({"date_to": "date_to must not be before date_from."})
+    return tuple(bounds)
+
+
+def day_start(day):
+    """Aware datetime at midnight starting `day`, for index-friendly datetime range filters."""
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+def day_end(day):
+    """Aware datetime at midnight ending `day` (exclusive upper bound)."""
+    return day_start(day + timedelta(days=1))
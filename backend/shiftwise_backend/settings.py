@@ -107,10 +107,15 @@ TEMPLATES = [
 WSGI_APPLICATION = 'shiftwise_backend.wsgi.application'
 
 # Database Configuration
+# Optional file for the test database (e.g. test_db.sqlite3). Unset, tests use the shared
+# in-memory database, whose table locks fail immediately instead of waiting, so the
+# concurrency tests that need real SQLite locking are skipped.
+SQLITE_TEST_NAME = os.getenv("SQLITE_TEST_NAME")
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        'TEST': {'NAME': SQLITE_TEST_NAME},
     }
 }
 
@@ -128,6 +133,44 @@ TIME_ZONE = 'UTC'
 USE_I18N = True
 USE_TZ = True
 
+# Scheduling rules
+# Minimum hours an employee must have off between two shifts.
+SHIFT_MIN_REST_HOURS = float(os.getenv("SHIFT_MIN_REST_HOURS", "8"))
+# How many weeks ahead recurring shift templates are turned into shifts.
+SHIFT_TEMPLATE_HORIZON_WEEKS = int(os.getenv("SHIFT_TEMPLATE_HORIZON_WEEKS", "4"))
+# Weekly hour cap used by the automatic schedule generator.
+SCHEDULE_MAX_WEEKLY_HOURS = float(os.getenv("SCHEDULE_MAX_WEEKLY_HOURS", "40"))
+# Hourly cost assumed for employees without a role assignment.
+SCHEDULE_DEFAULT_HOURLY_RATE = os.getenv("SCHEDULE_DEFAULT_HOURLY_RATE", "15.00")
+# How far back the .ics shift feed reaches.
+CALENDAR_FEED_PAST_DAYS = int(os.getenv("CALENDAR_FEED_PAST_DAYS", "90"))
+# Rows validated and inserted together by the CSV shift import.
+SHIFT_IMPORT_BATCH_SIZE = int(os.getenv("SHIFT_IMPORT_BATCH_SIZE", "1000"))
+# Rows fetched per database round trip by the streaming CSV exports.
+EXPORT_CHUNK_SIZE = int(os.getenv("EXPORT_CHUNK_SIZE", "2000"))
+# Most offline clock events accepted in one batch upload.
+PUNCH_BATCH_MAX_EVENTS = int(os.getenv("PUNCH_BATCH_MAX_EVENTS", "500"))
+# Minutes a punch may be off the schedule before reconciliation reports it.
+RECONCILE_GRACE_MINUTES = int(os.getenv("RECONCILE_GRACE_MINUTES", "5"))
+# Redis key prefix of the live presence index.
+PRESENCE_KEY_PREFIX = os.getenv("PRESENCE_KEY_PREFIX", "presence:")
+# Closed attendance records older than this many whole months are moved to the archive table.
+ATTENDANCE_ARCHIVE_MONTHS = int(os.getenv("ATTENDANCE_ARCHIVE_MONTHS", "12"))
+# Employees paid per chunk (and per transaction) by a payroll run.
+PAYROLL_CHUNK_SIZE = int(os.getenv("PAYROLL_CHUNK_SIZE", "500"))
+# Threads of the in-process payroll worker.
+PAYROLL_WORKERS = int(os.getenv("PAYROLL_WORKERS", "1"))
+# Salary rules of the payroll calculator (see payroll/calculator.py). Rates are decimal strings.
+PAYROLL_STANDARD_HOURS = os.getenv("PAYROLL_STANDARD_HOURS", "40")
+PAYROLL_OVERTIME_MULTIPLIER = os.getenv("PAYROLL_OVERTIME_MULTIPLIER", "1.5")
+PAYROLL_DEDUCTION_RATE = os.getenv("PAYROLL_DEDUCTION_RATE", "0")
+# How amounts are rounded to the cent: half_up, half_even or down.
+PAYROLL_ROUNDING = os.getenv("PAYROLL_ROUNDING", "half_up")
+# Largest draft schedule (in shifts) the labor-cost simulation accepts.
+PAYROLL_SIMULATION_MAX_SHIFTS = int(os.getenv("PAYROLL_SIMULATION_MAX_SHIFTS", "5000"))
+# How long users' role rate timelines stay cached (they are also invalidated on change).
+ROLE_RATE_CACHE_SECONDS = int(os.getenv("ROLE_RATE_CACHE_SECONDS", "3600"))
+
 # Static and Media Files for Deployment
 STATIC_URL = '/static/'
 STATIC_ROOT = BASE_DIR / 'staticfiles'  # Required for Render Deployment
@@ -0,0 +1,97 @@
+# shiftwise_backend/testing.py
+"""
+Shared helpers for the apps' test suites.
+
+make_users(), make_admin() and api_client() build fixtures for any test
+case. query_plan() shows how SQLite runs the queries of a request, so
+tests can check that they seek on an index. QueryBudgetMixin asserts that a list endpoint runs a fixed number of
+queries no matter how many rows it returns, which is how N+1 regressions
+in serializers are caught.
+"""
+from django.contrib.auth import get_user_model
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+User = get_user_model()
+
+
+def make_users(count, prefix="user", **extra_fields):
+    """
+    Bulk-creates `count` users without hashing passwords (fast enough for
+    fixtures with thousands of rows). Returns the saved users.
+    """
+    start = User.objects.count()
+    users = [
+        User(
+            email=f"{prefix}{start + i}@example.com",
+            id_code=f"{prefix[:4].upper()}{start + i}",
+            name=f"{prefix.title()} {start + i}",
+            password="!",
+            **extra_fields
+        )
+        for i in range(count)
+    ]
+    return User.objects.bulk_create(users)
+
+
+def make_admin():
+    """One staff user."""
+    return make_users(1, prefix="admin", is_staff=True)[0]
+
+
+def api_client(user):
+    """An APIClient authenticated as `user`, without going through JWT."""
+    client = APIClient()
+    client.force_authenticate(user)
+    return client
+
+
+def query_plan(client, url, table, params=None):
+    """
+    GETs `url` and returns SQLite's EXPLAIN QUERY PLAN details (e.g.
+    "SEARCH t USING INDEX i (a>?)") of the queries that read `table`.
+    """
+    with CaptureQueriesContext(connection) as context:
+        client.get(url, params)
+    details = []
+    with connection.cursor() as cursor:
+        for query in context.captured_queries:
+            if f'FROM "{table}"' in query["sql"]:
+                cursor.execute("EXPLAIN QUERY PLAN " + query["sql"])
+                details.extend(row[-1] for row in cursor.fetchall())
+    return details
+
+
+class QueryBudgetMixin:
+    """
+    Mixin for django.test.TestCase.
+
+    assertQueryBudget(client, url, budget, populate) calls `populate(rows)`
+    for each size in `budget_sizes`, GETs `url` and fails if the request ran
+    more than `budget` queries. It also checks that the response really
+    contains `rows` items (plus `extra_rows`, e.g. the requesting admin in a
+    user list) so an empty fixture cannot pass by accident. Each size runs
+    inside its own savepoint, so fixtures do not leak between sizes.
+    """
+    budget_sizes = (10, 100, 1000)
+
+    def assertQueryBudget(self, client, url, budget, populate, extra_rows=0, results=None):
+        for rows in self.budget_sizes:
+            with self.subTest(url=url, rows=rows):
+                savepoint = transaction.savepoint()
+                try:
+                    populate(rows)
+                    with CaptureQueriesContext(connection) as context:
+                        response = client.get(url)
+                    self.assertEqual(response.status_code, 200, response.content[:500])
+                    data = results(response) if results else response.data
+                    self.assertEqual(len(data), rows + extra_rows)
+                    executed = [query["sql"] for query in context.captured_queries]
+                    self.assertLessEqual(
+                        len(executed), budget,
+                        f"{url} ran {len(executed)} queries for {rows} rows (budget {budget}):\n"
+                        + "\n".join(executed)
+                    )
+                finally:
+                    transaction.savepoint_rollback(savepoint)
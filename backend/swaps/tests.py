@@ -1,3 +1,26 @@
 from django.test import TestCase
 
-# Create your tests here.
+from shiftwise_backend.testing import QueryBudgetMixin, api_client, make_admin, make_users
+from shifts.tests import make_shifts
+from .models import SwapShiftRequest
+
+
+class SwapRequestQueryBudgetTests(QueryBudgetMixin, TestCase):
+    def setUp(self):
+        self.admin = make_admin()
+        self.employee = make_users(1, prefix="staff")[0]
+        self.others = make_users(20)
+
+    def make_requests(self, count):
+        given = make_shifts([self.employee], count)
+        desired = make_shifts(self.others, count)
+        SwapShiftRequest.objects.bulk_create([
+            SwapShiftRequest(requested_by=self.employee, give_up_shift=give, desired_shift=want)
+            for give, want in zip(given, desired)
+        ])
+
+    def test_employee_swap_requests(self):
+        self.assertQueryBudget(api_client(self.employee), "/api/swaps/", 1, self.make_requests)
+
+    def test_admin_swap_requests(self):
+        self.assertQueryBudget(api_client(self.admin), "/api/swaps/admin/", 1, self.make_requests)
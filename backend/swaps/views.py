@@ -2,6 +2,9 @@ from rest_framework import generics, permissions
 from .models import SwapShiftRequest
 from .serializers import SwapShiftRequestSerializer
 
+# Relations read by SwapShiftRequestSerializer (each shift's __str__ reads its employee).
+SWAP_RELATED = ('requested_by', 'give_up_shift__employee', 'desired_shift__employee')
+
 
 
 
@@ -11,19 +14,19 @@ class EmployeeSwapRequestView(generics.ListCreateAPIView):
     permission_classes = [permissions.IsAuthenticated]
 
     def get_queryset(self):
-        return SwapShiftRequest.objects.filter(requested_by=self.request.user)
+        return SwapShiftRequest.objects.filter(requested_by=self.request.user).select_related(*SWAP_RELATED)
 
     def perform_create(self, serializer):
         serializer.save(requested_by=self.request.user)
 
 # Admin: View all swap requests
 class AdminSwapRequestListView(generics.ListAPIView):
-    queryset = SwapShiftRequest.objects.all().order_by('-created_at')
+    queryset = SwapShiftRequest.objects.select_related(*SWAP_RELATED).order_by('-created_at')
     serializer_class = SwapShiftRequestSerializer
     permission_classes = [permissions.IsAdminUser]
 
 # Admin: Approve/Deny a specific request
 class AdminSwapRequestUpdateView(generics.UpdateAPIView):
-    queryset = SwapShiftRequest.objects.all()
+    queryset = SwapShiftRequest.objects.select_related(*SWAP_RELATED)
     serializer_class = SwapShiftRequestSerializer
     permission_classes = [permissions.IsAdminUser]
@@ -1,6 +1,6 @@
 from rest_framework import serializers
 from django.contrib.auth import get_user_model
-from roles.models import UserRoleAssignment  # Import the role assignment model
+from roles.rates import RateTable  # Role assignments, resolved by effective date
 
 User = get_user_model()
 
@@ -45,11 +45,12 @@ class UserSerializer(serializers.ModelSerializer):
         return None
 
     def get_assigned_role(self, obj):
-        # Fetch the most recent role assignment for the user
-        assignment = UserRoleAssignment.objects.filter(user=obj).order_by('-assigned_at').first()
-        if assignment:
+        # The role in effect now, from the list view's rate table when present (loaded once for the page)
+        table = self.context.get('rate_table') or RateTable([obj.id])
+        rate = table.at(obj.id)
+        if rate:
             return {
-                "name": assignment.role.name,
-                "pay_per_hour": str(assignment.role.pay_per_hour)
+                "name": rate.name,
+                "pay_per_hour": str(rate.pay_per_hour)
             }
         return None
@@ -1,3 +1,24 @@
+from decimal import Decimal
+
 from django.test import TestCase
 
-# Create your tests here.
+from roles.models import Role, UserRoleAssignment
+from shiftwise_backend.testing import QueryBudgetMixin, api_client, make_admin, make_users
+
+
+class AdminUserListQueryBudgetTests(QueryBudgetMixin, TestCase):
+    def setUp(self):
+        self.admin = make_admin()
+        self.role = Role.objects.create(name="Cashier", pay_per_hour=Decimal("18.50"))
+
+    def make_assigned_users(self, count):
+        UserRoleAssignment.objects.bulk_create([
+            UserRoleAssignment(user=user, role=self.role) for user in make_users(count)
+        ])
+
+    def test_admin_user_list(self):
+        # One query for the users, one for their role rate timelines (none once they are cached).
+        self.assertQueryBudget(
+            api_client(self.admin), "/api/users/admin/users/", 2,
+            self.make_assigned_users, extra_rows=1,
+        )
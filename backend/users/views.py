@@ -2,6 +2,7 @@ from rest_framework import generics, permissions, status, filters
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.response import Response
 from django.contrib.auth import get_user_model
+from roles.rates import RateTable
 from .serializers import UserSerializer
 
 User = get_user_model()
@@ -20,6 +21,13 @@ class AdminUserListView(generics.ListAPIView):
     filter_backends = [filters.SearchFilter]
     search_fields = ["email", "first_name", "last_name"]  # Adjust if needed (e.g., ["email", "name"])
 
+    def get_serializer(self, *args, **kwargs):
+        # Load the listed users' role timelines together so assigned_role costs no extra queries
+        if kwargs.get('many'):
+            kwargs['context'] = self.get_serializer_context()
+            kwargs['context']['rate_table'] = RateTable(user.id for user in args[0])
+        return super().get_serializer(*args, **kwargs)
+
 class AdminUserDetailView(generics.RetrieveUpdateDestroyAPIView):
     """
     Allows admin to retrieve, update, or delete a single user by ID.